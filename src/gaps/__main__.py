@@ -3,7 +3,15 @@ import sys
 import logging
 import os
 
-from .gaps import GAPS
+from . import import_report
+
+# timed before the imports below, which load androguard and the analysis
+if "-import_report" in sys.argv or "--import_report" in sys.argv:
+    import_report.start()
+
+from .gaps import GAPS  # noqa: E402
+from .snapshot import SNAPSHOT_DIR  # noqa: E402
+from . import batch  # noqa: E402
 
 ###############################################################################
 # LOGGING
@@ -30,6 +38,9 @@ def start_gaps(
     conditional: bool,
     loglevel: str,
     max_paths: int,
+    snapshot_dir: str = SNAPSHOT_DIR,
+    workers: int = 1,
+    max_paths_per_entry: int = None,
 ):
     """
     Initializes and starts the path finding process.
@@ -46,6 +57,11 @@ def start_gaps(
         conditional (bool): Flag indicating whether to consider conditional paths.
         loglevel (str): Log level.
         max_paths (int): Maximum number of paths to consider.
+        snapshot_dir (str): Directory of the analysis snapshots, None to
+            disable them.
+        workers (int): Maximum number of processes running the queries.
+        max_paths_per_entry (int): Maximum number of paths to each entry
+            point of a query, None for no limit.
     """
     if dalvik_path is None:
         LOG.error("ERROR: Missing DALVIK path.")
@@ -68,6 +84,9 @@ def start_gaps(
         conditional,
         loglevel,
         max_paths,
+        snapshot_dir,
+        query_workers=workers,
+        max_paths_per_entry=max_paths_per_entry,
     )
 
     gaps.start_path_finding()
@@ -79,7 +98,32 @@ def start_gaps(
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument(
-        "-i", "--input", help="APK/DEX path file to disassemble", required=True
+        "-i", "--input", help="APK/DEX path file to disassemble"
+    )
+    parser.add_argument(
+        "-batch",
+        "--batch_dir",
+        help="Directory of APK/DEX files to analyze in batch",
+    )
+    parser.add_argument(
+        "-workers",
+        "--workers",
+        help="Number of apps analyzed in parallel in batch mode, or of queries run in parallel on a single app (default: 1)",
+        type=int,
+        default=1,
+    )
+    parser.add_argument(
+        "-timeout",
+        "--timeout",
+        help=f"Maximum analysis time of each app in batch mode, in seconds (default: {batch.BATCH_TIMEOUT})",
+        type=int,
+        default=batch.BATCH_TIMEOUT,
+    )
+    parser.add_argument(
+        "-max_memory",
+        "--max_memory",
+        help="Maximum memory of each app in batch mode, in MB",
+        type=int,
     )
     parser.add_argument(
         "-m", "--method", help="Target method to generate paths from"
@@ -134,23 +178,51 @@ if __name__ == "__main__":
         type=int,
         default=1000,
     )
+    parser.add_argument(
+        "-entry_path_limit",
+        "--entry_path_limit",
+        help="Limit the number of paths generated to each entry point of a "
+        "query, spreading the paths over the entry points (default: no limit)",
+        type=int,
+    )
     parser.add_argument(
         "-up",
         "--unconstrained_paths",
         help="Generate paths without a limit",
         action="store_true",
     )
+    parser.add_argument(
+        "-snapshot",
+        "--snapshot_dir",
+        help=f"Directory storing the analysis snapshots (default: {SNAPSHOT_DIR})",
+        default=SNAPSHOT_DIR,
+    )
+    parser.add_argument(
+        "-no_snapshot",
+        "--no_snapshot",
+        help="Always analyze the app from scratch",
+        action="store_true",
+    )
+    parser.add_argument(
+        "-import_report",
+        "--import_report",
+        help="Report the time spent importing modules during the run",
+        action="store_true",
+    )
     args = parser.parse_args(sys.argv[1:])
     if not args.loglevel:
         args.loglevel = 0
     logging.basicConfig(level=args.loglevel)
     LOG.setLevel(args.loglevel)
 
-    if not args.input:
+    if not args.input and not args.batch_dir:
         LOG.error("[-] ERROR: NO INPUT")
         sys.exit(1)
 
-    LOG.info(f"[+] LOADING {args.input}")
+    if args.batch_dir:
+        LOG.info(f"[+] LOADING APPS IN {args.batch_dir}")
+    else:
+        LOG.info(f"[+] LOADING {args.input}")
     if args.method:
         LOG.info(f"[+] LOOKING FOR {args.method}")
     if args.class_name:
@@ -174,9 +246,37 @@ if __name__ == "__main__":
     if args.output:
         output = args.output
     LOG.info(f"[+] OUTPUT DIRECTORY: {output}")
+    if args.no_snapshot:
+        args.snapshot_dir = None
+    else:
+        LOG.info(f"[+] SNAPSHOT DIRECTORY: {args.snapshot_dir}")
     if not os.path.exists(output):
         os.mkdir(output)
-    if args.input:
+    if args.batch_dir:
+        max_memory = None
+        if args.max_memory:
+            max_memory = args.max_memory * 1024 * 1024
+        batch.run_batch(
+            args.batch_dir,
+            {
+                "target_method": args.method,
+                "class_name": args.class_name,
+                "parent_class": args.parent_class,
+                "signature": args.signature,
+                "seed_file": args.seed_file,
+                "custom_seed_file": args.custom_seed_file,
+                "output": output,
+                "conditional": args.conditional,
+                "loglevel": args.loglevel,
+                "max_paths": args.path_limit,
+                "snapshot_dir": args.snapshot_dir,
+                "max_paths_per_entry": args.entry_path_limit,
+            },
+            args.workers,
+            args.timeout,
+            max_memory,
+        )
+    elif args.input:
         start_gaps(
             args.input,
             args.method,
@@ -189,4 +289,7 @@ if __name__ == "__main__":
             args.conditional,
             args.loglevel,
             args.path_limit,
+            args.snapshot_dir,
+            args.workers,
+            args.entry_path_limit,
         )
@@ -0,0 +1,214 @@
+import os
+import importlib
+import time
+import logging
+import resource
+import signal
+import multiprocessing
+from multiprocessing.connection import wait
+from collections import deque
+
+from .gaps import GAPS, init_stats, save_stats_row
+
+###############################################################################
+# LOGGING
+###############################################################################
+
+LOG = logging.getLogger("gaps")
+
+###############################################################################
+# GLOBALS
+###############################################################################
+
+APP_EXTENSIONS = (".apk", ".dex")
+
+# maximum analysis time of each app, in seconds
+BATCH_TIMEOUT = 3600
+
+###############################################################################
+# CODE
+###############################################################################
+
+
+def find_apps(batch_dir: str) -> list:
+    """
+    Lists the apps of a directory.
+
+    Args:
+        batch_dir (str): Directory containing APK/DEX files.
+
+    Returns:
+        list: Sorted paths of the apps.
+    """
+    return sorted(
+        os.path.join(batch_dir, file_name)
+        for file_name in os.listdir(batch_dir)
+        if os.path.splitext(file_name)[1] in APP_EXTENSIONS
+    )
+
+
+def run_batch(
+    batch_dir: str,
+    gaps_args: dict,
+    n_workers: int,
+    timeout: int = BATCH_TIMEOUT,
+    max_memory: int = None,
+) -> list:
+    """
+    Analyzes all the apps of a directory with a pool of worker processes.
+
+    Every app is analyzed in its own process forked from this one, so that
+    interpreter startup and imports are paid once for the whole batch, and
+    a process exceeding its time or memory limit only loses its own app.
+    The statistics of the apps are collected here and appended to a single
+    statistics file, while each app writes its outputs when it finishes.
+
+    Args:
+        batch_dir (str): Directory containing APK/DEX files.
+        gaps_args (dict): Arguments of GAPS shared by all the apps.
+        n_workers (int): Maximum number of apps analyzed at the same time.
+        timeout (int, optional): Maximum analysis time of each app, in
+            seconds, None for no limit. Defaults to BATCH_TIMEOUT.
+        max_memory (int, optional): Maximum memory of each app, in bytes,
+            None for no limit. Defaults to None.
+
+    Returns:
+        list: Paths of the apps whose analysis failed.
+    """
+    apps = find_apps(batch_dir)
+    LOG.info(f"[+] ANALYZING {len(apps)} APPS WITH {n_workers} WORKERS")
+    _preload()
+    stats_path = os.path.join(gaps_args["output"], "stats.csv")
+    init_stats(stats_path)
+    context = multiprocessing.get_context("fork")
+    pending = deque(apps)
+    running = {}
+    failed = deque()
+    while pending or running:
+        while pending and len(running) < n_workers:
+            dalvik_path = pending.popleft()
+            receiver, sender = context.Pipe(duplex=False)
+            process = context.Process(
+                target=_run_app,
+                args=(dalvik_path, gaps_args, max_memory, sender),
+            )
+            process.start()
+            sender.close()
+            deadline = float("inf")
+            if timeout:
+                deadline = time.time() + timeout
+            running[process.sentinel] = (
+                process,
+                dalvik_path,
+                receiver,
+                deadline,
+            )
+        next_deadline = min(app[3] for app in running.values())
+        wait_time = None
+        if next_deadline != float("inf"):
+            wait_time = max(0, next_deadline - time.time())
+        ready = wait(list(running), timeout=wait_time)
+        now = time.time()
+        for sentinel in list(running):
+            process, dalvik_path, receiver, deadline = running[sentinel]
+            if sentinel in ready:
+                stats_row = _receive_stats(receiver)
+                process.join()
+                if stats_row is None:
+                    LOG.error(
+                        f"[-] ANALYSIS FAILED FOR {dalvik_path} "
+                        f"(EXIT CODE {process.exitcode})"
+                    )
+                    _kill_app(process)
+                    failed.append(dalvik_path)
+                else:
+                    save_stats_row(stats_path, stats_row)
+                    LOG.info(f"[+] ANALYZED {dalvik_path}")
+            elif now >= deadline:
+                _kill_app(process)
+                process.join()
+                LOG.error(f"[-] TIMEOUT FOR {dalvik_path}")
+                failed.append(dalvik_path)
+            else:
+                continue
+            receiver.close()
+            del running[sentinel]
+    LOG.info(f"[+] ANALYZED {len(apps) - len(failed)}/{len(apps)} APPS")
+    return list(failed)
+
+
+def _kill_app(process):
+    """
+    Kills the process group of an app, so that the workers forked by its
+    process are killed along with it.
+
+    Args:
+        process: Worker process of the app.
+
+    Returns:
+        None
+    """
+    try:
+        os.killpg(process.pid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass
+
+
+def _preload():
+    """
+    Imports the modules that single runs load lazily, so that the workers
+    inherit them instead of importing them again for each app.
+
+    Returns:
+        None
+    """
+    importlib.import_module(".myAndroguard", __package__)
+
+
+def _run_app(dalvik_path: str, gaps_args: dict, max_memory: int, sender):
+    """
+    Analyzes an app in a worker process.
+
+    Args:
+        dalvik_path (str): Path to the Dalvik file.
+        gaps_args (dict): Arguments of GAPS.
+        max_memory (int): Maximum memory of the process, in bytes.
+        sender: Connection used to send back the statistics of the app.
+
+    Returns:
+        None
+    """
+    # lead a process group, so that the app can be killed with its workers
+    os.setpgrp()
+    if max_memory:
+        resource.setrlimit(resource.RLIMIT_AS, (max_memory, max_memory))
+    # apps are already analyzed in parallel, their indexing and queries
+    # are not, which also keeps the memory limit of the app in this process
+    gaps = GAPS(
+        dalvik_path,
+        **gaps_args,
+        append_stats=False,
+        query_workers=1,
+        index_workers=1,
+    )
+    gaps.start_path_finding()
+    sender.send(gaps.stats_row)
+    sender.close()
+
+
+def _receive_stats(receiver) -> list:
+    """
+    Receives the statistics of an app from its worker process.
+
+    Args:
+        receiver: Connection of the worker process.
+
+    Returns:
+        list: Statistics of the app, None if the analysis failed.
+    """
+    try:
+        if receiver.poll():
+            return receiver.recv()
+    except (EOFError, OSError):
+        pass
+    return None
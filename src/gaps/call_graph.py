@@ -0,0 +1,440 @@
+import logging
+from array import array
+from collections import deque, defaultdict
+
+###############################################################################
+# LOGGING
+###############################################################################
+
+LOG = logging.getLogger("gaps")
+
+###############################################################################
+# GLOBALS
+###############################################################################
+
+# distance of the methods that no entry point reaches
+UNREACHABLE = -1
+
+# callbacks through which the framework enters the subclasses of components
+COMPONENT_CALLBACKS = [
+    "onCreate(Landroid/os/Bundle;)V",
+    "onCreate()V",
+    "onReceive(Landroid/content/Context;Landroid/content/Intent;)V",
+]
+
+###############################################################################
+# CODE
+###############################################################################
+
+
+class CallGraph:
+    """
+    Reverse call graph of the methods of the app, condensed into strongly
+    connected components.
+
+    Methods are numbered by their index in the method graphs, and both the
+    callers of each method and the callers of each component are stored in
+    compressed sparse row form. The distance of each component from the
+    nearest entry point, in calls between components, is computed once by
+    a breadth-first search from all the entry points.
+    """
+
+    __slots__ = (
+        "method_ids",
+        "starts",
+        "callers",
+        "components",
+        "member_starts",
+        "members",
+        "component_starts",
+        "component_callers",
+        "distances",
+    )
+
+    def __init__(self, method_ids: dict, callers: dict, entries: set):
+        self.method_ids = method_ids
+        n_methods = max(method_ids.values(), default=-1) + 1
+        self.starts, self.callers = _to_csr(n_methods, callers)
+        self._condense(n_methods)
+        self._compute_distances(entries)
+
+    def __len__(self) -> int:
+        return len(self.components)
+
+    def _condense(self, n_methods: int):
+        """
+        Finds the strongly connected components with an iterative version
+        of Tarjan's algorithm, numbering them in completion order, and the
+        callers of each component.
+
+        Args:
+            n_methods (int): Number of methods.
+
+        Returns:
+            None
+        """
+        components = array("i", [-1]) * n_methods
+        lowlinks = array("i", [0]) * n_methods
+        order = array("i", [-1]) * n_methods
+        stack = []
+        n_components = 0
+        counter = 0
+        for root in range(n_methods):
+            if order[root] != -1:
+                continue
+            order[root] = lowlinks[root] = counter
+            counter += 1
+            stack.append(root)
+            work = [(root, self.starts[root])]
+            while work:
+                method, position = work[-1]
+                if position < self.starts[method + 1]:
+                    work[-1] = (method, position + 1)
+                    caller = self.callers[position]
+                    if order[caller] == -1:
+                        order[caller] = lowlinks[caller] = counter
+                        counter += 1
+                        stack.append(caller)
+                        work.append((caller, self.starts[caller]))
+                    elif components[caller] == -1:
+                        lowlinks[method] = min(lowlinks[method], order[caller])
+                    continue
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    lowlinks[parent] = min(lowlinks[parent], lowlinks[method])
+                if lowlinks[method] == order[method]:
+                    while True:
+                        member = stack.pop()
+                        components[member] = n_components
+                        if member == method:
+                            break
+                    n_components += 1
+        self.components = array("I", components)
+        members = defaultdict(list)
+        component_callers = defaultdict(set)
+        for method in range(n_methods):
+            component = components[method]
+            members[component].append(method)
+            for caller in self.get_callers(method):
+                caller_component = components[caller]
+                if caller_component != component:
+                    component_callers[component].add(caller_component)
+        self.member_starts, self.members = _to_csr(n_components, members)
+        self.component_starts, self.component_callers = _to_csr(
+            n_components, component_callers
+        )
+
+    def _compute_distances(self, entries: set):
+        """
+        Computes the distance of each component from the nearest entry
+        point, by a breadth-first search along the reversed edges.
+
+        Args:
+            entries (set): Indexes of the entry point methods.
+
+        Returns:
+            None
+        """
+        n_components = len(self.member_starts) - 1
+        callees = defaultdict(list)
+        for component in range(n_components):
+            for caller in self.get_component_callers(component):
+                callees[caller].append(component)
+        self.distances = array("i", [UNREACHABLE]) * n_components
+        queue = deque()
+        for component in sorted({self.components[entry] for entry in entries}):
+            self.distances[component] = 0
+            queue.append(component)
+        while queue:
+            component = queue.popleft()
+            for callee in callees.get(component, ()):
+                if self.distances[callee] == UNREACHABLE:
+                    self.distances[callee] = self.distances[component] + 1
+                    queue.append(callee)
+
+    def get_method_index(self, signature: str) -> int:
+        """
+        Retrieves the index of a method.
+
+        Args:
+            signature (str): Full signature of the method, e.g.
+                `Lcom/app/A;->m()V`.
+
+        Returns:
+            int: Index of the method, None if not defined by the app.
+        """
+        return self.method_ids.get(signature)
+
+    def get_callers(self, method_index: int) -> array:
+        """
+        Retrieves the methods calling a method, directly or through the
+        framework.
+
+        Args:
+            method_index (int): Index of the method.
+
+        Returns:
+            array: Indexes of the callers.
+        """
+        return self.callers[
+            self.starts[method_index] : self.starts[method_index + 1]
+        ]
+
+    def get_component(self, method_index: int) -> int:
+        """
+        Retrieves the strongly connected component of a method.
+
+        Args:
+            method_index (int): Index of the method.
+
+        Returns:
+            int: Component of the method.
+        """
+        return self.components[method_index]
+
+    def get_members(self, component: int) -> array:
+        """
+        Retrieves the methods of a strongly connected component.
+
+        Args:
+            component (int): Component.
+
+        Returns:
+            array: Indexes of the methods.
+        """
+        return self.members[
+            self.member_starts[component] : self.member_starts[component + 1]
+        ]
+
+    def get_component_callers(self, component: int) -> array:
+        """
+        Retrieves the components calling a component.
+
+        Args:
+            component (int): Component.
+
+        Returns:
+            array: Calling components.
+        """
+        return self.component_callers[
+            self.component_starts[component] : self.component_starts[
+                component + 1
+            ]
+        ]
+
+    def get_entry_distance(self, method_index: int) -> int:
+        """
+        Retrieves the number of calls between components separating a
+        method from the nearest entry point.
+
+        Args:
+            method_index (int): Index of the method.
+
+        Returns:
+            int: Distance from the nearest entry point, UNREACHABLE if no
+                entry point reaches the method.
+        """
+        return self.distances[self.components[method_index]]
+
+    def reaches_entry(self, method_index: int) -> bool:
+        """
+        Checks whether an entry point reaches a method.
+
+        Args:
+            method_index (int): Index of the method.
+
+        Returns:
+            bool: True if reachable, False otherwise.
+        """
+        return self.get_entry_distance(method_index) != UNREACHABLE
+
+
+def _to_csr(n_rows: int, rows: dict) -> tuple:
+    """
+    Stores lists of integers in compressed sparse row form.
+
+    Args:
+        n_rows (int): Number of rows.
+        rows (dict): Row to integers, missing rows being empty.
+
+    Returns:
+        tuple: Start of each row, followed by the end of the last one, and
+            the integers of all the rows, each row being sorted.
+    """
+    starts = array("I", [0])
+    values = array("I")
+    for row in range(n_rows):
+        values.extend(sorted(rows.get(row, ())))
+        starts.append(len(values))
+    return starts, values
+
+
+def get_call_graph(gaps) -> CallGraph:
+    """
+    Builds the reverse call graph of the app from the indexes of the
+    disassembly and the ICC information.
+
+    Besides direct invocations, resolved along the class hierarchy, a
+    method is called by the methods instantiating, starting or using its
+    class, by the subclasses entering it through a component callback, by
+    the explicit intents targeting its class and by the reflection calls
+    resolved to it. Implicit edges are only added to the methods that no
+    method invokes by their exact signature, as the paths only go through
+    the framework for them.
+    The methods of the main activities, of the application, of the
+    exported components, of the components receiving intent actions and of
+    the fragments declared by the resources are entry points.
+
+    Args:
+        gaps: Object containing information about gaps.
+
+    Returns:
+        CallGraph: Reverse call graph of the app.
+    """
+    method_ids = {}
+    class_methods = defaultdict(list)
+    for method_index, (_, parent_method, _) in gaps.method_graphs.items():
+        signature = parent_method.split()[1]
+        method_ids[signature] = method_index
+        class_methods[signature.split(";->")[0]].append(method_index)
+
+    callers = defaultdict(set)
+    class_users = defaultdict(set)
+    for callee, call_sites in gaps.call_sites.items():
+        class_name, _, rest_of_signature = callee.partition(";->")
+        if "(" not in rest_of_signature:
+            continue
+        if rest_of_signature.startswith("<init>") or callee not in method_ids:
+            class_users[class_name].update(call_sites)
+        for target in _resolve_callee(
+            class_name, rest_of_signature, method_ids, gaps
+        ):
+            callers[target].update(call_sites)
+
+    for class_name, methods in class_methods.items():
+        implicit_callers = set(class_users.get(class_name, ()))
+        implicit_callers.update(gaps.object_instantiated.get(class_name, ()))
+        if "$" in class_name:
+            implicit_callers.update(
+                gaps.object_instantiated.get(class_name.split("$")[0], ())
+            )
+        for subclass in gaps.class_hierarchy.get_subclasses(class_name, True):
+            for callback in COMPONENT_CALLBACKS:
+                caller = method_ids.get(subclass + ";->" + callback)
+                if caller is not None:
+                    implicit_callers.add(caller)
+        intent_senders = gaps.icc_string_analysis.get(class_name, ())
+        for method_index in methods:
+            signature = gaps.method_graphs[method_index][1].split()[1]
+            if not gaps.call_sites.get(signature):
+                callers[method_index].update(implicit_callers)
+            callers[method_index].update(intent_senders)
+
+    for reflection_key, reflection_paths in gaps.reflection_paths.items():
+        class_name, method_name = reflection_key.split("->")
+        targets = [
+            method_index
+            for method_index in class_methods.get(class_name.strip(";"), ())
+            if gaps.method_graphs[method_index][1].split(";->")[1]
+            .split("(")[0]
+            .strip()
+            == method_name
+        ]
+        for path in reflection_paths:
+            caller = method_ids.get(path[-1].split()[1])
+            if caller is not None:
+                for target in targets:
+                    callers[target].add(caller)
+
+    entries = set()
+    for class_name in _get_entry_classes(class_methods, gaps):
+        entries.update(class_methods[class_name])
+    call_graph = CallGraph(method_ids, callers, entries)
+    n_reachable = sum(
+        call_graph.reaches_entry(method_index)
+        for method_index in method_ids.values()
+    )
+    LOG.info(
+        f"[+] CALL GRAPH OF {len(method_ids)} METHODS, "
+        f"{len(call_graph.callers)} CALLS, {len(entries)} ENTRY METHODS, "
+        f"{n_reachable} REACHABLE METHODS"
+    )
+    return call_graph
+
+
+def _resolve_callee(
+    class_name: str, rest_of_signature: str, method_ids: dict, gaps
+) -> list:
+    """
+    Resolves an invoked method to the methods of the app it may dispatch
+    to: the method itself or the one inherited by its class, and the
+    methods overriding or implementing it in the subtypes of its class.
+
+    Args:
+        class_name (str): Class of the invoked method, without `;`.
+        rest_of_signature (str): Name and descriptor of the method.
+        method_ids (dict): Signature to index of the methods of the app.
+        gaps: Object containing information about gaps.
+
+    Returns:
+        list: Indexes of the target methods.
+    """
+    targets = []
+    for target_class in [class_name] + gaps.class_hierarchy.get_super_classes(
+        class_name
+    ):
+        target = method_ids.get(target_class + ";->" + rest_of_signature)
+        if target is not None:
+            targets.append(target)
+            break
+    if rest_of_signature.startswith("<"):
+        return targets
+    for method in gaps.all_methods.get(rest_of_signature, ()):
+        signature = method.split()[1]
+        subtype = signature.split(";->")[0]
+        if gaps.class_hierarchy.is_subtype(subtype, class_name):
+            target = method_ids.get(signature)
+            if target is not None:
+                targets.append(target)
+    return targets
+
+
+def _get_entry_classes(class_methods: dict, gaps) -> list:
+    """
+    Retrieves the classes whose methods are entry points: the main
+    activities, along with their inner classes, the application, the
+    exported components, the components receiving intent actions and the
+    fragments declared by the resources.
+
+    Args:
+        class_methods (dict): Class name to indexes of its methods.
+        gaps: Object containing information about gaps.
+
+    Returns:
+        list: Class names, without `;`.
+    """
+    components = {
+        component
+        for component, icc_infos in gaps.icc.items()
+        if any(type(icc_info) is str for icc_info in icc_infos)
+    }
+    fragments = {
+        "L" + fragment.replace(".", "/")
+        for fragment in gaps.resources.fragments
+    }
+    entry_classes = []
+    for class_name in class_methods:
+        super_classes = gaps.class_hierarchy.get_super_classes(class_name)
+        if (
+            class_name.split("$")[0] in gaps.main_activity
+            or (
+                super_classes
+                and "Landroid/app/Application" in super_classes[-1]
+            )
+            or class_name in components
+            or class_name in fragments
+            or gaps.manifest.is_exported(class_name)
+        ):
+            entry_classes.append(class_name)
+    return entry_classes
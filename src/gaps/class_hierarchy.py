@@ -0,0 +1,262 @@
+from collections import namedtuple
+
+from .package_filter import PrefixMatcher
+from .symbols import SymbolTable
+
+###############################################################################
+# GLOBALS
+###############################################################################
+
+ClassInfo = namedtuple("ClassInfo", ["extends", "implements"])
+
+# superclass of the classes whose parent is not defined in the app
+NO_CLASS = -1
+
+# hierarchies are not followed beyond framework classes
+root_classes = PrefixMatcher(["Landroid/", "Landroidx/", "Ljava/"])
+
+###############################################################################
+# CODE
+###############################################################################
+
+
+def get_class_infos(dx) -> dict:
+    """
+    Extracts the class hierarchy information needed after the analysis,
+    so that androguard objects can be released.
+
+    Args:
+        dx: Androguard Analysis object.
+
+    Returns:
+        dict: Class name to ClassInfo.
+    """
+    classes = {}
+    for class_name, class_analysis in dx.classes.items():
+        classes[str(class_name)] = ClassInfo(
+            str(class_analysis.extends),
+            [str(interface) for interface in class_analysis.implements],
+        )
+    return classes
+
+
+class ClassHierarchy:
+    """
+    Class hierarchy of the analyzed app, computed once after loading.
+
+    Classes are numbered by their names without the trailing `;`, and each
+    relation is stored in a list indexed by class id: the direct superclass,
+    the direct interfaces, the superclasses up to the first framework class,
+    the interfaces implemented along them, the direct and transitive
+    subclasses and the subtypes, i.e. the classes having the class among
+    their superclasses, but the last one, or among their interfaces.
+    Classes only referenced by the app have no superclass.
+
+    The methods overriding each method are indexed by `index_overrides`
+    once the methods of the app are known.
+    """
+
+    __slots__ = (
+        "names",
+        "super_class",
+        "interfaces",
+        "super_classes",
+        "class_interfaces",
+        "subclasses",
+        "all_subclasses",
+        "subtypes",
+        "overrides",
+    )
+
+    def __init__(self, class_infos: dict):
+        self.names = SymbolTable()
+        for class_name, class_info in class_infos.items():
+            self.names.intern(class_name.replace(";", ""))
+            self.names.intern(class_info.extends.replace(";", ""))
+            for interface in class_info.implements:
+                self.names.intern(interface.replace(";", ""))
+        n_classes = len(self.names)
+        self.super_class = [NO_CLASS] * n_classes
+        self.interfaces = [()] * n_classes
+        for class_name, class_info in class_infos.items():
+            class_id = self.names.ids[class_name.replace(";", "")]
+            super_id = self.names.ids[class_info.extends.replace(";", "")]
+            if super_id != class_id:
+                self.super_class[class_id] = super_id
+            self.interfaces[class_id] = tuple(
+                self.names.ids[interface.replace(";", "")]
+                for interface in class_info.implements
+            )
+        self.super_classes = [
+            self._find_super_classes(class_id) for class_id in range(n_classes)
+        ]
+        self.class_interfaces = [
+            tuple(
+                interface
+                for current_id in (class_id,) + self.super_classes[class_id]
+                for interface in self.interfaces[current_id]
+            )
+            for class_id in range(n_classes)
+        ]
+        self._find_subclasses()
+        subtypes = [set() for _ in range(n_classes)]
+        for class_id in range(n_classes):
+            for super_id in self.super_classes[class_id][:-1]:
+                subtypes[super_id].add(class_id)
+            for interface in self.class_interfaces[class_id]:
+                subtypes[interface].add(class_id)
+        self.subtypes = [frozenset(ids) for ids in subtypes]
+        self.overrides = {}
+
+    def _find_super_classes(self, class_id: int) -> tuple:
+        """
+        Follows the superclasses of a class up to the first framework class
+        or to the first class not defined in the app.
+
+        Args:
+            class_id (int): Id of the class.
+
+        Returns:
+            tuple: Ids of the superclasses, from the direct one.
+        """
+        super_classes = []
+        visited = {class_id}
+        super_id = self.super_class[class_id]
+        while super_id != NO_CLASS and super_id not in visited:
+            super_classes.append(super_id)
+            visited.add(super_id)
+            if root_classes.match(self.names.get(super_id)):
+                break
+            super_id = self.super_class[super_id]
+        return tuple(super_classes)
+
+    def _find_subclasses(self):
+        """
+        Fills the direct and transitive subclasses of every class.
+
+        Returns:
+            None
+        """
+        n_classes = len(self.names)
+        subclasses = [[] for _ in range(n_classes)]
+        all_subclasses = [[] for _ in range(n_classes)]
+        for class_id in range(n_classes):
+            super_id = self.super_class[class_id]
+            if super_id != NO_CLASS:
+                subclasses[super_id].append(class_id)
+            visited = {class_id}
+            while super_id != NO_CLASS and super_id not in visited:
+                all_subclasses[super_id].append(class_id)
+                visited.add(super_id)
+                super_id = self.super_class[super_id]
+        self.subclasses = [tuple(ids) for ids in subclasses]
+        self.all_subclasses = [tuple(ids) for ids in all_subclasses]
+
+    def _get_names(self, class_name: str, relation: list) -> list:
+        class_id = self.names.ids.get(class_name)
+        if class_id is None:
+            return []
+        return [self.names.get(other_id) for other_id in relation[class_id]]
+
+    def get_super_classes(self, class_name: str) -> list:
+        """
+        Retrieves the superclasses of a class up to the first framework
+        class.
+
+        Args:
+            class_name (str): Name of the class, without `;`.
+
+        Returns:
+            list: Names of the superclasses, from the direct one.
+        """
+        return self._get_names(class_name, self.super_classes)
+
+    def get_interfaces(self, class_name: str) -> list:
+        """
+        Retrieves the interfaces implemented by a class and by its
+        superclasses.
+
+        Args:
+            class_name (str): Name of the class, without `;`.
+
+        Returns:
+            list: Names of the interfaces.
+        """
+        return self._get_names(class_name, self.class_interfaces)
+
+    def get_subclasses(self, class_name: str, transitive: bool = False) -> list:
+        """
+        Retrieves the subclasses of a class defined in the app.
+
+        Args:
+            class_name (str): Name of the class, without `;`.
+            transitive (bool, optional): Whether to include the subclasses
+                of the subclasses. Defaults to False.
+
+        Returns:
+            list: Names of the subclasses.
+        """
+        if transitive:
+            return self._get_names(class_name, self.all_subclasses)
+        return self._get_names(class_name, self.subclasses)
+
+    def is_subtype(self, class_name: str, super_name: str) -> bool:
+        """
+        Checks whether a class has another class among its superclasses,
+        but the last one, or among its interfaces.
+
+        Args:
+            class_name (str): Name of the class, without `;`.
+            super_name (str): Name of the candidate supertype, without `;`.
+
+        Returns:
+            bool: True if the class is a subtype, False otherwise.
+        """
+        class_id = self.names.ids.get(class_name)
+        super_id = self.names.ids.get(super_name)
+        if class_id is None or super_id is None:
+            return False
+        return class_id in self.subtypes[super_id]
+
+    def index_overrides(self, all_methods: dict):
+        """
+        Indexes the methods of the app by the superclasses whose methods
+        they override, the last superclass excluded.
+
+        Args:
+            all_methods (dict): Methods of the app by name and descriptor.
+
+        Returns:
+            None
+        """
+        overrides = {}
+        for rest_of_signature, methods in all_methods.items():
+            for method in methods:
+                class_name = method.split(";->")[0].split()[-1]
+                class_id = self.names.ids.get(class_name)
+                if class_id is None:
+                    continue
+                for super_id in self.super_classes[class_id][:-1]:
+                    overrides.setdefault(
+                        (super_id, rest_of_signature), []
+                    ).append(class_name + ";->" + rest_of_signature)
+        self.overrides = {
+            key: tuple(methods) for key, methods in overrides.items()
+        }
+
+    def get_overrides(self, class_name: str, rest_of_signature: str) -> tuple:
+        """
+        Retrieves the methods of the subclasses overriding a method.
+
+        Args:
+            class_name (str): Name of the class declaring the method,
+                without `;`.
+            rest_of_signature (str): Name and descriptor of the method.
+
+        Returns:
+            tuple: Full signatures of the overriding methods.
+        """
+        class_id = self.names.ids.get(class_name)
+        if class_id is None:
+            return ()
+        return self.overrides.get((class_id, rest_of_signature), ())
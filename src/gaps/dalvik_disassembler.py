@@ -4,12 +4,17 @@ import re
 import os
 import sys
 import logging
-import threading
+import copy
+import multiprocessing
 from collections import deque, defaultdict
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import ProcessPoolExecutor
 
 from . import method_utils
-from . import myAndroguard
+from . import dalvik_ir
+from .class_hierarchy import ClassHierarchy, get_class_infos
+from .resource_index import ResourceIds, get_resource_fields
+from .package_filter import PrefixMatcher
+from .symbols import SymbolTable
 
 ###############################################################################
 # LOGGING
@@ -21,7 +26,39 @@ LOG = logging.getLogger("gaps")
 # GLOBALS
 ###############################################################################
 
-MAX_THREADS = 4
+MAX_WORKERS = os.cpu_count() or 1
+
+# chunks handed out to each worker, to balance apps with uneven methods
+CHUNKS_PER_WORKER = 4
+
+# below this number of methods the pool costs more than it saves
+MIN_PARALLEL_METHODS = 2000
+
+# indexes filled by process_method, merged after the parallel indexing
+method_indexes = [
+    "all_methods",
+    "icc_string_analysis",
+    "icc_method_addresses",
+    "return_by",
+    "access_methods",
+    "switch_tables",
+    "object_instantiated",
+    "method_graphs",
+    "call_sites",
+    "field_writers",
+    "field_readers",
+    "const_users",
+]
+
+# methods whose rendered instructions are kept between queries
+MAX_CACHED_GRAPHS = 4096
+
+# methods whose instruction distances from the entry are kept between
+# queries
+MAX_CACHED_DISTANCES = 4096
+
+# state shared with the forked indexing workers
+_worker_state = None
 
 icc_methods = [
     "startService",
@@ -47,83 +84,84 @@ icc_methods = [
     "setIntent",
 ]
 
-
+# package prefixes of the libraries whose methods are not analyzed
 analysis_blacklist = [
-    r"(\[)?Lkotlin/.*",
-    r"(\[)?Lkotlinx/.*",
-    r"(\[)?Ljava/.*",
-    r"(\[)?Ljavax/.*",
-    r"(\[)?Landroidx/.*",
-    r"(\[)?Ldalvik/.*",
-    r"(\[)?Landroid/.*",
-    r"L(\[)?Lcom/android/internal/util.*",
-    r"L(\[)?Lorg/apache/.*",
-    r"L(\[)?Lorg/json/.*",
-    r"L(\[)?Lorg/w3c/dom/.*",
-    r"L(\[)?Lorg/xml/sax.*",
-    r"L(\[)?Lorg/xmlpull/v1/.*",
-    r"L(\[)?Ljunit/.*",
+    "Lkotlin/",
+    "Lkotlinx/",
+    "Ljava/",
+    "Ljavax/",
+    "Landroidx/",
+    "Ldalvik/",
+    "Landroid/",
+    "Lcom/android/internal/util",
+    "Lorg/apache/",
+    "Lorg/json/",
+    "Lorg/w3c/dom/",
+    "Lorg/xml/sax",
+    "Lorg/xmlpull/v1/",
+    "Ljunit/",
 ]
 
+# package prefixes of the libraries not considered part of the app
 package_name_blacklist = [
-    r"(\[)?Landroid/.*",
-    r"(\[)?Lcom/android/.*",
-    r"(\[)?Ldalvik/.*",
-    r"(\[)?Landroidx/.*",
-    r"(\[)?Ljava/.*",
-    r"(\[)?Ljavax/.*",
-    r"(\[)?Ljunit/.*",
-    r"(\[)?Lorg/xml.*",
-    r"(\[)?Lkotlin/.*",
-    r"(\[)?Lkotlinx/.*",
-    r"(\[)?Lorg/jetbrains/.*",
-    r"(\[)?Lcom/fasterxml/.*",
-    r"(\[)?Lorg/json/.*",
-    r"(\[)?Lorg/mozilla/.*",
-    r"(\[)?Lorg/apache/.*",
-    r"(\[)?Lssh/.*",
-    r"(\[)?Lorg/w3c/.*",
-    r"(\[)?Lorg/spongycastle/.*",
-    r"(\[)?Lorg/bouncycastle/.*",
-    r"(\[)?Lorg/joda/.*",
-    r"(\[)?Lcom/tasermonkeys/.*",
-    r"(\[)?Lorg/tukaani.*",
-    r"(\[)?Lcom/ibm/.*",
-    r"(\[)?Lorg/simpleframework/.*",
-    r"(\[)?Lcom/kazy/.*",
-    r"(\[)?Lcom/millennialmedia/.*",
-    r"(\[)?Lcom/jumptap/.*",
-    r"(\[)?Lorg/swiftp/.*",
-    r"(\[)?Lcom/artfulbits/.*",
-    r"(\[)?Lcom/bumptech/.*",
-    r"(\[)?Lorg/jsoup/.*",
-    r"(\[)?Lretrofit2/.*",
-    r"(\[)?Lokhttp3/.*",
-    r"(\[)?Lio/reactivex/.*",
-    r"(\[)?Lcom/google/.*",
-    r"(\[)?Lleakcanary/.*",
-    r"(\[)?Lokio/.*",
-    r"(\[)?Lcom/skydoves/.*",
-    r"(\[)?Lde/mrapp/.*",
-    r"(\[)?Lcom/actionbarsherlock/.*",
-    r"(\[)?Lcom/flurry/.*",
-    r"(\[)?Lorg/kxml2/.*",
-    r"(\[)?Lorg/kobjects/.*",
-    r"(\[)?Lorg/ksoap2/.*",
-    r"(\[)?Lcom/twofortyfouram/.*",
-    r"(\[)?Lcom/theartofdev/.*",
-    r"(\[)?Leltos/simpledialogfragment/.*",
-    r"(\[)?Lorg/acra/.*",
-    r"(\[)?Lcom/itextpdf/.*",
-    r"(\[)?Lcom/alimuzaffar/.*",
-    r"(\[)?Lnet/vrallev/.*",
-    r"(\[)?Lch/qos/logback/.*",
-    r"(\[)?Lshark/.*",
-    r"(\[)?Lcom/squareup/.*",
-    r"(\[)?Lio/requery/.*",
-    r"(\[)?Larrow/.*",
-    r"(\[)?Lmyiconpack/.*",
-    r"(\[)?Lio/flutter/.*",
+    "Landroid/",
+    "Lcom/android/",
+    "Ldalvik/",
+    "Landroidx/",
+    "Ljava/",
+    "Ljavax/",
+    "Ljunit/",
+    "Lorg/xml",
+    "Lkotlin/",
+    "Lkotlinx/",
+    "Lorg/jetbrains/",
+    "Lcom/fasterxml/",
+    "Lorg/json/",
+    "Lorg/mozilla/",
+    "Lorg/apache/",
+    "Lssh/",
+    "Lorg/w3c/",
+    "Lorg/spongycastle/",
+    "Lorg/bouncycastle/",
+    "Lorg/joda/",
+    "Lcom/tasermonkeys/",
+    "Lorg/tukaani",
+    "Lcom/ibm/",
+    "Lorg/simpleframework/",
+    "Lcom/kazy/",
+    "Lcom/millennialmedia/",
+    "Lcom/jumptap/",
+    "Lorg/swiftp/",
+    "Lcom/artfulbits/",
+    "Lcom/bumptech/",
+    "Lorg/jsoup/",
+    "Lretrofit2/",
+    "Lokhttp3/",
+    "Lio/reactivex/",
+    "Lcom/google/",
+    "Lleakcanary/",
+    "Lokio/",
+    "Lcom/skydoves/",
+    "Lde/mrapp/",
+    "Lcom/actionbarsherlock/",
+    "Lcom/flurry/",
+    "Lorg/kxml2/",
+    "Lorg/kobjects/",
+    "Lorg/ksoap2/",
+    "Lcom/twofortyfouram/",
+    "Lcom/theartofdev/",
+    "Leltos/simpledialogfragment/",
+    "Lorg/acra/",
+    "Lcom/itextpdf/",
+    "Lcom/alimuzaffar/",
+    "Lnet/vrallev/",
+    "Lch/qos/logback/",
+    "Lshark/",
+    "Lcom/squareup/",
+    "Lio/requery/",
+    "Larrow/",
+    "Lmyiconpack/",
+    "Lio/flutter/",
 ]
 
 
@@ -132,33 +170,174 @@ package_name_blacklist = [
 ###############################################################################
 
 
-def disassemble(gaps):
+def get_blacklists(gaps) -> tuple:
+    """
+    Builds the package name and analysis blacklists of the analyzed app,
+    leaving out the prefixes of the app package itself.
+
+    Args:
+        gaps (object): Instance of GAPS.
+
+    Returns:
+        tuple: Package name and analysis blacklist matchers.
+    """
+    package_matcher = PrefixMatcher(
+        prefix
+        for prefix in package_name_blacklist
+        if prefix not in gaps.package_name
+    )
+    analysis_matcher = PrefixMatcher(
+        prefix
+        for prefix in analysis_blacklist
+        if prefix not in gaps.package_name
+    )
+    return package_matcher, analysis_matcher
+
+
+def disassemble(gaps, max_workers: int = MAX_WORKERS):
     """
     Disassembles the provided file using apktool or baksmali.
 
+    Methods are indexed in chunks by a pool of forked worker processes,
+    each building partial indexes that are merged in chunk order, so that
+    the result is the same as indexing the methods one after the other.
+
+    Args:
+        gaps (object): Instance of GAPS.
+        max_workers (int, optional): Maximum number of worker processes.
+            Defaults to MAX_WORKERS.
+
+    Returns:
+        None
+    """
+    global _worker_state
+    all_methods = [defaultdict(set), defaultdict(set)]
+
+    methods = _get_methods(gaps.dx, gaps.analysis_blacklist)
+    gaps.method_index += len(methods)
+
+    n_workers = min(max_workers, len(methods) // MIN_PARALLEL_METHODS)
+    if (
+        n_workers <= 1
+        or "fork" not in multiprocessing.get_all_start_methods()
+    ):
+        for method_index, method in enumerate(methods):
+            process_method(gaps, method, method_index, all_methods)
+        save_testing_seeds(gaps, all_methods)
+        return
+
+    LOG.info(f"[+] INDEXING {len(methods)} METHODS WITH {n_workers} WORKERS")
+    n_chunks = n_workers * CHUNKS_PER_WORKER
+    chunk_size = -(-len(methods) // n_chunks)
+    _worker_state = gaps, methods
+    try:
+        with ProcessPoolExecutor(
+            max_workers=n_workers,
+            mp_context=multiprocessing.get_context("fork"),
+        ) as e:
+            chunks = e.map(
+                _index_methods,
+                range(0, len(methods), chunk_size),
+                [chunk_size] * n_chunks,
+            )
+            for chunk_indexes, chunk_all_methods in chunks:
+                _merge_indexes(gaps, chunk_indexes)
+                for merged, chunk in zip(all_methods, chunk_all_methods):
+                    for signature, entries in chunk.items():
+                        merged[signature].update(entries)
+    finally:
+        _worker_state = None
+
+    save_testing_seeds(gaps, all_methods)
+
+
+def disassemble_apk(gaps, max_workers: int = MAX_WORKERS):
+    """
+    Loads the DEX files of the analyzed APK and indexes their methods.
+
+    The DEX files of multidex apps are parsed and indexed by a pool of
+    forked worker processes, one DEX file per task, and their partial
+    indexes are merged in DEX order, numbering the methods as if all the
+    DEX files had been loaded in a single analysis.
+
     Args:
         gaps (object): Instance of GAPS.
+        max_workers (int, optional): Maximum number of worker processes.
+            Defaults to MAX_WORKERS.
 
     Returns:
         None
     """
-    global current_threads, lock
+    global _worker_state
+    dex_files = list(gaps.dalvik.get_all_dex())
+    n_workers = min(max_workers, len(dex_files))
+    if (
+        n_workers <= 1
+        or "fork" not in multiprocessing.get_all_start_methods()
+    ):
+        from . import myAndroguard
+
+        gaps.dx = myAndroguard.AnalyzeAPKDex(
+            gaps.dalvik, skip_class=gaps.analysis_blacklist.match
+        )
+        disassemble(gaps, max_workers)
+        return
+
+    LOG.info(f"[+] LOADING {len(dex_files)} DEX FILES WITH {n_workers} WORKERS")
     all_methods = [defaultdict(set), defaultdict(set)]
-    for blacklisted in package_name_blacklist:
-        if re.search(blacklisted, gaps.package_name):
-            package_name_blacklist.remove(blacklisted)
+    class_infos = {}
+    resource_fields = {}
+    _worker_state = gaps, dex_files
+    try:
+        with ProcessPoolExecutor(
+            max_workers=n_workers,
+            mp_context=multiprocessing.get_context("fork"),
+        ) as e:
+            # largest DEX files first, so that none is left running alone
+            futures = {
+                dex_index: e.submit(_index_dex, dex_index)
+                for dex_index in sorted(
+                    range(len(dex_files)),
+                    key=lambda dex_index: -len(dex_files[dex_index]),
+                )
+            }
+            for dex_index in range(len(dex_files)):
+                chunk_indexes, chunk_all_methods, n_methods = futures[
+                    dex_index
+                ].result()
+                _shift_indexes(
+                    chunk_indexes, chunk_all_methods, gaps.method_index
+                )
+                _merge_indexes(gaps, chunk_indexes)
+                for merged, chunk in zip(all_methods, chunk_all_methods):
+                    for signature, entries in chunk.items():
+                        merged[signature].update(entries)
+                class_infos.update(chunk_indexes["classes"])
+                resource_fields.update(chunk_indexes["resource_fields"])
+                gaps.method_index += n_methods
+    finally:
+        _worker_state = None
+    gaps.class_hierarchy = ClassHierarchy(class_infos)
+    gaps.resource_ids = ResourceIds(resource_fields)
 
-    for blacklisted in analysis_blacklist:
-        if re.search(blacklisted, gaps.package_name):
-            analysis_blacklist.remove(blacklisted)
+    save_testing_seeds(gaps, all_methods)
 
-    combined = "(" + ")|(".join(package_name_blacklist) + ")"
 
-    combined_avoid_analysis = "(" + ")|(".join(analysis_blacklist) + ")"
+def _get_methods(dx, analysis_blacklist: PrefixMatcher) -> list:
+    """
+    Retrieves the methods to index, skipping the Android API and the
+    blacklisted libraries.
 
-    args = deque()
+    Args:
+        dx: Androguard Analysis object.
+        analysis_blacklist (PrefixMatcher): Libraries not analyzed.
 
-    for method in gaps.dx.get_methods():
+    Returns:
+        list: MethodAnalysis objects, in analysis order.
+    """
+    methods = deque()
+
+    for method in dx.get_methods():
         if method.is_android_api():
             continue
 
@@ -168,42 +347,311 @@ def disassemble(gaps):
         class_name_parent, _ = method_utils.get_class_and_method(
             method_name, True
         )
-        if re.match(combined_avoid_analysis, class_name_parent):
+        if analysis_blacklist.match(class_name_parent):
             continue
 
-        gaps.method_objs[gaps.method_index] = method
+        methods.append(method)
+    return list(methods)
 
-        method_index = gaps.method_index
 
-        args.append(
-            [
-                gaps,
-                method,
-                method_index,
-                combined,
-                all_methods,
+def _index_dex(dex_index: int) -> tuple:
+    """
+    Loads a DEX file and indexes its methods in a worker process.
+
+    Args:
+        dex_index (int): Index of the DEX file in the APK.
+
+    Returns:
+        tuple: Partial indexes, including the classes and the resource ids
+            of the DEX file, testing seed candidates and number of indexed methods.
+    """
+    from . import myAndroguard
+
+    gaps, dex_files = _worker_state
+    dx = myAndroguard.AnalyzeDexBytes(
+        dex_files[dex_index],
+        gaps.dalvik.get_target_sdk_version(),
+        skip_class=gaps.analysis_blacklist.match,
+    )
+    methods = _get_methods(dx, gaps.analysis_blacklist)
+    partial = _new_partial_indexes(gaps)
+    all_methods = [defaultdict(set), defaultdict(set)]
+    for method_index, method in enumerate(methods):
+        process_method(partial, method, method_index, all_methods)
+    chunk_indexes = _get_partial_indexes(partial)
+    chunk_indexes["classes"] = get_class_infos(dx)
+    chunk_indexes["resource_fields"] = get_resource_fields(dx)
+    return chunk_indexes, all_methods, len(methods)
+
+
+def _shift_indexes(chunk_indexes: dict, all_methods: list, offset: int):
+    """
+    Shifts the method indexes of partial indexes built from 0.
+
+    Args:
+        chunk_indexes (dict): Partial indexes.
+        all_methods (list): Testing seed candidates.
+        offset (int): Index of the first method.
+
+    Returns:
+        None
+    """
+    if offset == 0:
+        return
+    for index in [
+        "icc_string_analysis",
+        "icc_method_addresses",
+        "return_by",
+        "object_instantiated",
+        "const_users",
+        "starting_points",
+    ]:
+        for entries in chunk_indexes[index].values():
+            shifted = {entry + offset for entry in entries}
+            entries.clear()
+            entries.update(shifted)
+    for entries_by_signature in all_methods:
+        for signature, entries in entries_by_signature.items():
+            entries_by_signature[signature] = {
+                entry + offset for entry in entries
+            }
+    chunk_indexes["method_graphs"] = {
+        method_index + offset: method_graph
+        for method_index, method_graph in chunk_indexes[
+            "method_graphs"
+        ].items()
+    }
+    for callee, call_sites in chunk_indexes["call_sites"].items():
+        chunk_indexes["call_sites"][callee] = {
+            method_index + offset: offsets
+            for method_index, offsets in call_sites.items()
+        }
+    for method, switch_table in chunk_indexes["switch_tables"].items():
+        chunk_indexes["switch_tables"][method] = switch_table._replace(
+            method_index=switch_table.method_index + offset
+        )
+    for index in ["field_writers", "field_readers"]:
+        for field, accesses in chunk_indexes[index].items():
+            chunk_indexes[index][field] = [
+                (access[0] + offset,) + access[1:] for access in accesses
             ]
+    for signatures in chunk_indexes["signature_to_address"].values():
+        for classes in signatures.values():
+            for class_name, entries in classes.items():
+                classes[class_name] = {entry + offset for entry in entries}
+
+
+def _new_partial_indexes(gaps):
+    """
+    Creates a copy of GAPS with empty indexes, to be filled by a worker.
+
+    Args:
+        gaps (object): Instance of GAPS.
+
+    Returns:
+        object: Copy of the instance of GAPS.
+    """
+    partial = copy.copy(gaps)
+    partial.symbols = SymbolTable()
+    partial.signature_to_address = new_signature_index()
+    partial.all_methods = defaultdict(set)
+    partial.icc_string_analysis = defaultdict(set)
+    partial.icc_method_addresses = defaultdict(set)
+    partial.return_by = defaultdict(set)
+    partial.object_instantiated = defaultdict(set)
+    partial.access_methods = {}
+    partial.switch_tables = {}
+    partial.method_graphs = {}
+    partial.call_sites = defaultdict(dict)
+    partial.field_writers = defaultdict(list)
+    partial.field_readers = defaultdict(list)
+    partial.const_users = defaultdict(set)
+    partial.starting_points = defaultdict(set)
+    for starting_point in gaps.starting_points:
+        partial.starting_points[starting_point] = set()
+    return partial
+
+
+def _get_partial_indexes(partial) -> dict:
+    """
+    Collects the indexes filled by a worker.
+
+    Args:
+        partial (object): Copy of the instance of GAPS used by the worker.
+
+    Returns:
+        dict: Partial indexes.
+    """
+    chunk_indexes = {
+        index: getattr(partial, index) for index in method_indexes
+    }
+    chunk_indexes["signature_to_address"] = signature_index_to_dict(
+        partial.signature_to_address
+    )
+    chunk_indexes["starting_points"] = partial.starting_points
+    chunk_indexes["symbols"] = partial.symbols
+    return chunk_indexes
+
+
+def _index_methods(start: int, chunk_size: int) -> tuple:
+    """
+    Indexes a chunk of methods in a worker process.
+
+    Args:
+        start (int): Index of the first method of the chunk.
+        chunk_size (int): Number of methods in the chunk.
+
+    Returns:
+        tuple: Partial indexes and testing seed candidates of the chunk.
+    """
+    gaps, methods = _worker_state
+    partial = _new_partial_indexes(gaps)
+    all_methods = [defaultdict(set), defaultdict(set)]
+    for method_index in range(start, min(start + chunk_size, len(methods))):
+        process_method(
+            partial, methods[method_index], method_index, all_methods
         )
-        gaps.method_index += 1
+    return _get_partial_indexes(partial), all_methods
+
 
-    with ThreadPoolExecutor() as e:
+def _merge_indexes(gaps, chunk_indexes: dict):
+    """
+    Merges the partial indexes of a chunk of methods.
 
-        futures = deque()
+    Args:
+        gaps (object): Instance of GAPS.
+        chunk_indexes (dict): Partial indexes of the chunk.
 
-        for x in args:
-            futures.append(
-                e.submit(process_method, x[0], x[1], x[2], x[3], x[4])
+    Returns:
+        None
+    """
+    # symbol ids are local to each chunk
+    remap = gaps.symbols.merge(chunk_indexes["symbols"])
+    for _, _, instructions in chunk_indexes["method_graphs"].values():
+        for instruction in instructions:
+            if instruction.ref != dalvik_ir.NO_REF:
+                instruction.ref = remap[instruction.ref]
+    for index in [
+        "all_methods",
+        "icc_string_analysis",
+        "icc_method_addresses",
+        "return_by",
+        "object_instantiated",
+        "starting_points",
+    ]:
+        merged = getattr(gaps, index)
+        for key, entries in chunk_indexes[index].items():
+            merged[gaps.symbols.canonical(key)].update(entries)
+    for method, access in chunk_indexes["access_methods"].items():
+        gaps.access_methods[gaps.symbols.canonical(method)] = access
+    gaps.method_graphs.update(chunk_indexes["method_graphs"])
+    for callee, call_sites in chunk_indexes["call_sites"].items():
+        gaps.call_sites[gaps.symbols.canonical(callee)].update(call_sites)
+    for field, writers in chunk_indexes["field_writers"].items():
+        for method_index, offset, const_instruction in writers:
+            if const_instruction is not None:
+                const_instruction = gaps.symbols.canonical(const_instruction)
+            gaps.field_writers[gaps.symbols.canonical(field)].append(
+                (method_index, offset, const_instruction)
             )
+    for field, readers in chunk_indexes["field_readers"].items():
+        gaps.field_readers[gaps.symbols.canonical(field)].extend(readers)
+    for value, entries in chunk_indexes["const_users"].items():
+        gaps.const_users[value].update(entries)
+    for method, switch_table in chunk_indexes["switch_tables"].items():
+        gaps.switch_tables.setdefault(
+            gaps.symbols.canonical(method), switch_table
+        )
+    merge_signature_index(
+        gaps.signature_to_address,
+        chunk_indexes["signature_to_address"],
+        gaps.symbols,
+    )
+
+
+def new_signature_index() -> defaultdict:
+    """
+    Creates an empty signature_to_address index.
+
+    Returns:
+        defaultdict: method name -> rest of signature -> class -> methods.
+    """
+    return defaultdict(lambda: defaultdict(lambda: defaultdict(set)))
+
+
+def signature_index_to_dict(signature_to_address) -> dict:
+    """
+    Converts the signature_to_address index to plain dictionaries, since
+    nested defaultdicts cannot be pickled.
+
+    Args:
+        signature_to_address: signature_to_address index.
+
+    Returns:
+        dict: The same index made of plain dictionaries.
+    """
+    return {
+        method_name: {
+            rest_of_signature: dict(classes)
+            for rest_of_signature, classes in signatures.items()
+        }
+        for method_name, signatures in signature_to_address.items()
+    }
+
+
+def merge_signature_index(
+    signature_to_address, source: dict, symbols: SymbolTable = None
+):
+    """
+    Merges a signature_to_address index into another one.
+
+    Args:
+        signature_to_address: Destination signature_to_address index.
+        source (dict): signature_to_address index to merge.
+        symbols (SymbolTable, optional): Symbol table holding the keys of
+            the destination index. Defaults to None.
+
+    Returns:
+        None
+    """
+    for method_name, signatures in source.items():
+        for rest_of_signature, classes in signatures.items():
+            for class_name, entries in classes.items():
+                if symbols is not None:
+                    method_name = symbols.canonical(method_name)
+                    rest_of_signature = symbols.canonical(rest_of_signature)
+                    class_name = symbols.canonical(class_name)
+                signature_to_address[method_name][rest_of_signature][
+                    class_name
+                ].update(entries)
+
+
+def find_starting_points(gaps):
+    """
+    Looks for the starting points of the current query in the method
+    graphs restored from a snapshot, without re-analyzing the app.
 
-    for future in as_completed(futures):
-        pass
+    Args:
+        gaps (object): Instance of GAPS.
 
+    Returns:
+        None
+    """
+    all_methods = [defaultdict(set), defaultdict(set)]
+    for method_index in sorted(gaps.method_graphs):
+        _, parent_method, instructions = gaps.method_graphs[method_index]
+        for instruction in instructions:
+            process_starting_points(
+                gaps,
+                instruction,
+                parent_method,
+                method_index,
+                all_methods,
+            )
     save_testing_seeds(gaps, all_methods)
 
 
-def process_method(
-    gaps, method, method_index: int, combined: str, all_methods: list
-) -> str:
+def process_method(gaps, method, method_index: int, all_methods: list) -> str:
     """
     Processes the methods during disassembly.
 
@@ -211,126 +659,233 @@ def process_method(
         gaps (object): Instance of GAPS.
         method (object): Method object.
         method_index (int): Index of the method.
-        combined (str): Combined blacklist patterns.
         all_methods (list): List of all methods.
 
     Returns:
         str: Completion status message.
     """
-    basic_blocks = method.get_basic_blocks()
-    for bb in basic_blocks:
-        instructions = list(bb.get_instructions())
-        for instruction in instructions:
-            inst_out = instruction.get_output()
-            if "(" in inst_out:
-                inst_out = inst_out.replace(" ", "").replace(",", ", ")
-            str_inst = "{} {}".format(instruction.get_name(), inst_out)
-            process_instr(
-                gaps,
-                str_inst,
-                method,
-                method_index,
-                combined,
-                all_methods,
-            )
+    graph, instructions = basic_blocks_2_graph(method, gaps.symbols)
+    parent_method = gaps.symbols.canonical(_get_method_name(method))
+    gaps.method_graphs[method_index] = (
+        dalvik_ir.ControlFlowGraph(graph),
+        parent_method,
+        instructions,
+    )
+    if any(
+        instruction.opcode in dalvik_ir.SWITCH_OPCODES
+        for instruction in instructions
+    ):
+        gaps.switch_tables.setdefault(
+            gaps.symbols.canonical(parent_method.split()[1]),
+            get_switch_table(method, method_index),
+        )
+    previous = None
+    for instruction in instructions:
+        process_field_access(gaps, instruction, previous, graph, method_index)
+        previous = instruction
+        process_instr(
+            gaps,
+            instruction,
+            parent_method,
+            method_index,
+        )
+        process_starting_points(
+            gaps,
+            instruction,
+            parent_method,
+            method_index,
+            all_methods,
+        )
     return "finish"
 
 
-def process_instr(
+def process_field_access(
     gaps,
-    str_inst: str,
-    method,
+    instruction,
+    previous,
+    graph,
     method_index: int,
-    combined: str,
-    all_methods: list,
 ):
     """
-    Processes instructions during disassembly.
+    Records the instructions reading and writing fields, along with the
+    constant written when the value comes from a const instruction that
+    is the only predecessor of the write.
 
     Args:
         gaps (object): Instance of GAPS.
-        str_inst (str): Instruction string.
-        method: Method object.
+        instruction (Instruction): The instruction.
+        previous (Instruction): The instruction preceding it, if any.
+        graph: Predecessors of the instructions of the method.
         method_index (int): Index of the method.
-        combined (str): Combined blacklist patterns.
-        all_methods (list): List of all methods.
 
     Returns:
         None
     """
-    class_name, method_name = method_utils.get_class_and_method(str_inst, True)
-    instr_type = str_inst.split()[0]
-    parent_method = _get_method_name(method)
-    class_name_parent, method_name_parent = method_utils.get_class_and_method(
-        parent_method, True
+    instr_type = instruction.get_name()
+    if "get" not in instr_type and "put" not in instr_type:
+        return
+    reference = dalvik_ir.get_reference(instruction, gaps.symbols)
+    if ";->" not in reference.text:
+        return
+    field = gaps.symbols.canonical(reference.text.split()[0])
+    if "get" in instr_type:
+        gaps.field_readers[field].append((method_index, instruction.offset))
+        return
+    const_instruction = None
+    if (
+        previous is not None
+        and graph.get(instruction.offset) == {previous.offset}
+        and previous.get_name().startswith("const")
+        and previous.registers[:1] == instruction.registers[:1]
+    ):
+        const_instruction = dalvik_ir.render(previous, gaps.symbols)
+        # strings that the points-to analysis would not read as constants
+        if ";->" in const_instruction or "this$" in const_instruction:
+            const_instruction = None
+        else:
+            const_instruction = gaps.symbols.canonical(const_instruction)
+    gaps.field_writers[field].append(
+        (method_index, instruction.offset, const_instruction)
     )
+
+
+def process_instr(
+    gaps,
+    instruction,
+    parent_method: str,
+    method_index: int,
+):
+    """
+    Processes instructions during disassembly, filling the indexes that
+    do not depend on the current query.
+
+    Args:
+        gaps (object): Instance of GAPS.
+        instruction (Instruction): The instruction.
+        parent_method (str): Name of the method containing the instruction.
+        method_index (int): Index of the method.
+
+    Returns:
+        None
+    """
+    canonical = gaps.symbols.canonical
+    reference = dalvik_ir.get_reference(instruction, gaps.symbols)
+    class_name = canonical(reference.class_name)
+    method_name = canonical(reference.method_name)
+    instr_type = instruction.get_name()
     rest_signature_parent = parent_method.split(";->")[1].split()[0]
-    gaps.all_methods[rest_signature_parent].add(parent_method)
+    gaps.all_methods[canonical(rest_signature_parent)].add(parent_method)
     entry = method_index
+    if ";->" in reference.text:
+        callee = reference.text
+        if "invoke" not in instr_type:
+            callee = callee.split()[0]
+        gaps.call_sites[canonical(callee)].setdefault(entry, []).append(
+            instruction.offset
+        )
     if (
         "invoke" in instr_type
-        and "this$0" not in str_inst
+        and "this$0" not in reference.text
         and len(method_name) > 0
     ):
-        rest_of_signature = str_inst.split("->")[1]
+        rest_of_signature = canonical(reference.signature)
         gaps.signature_to_address[method_name][rest_of_signature][
             class_name
         ].add(entry)
-        if (
-            not gaps.target_method
-            and not gaps.signature
-            and gaps.save_testing_seeds
-        ):
-            if gaps.package_name in class_name:
-                all_methods[0][str_inst.split()[-1]].add(entry)
-            elif not re.match(combined, class_name):
-                all_methods[1][str_inst.split()[-1]].add(entry)
     if (
         "put" in instr_type
-        and ";->" in str_inst
-        and "this$0" not in str_inst
+        and ";->" in reference.text
+        and "this$0" not in reference.text
         and len(method_name) > 0
     ):
-        rest_of_signature = str_inst.split("->")[1].split()[0]
+        rest_of_signature = canonical(reference.signature.split()[0])
         gaps.signature_to_address[method_name][rest_of_signature][
             class_name
         ].add(entry)
-        object_type = str_inst.split()[-1]
+        object_type = reference.last
 
         if ";" in object_type:
-            gaps.object_instantiated[object_type].add(entry)
+            gaps.object_instantiated[canonical(object_type)].add(entry)
     if (
         "get" in instr_type
-        and ";->" in str_inst
-        and "this$0" not in str_inst
+        and ";->" in reference.text
+        and "this$0" not in reference.text
         and len(method_name) > 0
     ):
-        object_type = str_inst.split()[-1]
+        object_type = reference.last
 
         if ";" in object_type:
-            gaps.object_instantiated[object_type.split(";")[0]].add(entry)
+            gaps.object_instantiated[
+                canonical(object_type.split(";")[0])
+            ].add(entry)
     if "check-cast" in instr_type:
-        object_type = str_inst.split()[-1]
+        object_type = reference.last
 
         if ";" in object_type:
-            gaps.object_instantiated[object_type.split(";")[0]].add(entry)
+            gaps.object_instantiated[
+                canonical(object_type.split(";")[0])
+            ].add(entry)
     if method_name in icc_methods or re.search(
-        r"\(.*Landroid/app/PendingIntent;.*\)", str_inst
+        r"\(.*Landroid/app/PendingIntent;.*\)", reference.text
     ):
-        gaps.icc_method_addresses[str_inst.split()[-1]].add(entry)
+        gaps.icc_method_addresses[canonical(reference.last)].add(entry)
+    # 32-bit literals, the only ones able to hold resource ids
+    if instr_type in ("const", "const/high16"):
+        gaps.const_users[int(reference.text)].add(entry)
     if "const-class" == instr_type:
-        string_class = str_inst.split()[-1].replace(";", "")
-        gaps.icc_string_analysis[string_class].add(entry)
-    if "sparse-switch" in str_inst or "packed-switch" in str_inst:
-        if parent_method.split()[1] not in gaps.methods_with_switches:
-            method_body = myAndroguard.get_whole_method(
-                method.basic_blocks.get()
-            )
-            gaps.methods_with_switches[parent_method.split()[1]] = method_body
+        string_class = reference.last.replace(";", "")
+        gaps.icc_string_analysis[canonical(string_class)].add(entry)
     if "return" in instr_type:
-        gaps.return_by[parent_method.split()[1]].add(entry)
+        gaps.return_by[canonical(parent_method.split()[1])].add(entry)
     if ";->access$" in parent_method:
-        gaps.access_methods[parent_method.split()[1]] = str_inst
+        gaps.access_methods[canonical(parent_method.split()[1])] = canonical(
+            dalvik_ir.render(instruction, gaps.symbols)
+        )
+
+
+def process_starting_points(
+    gaps,
+    instruction,
+    parent_method: str,
+    method_index: int,
+    all_methods: list,
+):
+    """
+    Checks whether an instruction is a starting point for the current query.
+
+    Args:
+        gaps (object): Instance of GAPS.
+        instruction (Instruction): The instruction.
+        parent_method (str): Name of the method containing the instruction.
+        method_index (int): Index of the method.
+        all_methods (list): List of all methods.
+
+    Returns:
+        None
+    """
+    reference = dalvik_ir.get_reference(instruction, gaps.symbols)
+    class_name = reference.class_name
+    method_name = reference.method_name
+    instr_type = instruction.get_name()
+    class_name_parent, method_name_parent = method_utils.get_class_and_method(
+        parent_method, True
+    )
+    entry = method_index
+    if (
+        "invoke" in instr_type
+        and "this$0" not in reference.text
+        and len(method_name) > 0
+    ):
+        if (
+            not gaps.target_method
+            and not gaps.signature
+            and gaps.save_testing_seeds
+        ):
+            last = gaps.symbols.canonical(reference.last)
+            if gaps.package_name in class_name:
+                all_methods[0][last].add(entry)
+            elif not gaps.package_blacklist.match(class_name):
+                all_methods[1][last].add(entry)
     if gaps.target_method:
         if (
             method_name == gaps.target_method
@@ -347,7 +902,8 @@ def process_instr(
                 )
             )
         ):
-            key = str_inst.split(",")[-1][1:]
+            str_inst = dalvik_ir.render(instruction, gaps.symbols)
+            key = gaps.symbols.canonical(str_inst.split(",")[-1][1:])
             gaps.starting_points[key].add(entry)
     elif (
         gaps.class_name
@@ -357,14 +913,15 @@ def process_instr(
             or (gaps.parent_class and gaps.parent_class in class_name_parent)
         )
     ):
-        key = str_inst.split(",")[-1][1:]
+        str_inst = dalvik_ir.render(instruction, gaps.symbols)
+        key = gaps.symbols.canonical(str_inst.split(",")[-1][1:])
         gaps.starting_points[key].add(entry)
     elif (
         (gaps.seed_file or gaps.signature)
-        and str_inst.split()[-1] in gaps.starting_points
+        and reference.last in gaps.starting_points
         and "invoke" in instr_type
     ):
-        gaps.starting_points[str_inst.split()[-1]].add(entry)
+        gaps.starting_points[reference.last].add(entry)
     elif gaps.custom_seeds:
         if method_name in gaps.custom_seeds:
             custom_seeds_for_method = gaps.custom_seeds[method_name]
@@ -377,7 +934,7 @@ def process_instr(
                     and class_name == class_seed
                     and parent_seed == class_name_parent
                 ):
-                    gaps.starting_points[str_inst.split()[-1]].add(entry)
+                    gaps.starting_points[reference.last].add(entry)
 
 
 def _get_method_name(method):
@@ -398,38 +955,30 @@ def _get_method_name(method):
     return method_name
 
 
-def basic_blocks_2_graph(
-    gaps,
-    method,
-) -> defaultdict:
+def basic_blocks_2_graph(method, symbols: SymbolTable) -> tuple:
     """
     Converts basic blocks to a graph representation.
 
     Args:
-        gaps (object): Instance of GAPS.
         method: Method object.
+        symbols (SymbolTable): Symbol table of the app.
 
     Returns:
-        defaultdict: Graph representation of basic blocks.
+        tuple: Graph representation of basic blocks and the instructions
+            of the method, in order.
     """
     graph = defaultdict(set)
     m = method.get_method()
-    method_name = _get_method_name(method)
-    if method_name in gaps.search_list:
-        return gaps.search_list[method_name]
     offset_method = m.get_address()
-    translate = dict()
-    translate[-1] = method_name
+    instructions = deque()
     basic_blocks = method.get_basic_blocks()
     for bb in basic_blocks:
-        instructions = list(bb.get_instructions())
+        bb_instructions = list(bb.get_instructions())
         offset_inst = bb.get_start() + offset_method
-        for inst in instructions[:-1]:
-            inst_out = inst.get_output()
-            if "(" in inst_out:
-                inst_out = inst_out.replace(" ", "").replace(",", ", ")
-            str_inst = "{} {}".format(inst.get_name(), inst_out)
-            translate[offset_inst] = str_inst
+        for inst in bb_instructions[:-1]:
+            instructions.append(
+                dalvik_ir.from_androguard(inst, offset_inst, symbols)
+            )
 
             next_inst_offset = offset_inst + inst.get_length()
 
@@ -437,21 +986,110 @@ def basic_blocks_2_graph(
 
             offset_inst = next_inst_offset
         # multiple destinations ?
-        last_inst = instructions[-1]
+        last_inst = bb_instructions[-1]
         # node
-        inst_out = last_inst.get_output()
-        if "(" in inst_out:
-            inst_out = inst_out.replace(" ", "").replace(",", ", ")
-        str_inst = "{} {}".format(last_inst.get_name(), inst_out)
-        translate[offset_inst] = str_inst
+        instructions.append(
+            dalvik_ir.from_androguard(last_inst, offset_inst, symbols)
+        )
         # edges
         for child in bb.childs:
             child_offset = child[1] + offset_method
             graph[child_offset].add(offset_inst)
-    gaps.search_list[method_name] = graph, translate
+    return graph, tuple(instructions)
+
+
+def get_switch_table(method, method_index: int):
+    """
+    Extracts the switches of a method, along with the start offsets of its
+    basic blocks, which tell the case each block belongs to.
+
+    Args:
+        method: Method object.
+        method_index (int): Index of the method.
+
+    Returns:
+        SwitchTable: Switches of the method.
+    """
+    offset_method = method.get_method().get_address()
+    switches = deque()
+    block_starts = deque()
+    for bb in method.get_basic_blocks():
+        block_starts.append(bb.get_start() + offset_method)
+        last_inst = bb.get_last()
+        if last_inst.get_op_value() not in dalvik_ir.SWITCH_OPCODES:
+            continue
+        switch_index = bb.get_end() - bb.get_last_length()
+        payload = bb.get_special_ins(switch_index)
+        if payload is None:
+            continue
+        switch_offset = switch_index + offset_method
+        switches.append(
+            dalvik_ir.Switch(
+                switch_offset,
+                switch_offset + last_inst.get_ref_off() * 2,
+                switch_offset + last_inst.get_length(),
+                {
+                    key: switch_offset + target * 2
+                    for key, target in zip(
+                        payload.get_keys(), payload.get_targets()
+                    )
+                },
+            )
+        )
+    return dalvik_ir.SwitchTable(
+        method_index, tuple(switches), tuple(block_starts)
+    )
+
+
+def get_method_graph(gaps, method_index: int) -> tuple:
+    """
+    Retrieves the graph of a method along with its rendered instructions.
+
+    The rendered instructions of the most recently used methods are kept
+    in a bounded cache, so that memory does not grow with the number of
+    methods visited.
+
+    Args:
+        gaps (object): Instance of GAPS.
+        method_index (int): Index of the method.
+
+    Returns:
+        tuple: Graph representation of basic blocks and the translation
+            from offsets to instructions, rendered on demand.
+    """
+    method_graph = gaps.method_graph_cache.get(method_index)
+    if method_graph is not None:
+        return method_graph
+    graph, method_name, instructions = gaps.method_graphs[method_index]
+    translate = dalvik_ir.MethodText(method_name, instructions, gaps.symbols)
+    gaps.method_graph_cache.put(method_index, (graph, translate))
     return graph, translate
 
 
+def get_entry_distances(gaps, method_index: int) -> dict:
+    """
+    Retrieves the distances of the instructions of a method from its entry.
+
+    The distances are kept in a bounded cache of their own, so that they
+    are computed once for the most recently used methods without evicting
+    method graphs.
+
+    Args:
+        gaps (object): Instance of GAPS.
+        method_index (int): Index of the method.
+
+    Returns:
+        dict: Offset to least number of instructions from the entry.
+    """
+    distances = gaps.entry_distance_cache.get(method_index)
+    if distances is not None:
+        return distances
+    graph, _, instructions = gaps.method_graphs[method_index]
+    distances = graph.get_entry_distances(instructions[0].offset)
+    gaps.entry_distance_cache.put(method_index, distances)
+    return distances
+
+
 def save_testing_seeds(gaps, all_methods: list):
     """
     Saves testing seeds.
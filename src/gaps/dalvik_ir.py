@@ -0,0 +1,288 @@
+from array import array
+from bisect import bisect_left
+from collections import deque, defaultdict, namedtuple
+
+from . import method_utils
+from .dalvik_opcodes import OPCODE_NAMES, RANGE_OPCODES
+
+###############################################################################
+# GLOBALS
+###############################################################################
+
+NO_REF = -1
+
+Reference = namedtuple(
+    "Reference", ["text", "class_name", "method_name", "signature", "last"]
+)
+
+EMPTY_REFERENCE = Reference("", "", "", "", "")
+
+SWITCH_OPCODES = (0x2B, 0x2C)
+
+# offsets of a switch instruction, of its payload and of the instruction
+# following it, and case values to the offsets of their targets
+Switch = namedtuple("Switch", ["offset", "payload", "default", "cases"])
+
+SwitchTable = namedtuple(
+    "SwitchTable", ["method_index", "switches", "block_starts"]
+)
+
+###############################################################################
+# CODE
+###############################################################################
+
+
+class Instruction:
+    """
+    Compact representation of a Dalvik instruction.
+
+    The last operand that is not a register (method, field, type or string
+    reference, literal or branch offset) is interned in the symbol table of
+    the app and stored as `ref`, smali text is only rendered on demand.
+
+    The indexing and the starting point lookup read these fields, while the
+    paths, and so the data-flow and conditional analyses, are still made of
+    rendered instructions.
+    """
+
+    __slots__ = ("opcode", "registers", "ref", "offset")
+
+    def __init__(self, opcode: int, registers: tuple, ref: int, offset: int):
+        self.opcode = opcode
+        self.registers = registers
+        self.ref = ref
+        self.offset = offset
+
+    def get_name(self) -> str:
+        return OPCODE_NAMES[self.opcode]
+
+
+def _is_register(operand: str) -> bool:
+    return operand[:1] == "v" and operand[1:].isdigit()
+
+
+def from_androguard(instruction, offset: int, symbols) -> Instruction:
+    """
+    Converts an androguard instruction.
+
+    Args:
+        instruction: Androguard instruction.
+        offset (int): Offset of the instruction.
+        symbols (SymbolTable): Symbol table of the app.
+
+    Returns:
+        Instruction: The compact instruction.
+    """
+    opcode = instruction.get_op_value()
+    inst_out = instruction.get_output()
+    registers = ()
+    ref = NO_REF
+    if inst_out:
+        operands = inst_out.split(", ")
+        n_registers = 0
+        if opcode in RANGE_OPCODES and " ... " in operands[0]:
+            first, last = operands[0].split(" ... ")
+            if (
+                _is_register(first)
+                and _is_register(last)
+                and int(last[1:]) > int(first[1:])
+            ):
+                registers = tuple(range(int(first[1:]), int(last[1:]) + 1))
+                n_registers = 1
+        else:
+            while n_registers < len(operands) and _is_register(
+                operands[n_registers]
+            ):
+                n_registers += 1
+            registers = tuple(int(op[1:]) for op in operands[:n_registers])
+        if n_registers < len(operands):
+            ref = symbols.intern(", ".join(operands[n_registers:]))
+    return Instruction(opcode, registers, ref, offset)
+
+
+def render(instruction: Instruction, symbols) -> str:
+    """
+    Renders an instruction in the smali-like format used by the analysis.
+
+    Args:
+        instruction (Instruction): The instruction.
+        symbols (SymbolTable): Symbol table of the app.
+
+    Returns:
+        str: Instruction string.
+    """
+    registers = instruction.registers
+    if len(registers) > 1 and instruction.opcode in RANGE_OPCODES:
+        operands = ["v{} ... v{}".format(registers[0], registers[-1])]
+    else:
+        operands = ["v{}".format(register) for register in registers]
+    if instruction.ref != NO_REF:
+        operands.append(symbols.get(instruction.ref))
+    inst_out = ", ".join(operands)
+    if "(" in inst_out:
+        inst_out = inst_out.replace(" ", "").replace(",", ", ")
+    return "{} {}".format(OPCODE_NAMES[instruction.opcode], inst_out)
+
+
+class ControlFlowGraph:
+    """
+    Predecessors of the instructions of a method in compressed sparse row
+    form: the sorted offsets having predecessors and, for each of them, the
+    range of its predecessors in a single array, kept in the order in which
+    they were found. Offsets without predecessors are not in the graph.
+    """
+
+    __slots__ = ("offsets", "starts", "predecessors")
+
+    def __init__(self, graph: dict):
+        self.offsets = array(
+            "I", sorted(offset for offset in graph if graph[offset])
+        )
+        self.starts = array("I", [0])
+        self.predecessors = array("I")
+        for offset in self.offsets:
+            self.predecessors.extend(graph[offset])
+            self.starts.append(len(self.predecessors))
+
+    def __len__(self) -> int:
+        return len(self.offsets)
+
+    def _find(self, offset: int) -> int:
+        position = bisect_left(self.offsets, offset)
+        if position < len(self.offsets) and self.offsets[position] == offset:
+            return position
+        return -1
+
+    def __contains__(self, offset: int) -> bool:
+        return self._find(offset) != -1
+
+    def __getitem__(self, offset: int) -> array:
+        position = self._find(offset)
+        if position == -1:
+            raise KeyError(offset)
+        return self.predecessors[
+            self.starts[position] : self.starts[position + 1]
+        ]
+
+    def get(self, offset: int, default=None):
+        """
+        Retrieves the predecessors of an instruction.
+
+        Args:
+            offset (int): Offset of the instruction.
+            default (optional): Value returned when the instruction has no
+                predecessors. Defaults to None.
+
+        Returns:
+            array: Offsets of the predecessors, default if none.
+        """
+        if offset in self:
+            return self[offset]
+        return default
+
+    def get_entry_distances(self, entry: int) -> dict:
+        """
+        Computes the least number of instructions between the entry of the
+        method and each instruction reachable from it, by a breadth-first
+        search along the reversed edges.
+
+        Args:
+            entry (int): Offset of the first instruction of the method.
+
+        Returns:
+            dict: Offset to distance from the entry, for the instructions
+                reachable from the entry.
+        """
+        successors = defaultdict(list)
+        for position, offset in enumerate(self.offsets):
+            for predecessor in self.predecessors[
+                self.starts[position] : self.starts[position + 1]
+            ]:
+                successors[predecessor].append(offset)
+        distances = {entry: 0}
+        queue = deque([entry])
+        while queue:
+            offset = queue.popleft()
+            for successor in successors.get(offset, ()):
+                if successor not in distances:
+                    distances[successor] = distances[offset] + 1
+                    queue.append(successor)
+        return distances
+
+
+class MethodText:
+    """
+    Smali text of the instructions of a method by offset, each instruction
+    being rendered on first access. Offset -1 maps to the method name.
+    """
+
+    __slots__ = ("method_name", "instructions", "symbols", "texts")
+
+    def __init__(self, method_name: str, instructions: tuple, symbols):
+        self.method_name = method_name
+        self.instructions = {
+            instruction.offset: instruction for instruction in instructions
+        }
+        self.symbols = symbols
+        self.texts = {}
+
+    def __getitem__(self, offset: int) -> str:
+        if offset == -1:
+            return self.method_name
+        text = self.texts.get(offset)
+        if text is None:
+            # kept here only, so that it is evicted along with the method
+            text = render(self.instructions[offset], self.symbols)
+            self.texts[offset] = text
+        return text
+
+    def __iter__(self):
+        yield -1
+        yield from self.instructions
+
+
+def get_reference(instruction: Instruction, symbols) -> Reference:
+    """
+    Retrieves the parsed reference of an instruction, parsing each
+    reference once per symbol table.
+
+    Args:
+        instruction (Instruction): The instruction.
+        symbols (SymbolTable): Symbol table of the app.
+
+    Returns:
+        Reference: Parsed reference.
+    """
+    if instruction.ref == NO_REF:
+        return EMPTY_REFERENCE
+    reference = symbols.parsed.get(instruction.ref)
+    if reference is None:
+        reference = _parse_reference(symbols.get(instruction.ref))
+        symbols.parsed[instruction.ref] = reference
+    return reference
+
+
+def _parse_reference(text: str) -> Reference:
+    """
+    Parses a reference, as it would appear in the instruction string.
+
+    Args:
+        text (str): Reference text.
+
+    Returns:
+        Reference: Parsed reference.
+    """
+    if "(" in text:
+        text = text.replace(" ", "").replace(",", ", ")
+    class_name, method_name = method_utils.get_class_and_method(text, True)
+    signature = ""
+    if "->" in text:
+        signature = text.split("->")[1]
+    tokens = text.split()
+    return Reference(
+        text,
+        class_name,
+        method_name,
+        signature,
+        tokens[-1] if tokens else "",
+    )
@@ -18,6 +18,17 @@ LOG = logging.getLogger("gaps")
 
 MAX_LAYERS = 10
 
+# constants whose written value is the one read back, the other constant
+# writes go through the points-to analysis
+DIRECT_CONST_OPCODES = (
+    "const",
+    "const/4",
+    "const/16",
+    "const/high16",
+    "const-string",
+    "const-string/jumbo",
+)
+
 ###############################################################################
 # CODE
 ###############################################################################
@@ -360,6 +371,18 @@ def constant_propagation(
         if search_tag in gaps.search_list:
             result.update(gaps.search_list[search_tag])
             continue
+        # fields only written with constants do not need points-to analysis
+        direct_writes = None
+        if target_instruction and not caller_obj:
+            direct_writes = _get_direct_writes(target_instruction, gaps)
+        if direct_writes is not None:
+            for var_path, value in direct_writes:
+                layers += 1
+                # the points-to analysis would stop at the same depth
+                if layers + 2 <= MAX_LAYERS:
+                    result[var_path].append(value)
+            gaps.search_list[search_tag] = result
+            continue
         var_paths = path_generation.find_path_smali(
             var_name,
             gaps,
@@ -431,6 +454,67 @@ def constant_propagation(
     return result
 
 
+def get_field_values(field: str, gaps) -> list:
+    """
+    Retrieves the constants written to a field from the field index.
+
+    Args:
+        field (str): Field, e.g. `Lcom/app/Config;->DEBUG`.
+        gaps (object): Instance of GAPS.
+
+    Returns:
+        list: Constant values, in indexing order, None if the field is not
+            written or some write is not a direct constant.
+    """
+    writers = gaps.field_writers.get(field)
+    if not writers:
+        return None
+    values = []
+    for _, _, const_instruction in writers:
+        if (
+            const_instruction is None
+            or const_instruction.split()[0] not in DIRECT_CONST_OPCODES
+        ):
+            return None
+        values.append(get_const_value(const_instruction))
+    return values
+
+
+def _get_direct_writes(field: str, gaps) -> list:
+    """
+    Retrieves the paths and values of the writes of a field from the field
+    index, when all of them directly write a constant.
+
+    The paths are the ones the search of the field finds from the writes,
+    so the result is the one of the points-to analysis of these paths.
+
+    Args:
+        field (str): Field, e.g. `Lcom/app/Config;->DEBUG`.
+        gaps (object): Instance of GAPS.
+
+    Returns:
+        list: Path and constant value of each write, None if some write is
+            not a direct constant or the field needs the points-to
+            analysis.
+    """
+    values = get_field_values(field, gaps)
+    if "this$0" in field or values is None:
+        return None
+    writers = gaps.field_writers[field]
+    # reads in the writing methods are found along with the writes
+    writing_methods = {writer[0] for writer in writers}
+    for method_index, _ in gaps.field_readers.get(field, ()):
+        if method_index in writing_methods:
+            return None
+    direct_writes = []
+    for (method_index, offset, _), value in zip(writers, values):
+        for path in path_generation.get_instruction_paths(
+            gaps, method_index, offset
+        ):
+            direct_writes.append((path, value))
+    return direct_writes
+
+
 def constant_propagation_return_values(
     method_name: str, gaps, layers: int = 0
 ) -> dict:
@@ -452,20 +536,14 @@ def constant_propagation_return_values(
         starting_points = defaultdict(set)
         if method_name not in gaps.return_by:
             if ";->" in method_name:
-                rest_of_signature = ";->" + method_name.split(";->")[1]
-                target_class = method_name.split(";->")[0]
-                for method in gaps.return_by:
-                    if rest_of_signature in method:
-                        class_candidate = method.split(";->")[0]
-                        if (
-                            target_class
-                            in path_generation.get_root_class_hierarchy(
-                                class_candidate, gaps
-                            )[:-1]
-                        ):
-                            starting_points["return"].update(
-                                gaps.return_by[method]
-                            )
+                target_class, rest_of_signature = method_name.split(";->")[:2]
+                for method in gaps.class_hierarchy.get_overrides(
+                    target_class, rest_of_signature
+                ):
+                    if method in gaps.return_by:
+                        starting_points["return"].update(
+                            gaps.return_by[method]
+                        )
         else:
             starting_points["return"].update(gaps.return_by[method_name])
         if len(starting_points) == 0:
@@ -3,19 +3,25 @@ import os
 import sys
 import time
 from collections import defaultdict
-from androguard.misc import AnalyzeDex
 import logging
 import gc
 import json
+import multiprocessing
 from threading import Thread
-from collections import deque
+from collections import deque, namedtuple
+from concurrent.futures import ProcessPoolExecutor
 
 from . import dalvik_disassembler
 from . import method_utils
 from . import icc_analysis
 from . import path_generation
-from . import ui_id_finder
-from . import myAndroguard
+from . import snapshot
+from .call_graph import get_call_graph
+from .class_hierarchy import ClassHierarchy, get_class_infos
+from .lru_cache import LRUCache
+from .manifest_index import ManifestIndex
+from .resource_index import ResourceIds, ResourceIndex, get_resource_fields
+from .symbols import SymbolTable
 
 ###############################################################################
 # LOGGING
@@ -23,11 +29,115 @@ from . import myAndroguard
 
 LOG = logging.getLogger("gaps")
 
+###############################################################################
+# GLOBALS
+###############################################################################
+
+STATS_HEADER = [
+    "APP",
+    "TIME",
+    "REACHED METHODS",
+    "TOT. REACHABLE PATHS",
+    "REACHABLE CONDITIONAL PATHS",
+    "AVG. REACHABLE PATHS",
+    "UNIQUE PATHS",
+]
+
+# columns of the statistics counted by the queries
+QUERY_STATS = [3, 4, 6]
+
+QueryResults = namedtuple(
+    "QueryResults",
+    [
+        "json_output",
+        "solved_methods",
+        "stats",
+        "logs",
+        "cache_hits",
+        "cache_misses",
+        "distance_cache_hits",
+        "distance_cache_misses",
+    ],
+)
+
+# queries run in the calling process unless more workers are requested
+QUERY_WORKERS = 1
+
+# chunks of starting points handed out to each worker, to balance queries
+# with uneven costs
+QUERY_CHUNKS_PER_WORKER = 4
+
+# below this number of queries per worker the pool costs more than it saves
+MIN_PARALLEL_QUERIES = 4
+
+# state shared with the forked query workers
+_query_state = None
+
 ###############################################################################
 # CODE
 ###############################################################################
 
 
+def init_stats(stats_path: str):
+    """
+    Creates the statistics file with its header, if missing.
+
+    A statistics file written with other columns is moved aside to the
+    first free numbered path, e.g. `stats.1.csv`, so that the rows of the
+    apps are never appended under a different header.
+
+    Args:
+        stats_path (str): Path to the statistics file.
+
+    Returns:
+        None
+    """
+    if os.path.exists(stats_path):
+        with open(stats_path, newline="") as stats_file:
+            header = next(csv.reader(stats_file), None)
+        if header == STATS_HEADER:
+            return
+        root, ext = os.path.splitext(stats_path)
+        n_file = 1
+        while os.path.exists(f"{root}.{n_file}{ext}"):
+            n_file += 1
+        os.replace(stats_path, f"{root}.{n_file}{ext}")
+        LOG.warning(
+            f"[-] {stats_path} HAS OTHER COLUMNS, MOVED TO "
+            f"{root}.{n_file}{ext}"
+        )
+    if not os.path.exists(stats_path):
+        with open(stats_path, "w") as stats_file:
+            stats_writer = csv.writer(
+                stats_file,
+                delimiter=",",
+                quotechar='"',
+                quoting=csv.QUOTE_MINIMAL,
+            )
+            stats_writer.writerow(STATS_HEADER)
+
+
+def save_stats_row(stats_path: str, stats_row: list):
+    """
+    Appends the statistics of an app to the statistics file.
+
+    Args:
+        stats_path (str): Path to the statistics file.
+        stats_row (list): Statistics of the app.
+
+    Returns:
+        None
+    """
+    with open(stats_path, "a") as stats_file:
+        stats_writer = csv.writer(
+            stats_file,
+            delimiter=",",
+            quotechar='"',
+            quoting=csv.QUOTE_MINIMAL,
+        )
+        stats_writer.writerow(stats_row)
+
+
 class GAPS:
     def __init__(
         self,
@@ -42,6 +152,11 @@ class GAPS:
         conditional,
         loglevel,
         max_paths,
+        snapshot_dir=snapshot.SNAPSHOT_DIR,
+        append_stats=True,
+        query_workers=QUERY_WORKERS,
+        index_workers=dalvik_disassembler.MAX_WORKERS,
+        max_paths_per_entry=None,
     ):
         """
         Initializes the Graph-based Automated Path Synthesizer.
@@ -58,6 +173,17 @@ class GAPS:
             append_instructions (bool): Flag indicating whether to append instructions.
             loglevel (str): Log level.
             max_paths (int): Maximum number of paths to consider.
+            snapshot_dir (str): Directory of the analysis snapshots,
+                None to always analyze the app from scratch.
+            append_stats (bool): Whether to append the statistics of the
+                app to the statistics file of the output directory.
+            query_workers (int): Maximum number of processes running the
+                queries of the starting points.
+            index_workers (int): Maximum number of processes indexing the
+                methods of the app.
+            max_paths_per_entry (int): Maximum number of paths to each entry
+                point of a query, so that the paths are spread over the
+                entry points, None for no limit.
 
         Returns:
             None
@@ -78,6 +204,11 @@ class GAPS:
         if loglevel == 20:
             self.loglevel = "verbose"
         self.max_paths = max_paths
+        self.snapshot_dir = snapshot_dir
+        self.append_stats = append_stats
+        self.query_workers = query_workers
+        self.index_workers = index_workers
+        self.max_paths_per_entry = max_paths_per_entry
         self._setup()
 
     def _setup(self):
@@ -98,6 +229,13 @@ class GAPS:
             0
         ]
         self.tmp_path = "/tmp/" + self.file_name + ".cache"
+        self.digest = None
+        saved_snapshot = None
+        if self.snapshot_dir and os.path.exists(self.dalvik_path):
+            self.digest = snapshot.get_digest(self.dalvik_path)
+            saved_snapshot = snapshot.load_snapshot(self)
+        # filled by the disassembling thread
+        self.resources = ResourceIndex("")
         disassembling_thread = Thread(
             target=self._disassemble_app,
             args=(ext,),
@@ -110,16 +248,18 @@ class GAPS:
         self.main_activity = []
         self.app_type = "apk"
 
+        # androguard is imported once needed, as restoring a snapshot
+        # only requires the manifest
         if ext == ".apk":
-            self.dalvik, self.dx = myAndroguard.AnalyzeAPK(self.dalvik_path)
-            self.manifest_xml = self.dalvik.get_android_manifest_xml()
-            self.package_name = "L" + self.manifest_xml.get("package").replace(
-                ".", "/"
-            )
+            from androguard.core.bytecodes.apk import APK
+
+            self.dalvik, self.dx = APK(self.dalvik_path), None
+            self.manifest = ManifestIndex(self.dalvik)
+            self.package_name = "L" + self.manifest.package.replace(".", "/")
             icc_analysis.get_main_activities(self)
 
             icc_analysis.get_main_activity_aliases(
-                self.main_activity, self.manifest_xml
+                self.main_activity, self.manifest
             )
             LOG.debug(f"[+] MAIN ACTIVITY {self.main_activity}")
             self.target_sdk = -1
@@ -128,11 +268,25 @@ class GAPS:
                 self.target_sdk = int(self.dalvik.get_target_sdk_version())
             LOG.info(f"[+] TARGET SDK IS {self.target_sdk}")
             LOG.debug(f"[+] PACKAGE NAME {self.package_name}")
+            (
+                self.package_blacklist,
+                self.analysis_blacklist,
+            ) = dalvik_disassembler.get_blacklists(self)
         elif ext == ".dex":
             self.app_type = "dex"
-            self.dalvik, d, self.dx = AnalyzeDex(
-                self.dalvik_path, session=None
-            )
+            self.manifest = ManifestIndex()
+            (
+                self.package_blacklist,
+                self.analysis_blacklist,
+            ) = dalvik_disassembler.get_blacklists(self)
+            self.dalvik, self.dx = None, None
+            if saved_snapshot is None:
+                from . import myAndroguard
+
+                self.dalvik, self.dx = myAndroguard.AnalyzeDex(
+                    self.dalvik_path,
+                    skip_class=self.analysis_blacklist.match,
+                )
         else:
             LOG.error("ERROR: input file is not .dex or .apk")
             sys.exit(1)
@@ -140,7 +294,6 @@ class GAPS:
         self.icc = dict()
         self.icc_string_analysis = defaultdict(set)
         self.content_providers = {}
-        self.exported_components = {}
 
         self.condition_visited = deque()
         self.conditional_key = ""
@@ -165,32 +318,65 @@ class GAPS:
             self.process_custom_seed()
         if self.seed_file:
             self._init_testing_seeds()
-        self.signature_to_address = defaultdict(
-            lambda: defaultdict(lambda: defaultdict(set))
-        )
+        self.signature_to_address = dalvik_disassembler.new_signature_index()
         self.icc_method_addresses = defaultdict(set)
         self.return_by = defaultdict(set)
         self.access_methods = {}
-        self.methods_with_switches = {}
+        self.switch_tables = {}
         self.object_instantiated = defaultdict(set)
         self.fragment_to_activity = defaultdict(set)
 
         self.testing_seeds = ""
         self.method_index = 0
-        self.method_objs = defaultdict()
-
-        LOG.info("[+] STARTING METHODS ANALYSIS")
+        self.method_graphs = {}
+        self.method_graph_cache = LRUCache(
+            dalvik_disassembler.MAX_CACHED_GRAPHS
+        )
+        self.entry_distance_cache = LRUCache(
+            dalvik_disassembler.MAX_CACHED_DISTANCES
+        )
+        self.call_sites = defaultdict(dict)
+        self.field_writers = defaultdict(list)
+        self.field_readers = defaultdict(list)
+        self.const_users = defaultdict(set)
+        self.symbols = SymbolTable()
+        self.class_hierarchy = None
+        self.resource_ids = None
+        self.call_graph = None
+
+        if saved_snapshot is not None:
+            snapshot.restore_snapshot(self, saved_snapshot)
+            saved_snapshot = None
+            dalvik_disassembler.find_starting_points(self)
+        else:
+            LOG.info("[+] STARTING METHODS ANALYSIS")
 
-        dalvik_disassembler.disassemble(self)
+            if self.app_type == "apk":
+                dalvik_disassembler.disassemble_apk(
+                    self, self.index_workers
+                )
+            else:
+                dalvik_disassembler.disassemble(self, self.index_workers)
+            # the hierarchy and the resource ids of multidex apps come from
+            # the workers, the androguard analysis is not needed once they
+            # are built
+            if self.dx is not None:
+                self.class_hierarchy = ClassHierarchy(
+                    get_class_infos(self.dx)
+                )
+                self.resource_ids = ResourceIds(
+                    get_resource_fields(self.dx)
+                )
+                self.dx = None
+            self.class_hierarchy.index_overrides(self.all_methods)
 
-        LOG.info("[+] END METHODS ANALYSIS")
+            LOG.info("[+] END METHODS ANALYSIS")
+            if self.snapshot_dir:
+                snapshot.save_snapshot(self)
         self._save_testing_seeds()
         self.append_mode = False
         self.instruction = ""
         self.logs = ""
-        self.classes = self.dx.classes.copy()
-        self.public_xml = {}
-        self.strings_xml = {}
 
         LOG.info("[+] RETRIEVING ICC INFORMATION")
         """
@@ -207,13 +393,15 @@ class GAPS:
         path_generation.get_reflection_calls(self)
 
         disassembling_thread.join()
-        ui_id_finder.save_public_strings_xml(self)
+        # built once the fragments declared by the resources are known
+        self.call_graph = get_call_graph(self)
         self._free_memory()
         self._init_stats()
 
     def _disassemble_app(self, ext):
         """
-        Disassembles the application based on its file extension.
+        Disassembles the application based on its file extension and
+        indexes its resources.
 
         Args:
             ext (str): File extension of the application.
@@ -221,10 +409,16 @@ class GAPS:
         Returns:
             None
         """
-        if ext == ".apk":
-            dalvik_disassembler.run_apktool(self)
+        if self.digest and snapshot.is_disassembly_cached(self):
+            LOG.info(f"[+] REUSING DISASSEMBLY IN {self.tmp_path}")
         else:
-            dalvik_disassembler.run_baksmali(self)
+            if ext == ".apk":
+                dalvik_disassembler.run_apktool(self)
+            else:
+                dalvik_disassembler.run_baksmali(self)
+            if self.digest:
+                snapshot.mark_disassembly(self)
+        self.resources = ResourceIndex(os.path.join(self.tmp_path, "res"))
 
     def _free_memory(self):
         """
@@ -283,26 +477,8 @@ class GAPS:
         Returns:
             None
         """
-        stats_path = os.path.join(self.output, "stats.csv")
-        if not os.path.exists(stats_path):
-            with open(stats_path, "w") as stats_file:
-                stats_writer = csv.writer(
-                    stats_file,
-                    delimiter=",",
-                    quotechar='"',
-                    quoting=csv.QUOTE_MINIMAL,
-                )
-                stats_writer.writerow(
-                    [
-                        "APP",
-                        "TIME",
-                        "REACHED METHODS",
-                        "TOT. REACHABLE PATHS",
-                        "REACHABLE CONDITIONAL PATHS",
-                        "AVG. REACHABLE PATHS",
-                        "UNIQUE PATHS",
-                    ]
-                )
+        if self.append_stats:
+            init_stats(os.path.join(self.output, "stats.csv"))
 
     def _init_testing_seeds(self):
         """
@@ -314,8 +490,7 @@ class GAPS:
         Returns:
             None
         """
-        if not os.path.exists("./testing_seeds"):
-            os.mkdir("./testing_seeds")
+        os.makedirs("./testing_seeds", exist_ok=True)
         testing_seeds_file = os.path.join(
             "testing_seeds", f"{self.file_name}.seed"
         )
@@ -338,6 +513,7 @@ class GAPS:
         Returns:
             None
         """
+        os.makedirs("./testing_seeds", exist_ok=True)
         testing_seeds_file = os.path.join(
             "testing_seeds", f"{self.file_name}.seed"
         )
@@ -345,6 +521,113 @@ class GAPS:
             with open(testing_seeds_file, "w") as log_file:
                 log_file.write(self.testing_seeds)
 
+    def _find_seed_paths(self, index: int, instruction: str):
+        """
+        Reconstructs the paths reaching a starting point.
+
+        Args:
+            index (int): Index of the starting point.
+            instruction (str): Starting point.
+
+        Returns:
+            None
+        """
+        LOG.info(f"[+] METHOD {index}/{len(self.starting_points)-1}")
+        # the memoized searches depend on the order in which they are made,
+        # so each query starts from empty ones to only depend on its seed
+        self.search_list = {}
+        self.fragment_to_activity = defaultdict(set)
+        self.call_sequences = set()
+        self.instruction = instruction
+        self.conditional_paths = defaultdict(list)
+        self.path_index = 0
+        (
+            search_class_name,
+            search_method_name,
+        ) = method_utils.get_class_and_method(instruction, True)
+        dict_2_start = {instruction: self.starting_points[instruction]}
+        partial_paths = path_generation.find_path_smali(
+            search_method_name,
+            self,
+            target_class=search_class_name,
+            starting_points=dict_2_start,
+            consider_hierarchy=False,
+        )
+        seen_parents = set()
+        for partial_path in partial_paths:
+            if partial_path[-1] in seen_parents:
+                continue
+            seen_parents.add(partial_path[-1])
+            path_generation.build_paths(
+                [partial_path],
+                self,
+                self.conditional,
+                max_paths=self.max_paths // len(partial_paths),
+            )
+
+    def _find_paths_in_parallel(self, instructions: list, n_workers: int):
+        """
+        Runs the queries of the starting points in a pool of forked worker
+        processes.
+
+        Each worker runs chunks of consecutive starting points, and the
+        results are merged in chunk order. Since every query starts from
+        empty memoized searches, the results are the same as the ones of a
+        serial run, whatever the number of workers and chunks.
+
+        Args:
+            instructions (list): Starting points.
+            n_workers (int): Number of worker processes.
+
+        Returns:
+            None
+        """
+        global _query_state
+        LOG.info(
+            f"[+] RUNNING {len(instructions)} QUERIES WITH {n_workers} WORKERS"
+        )
+        n_chunks = n_workers * QUERY_CHUNKS_PER_WORKER
+        chunk_size = -(-len(instructions) // n_chunks)
+        _query_state = self, instructions
+        try:
+            with ProcessPoolExecutor(
+                max_workers=n_workers,
+                mp_context=multiprocessing.get_context("fork"),
+            ) as e:
+                chunks = e.map(
+                    _run_queries,
+                    range(0, len(instructions), chunk_size),
+                    [chunk_size] * n_chunks,
+                )
+                for results in chunks:
+                    self._merge_query_results(results)
+        finally:
+            _query_state = None
+
+    def _merge_query_results(self, results: QueryResults):
+        """
+        Merges the results of a chunk of queries.
+
+        Args:
+            results (QueryResults): Results of the chunk.
+
+        Returns:
+            None
+        """
+        self.json_output.update(results.json_output)
+        for instruction, n_paths in results.solved_methods.items():
+            self.solved_methods[instruction] += n_paths
+        for column, value in zip(QUERY_STATS, results.stats):
+            self.stats_row[column] += value
+        # the logs of a serial run skip the lines already logged
+        for log in results.logs.splitlines(keepends=True):
+            if log not in self.logs:
+                self.logs += log
+        self.method_graph_cache.hits += results.cache_hits
+        self.method_graph_cache.misses += results.cache_misses
+        self.entry_distance_cache.hits += results.distance_cache_hits
+        self.entry_distance_cache.misses += results.distance_cache_misses
+
     def _save_stats(self):
         """
         Saves analysis statistics in csv format.
@@ -365,15 +648,10 @@ class GAPS:
         else:
             self.stats_row[5] = 0
         self.stats_row[5] = "{:.2f}".format(self.stats_row[5])
-        stats_path = os.path.join(self.output, "stats.csv")
-        with open(stats_path, "a") as stats_file:
-            stats_writer = csv.writer(
-                stats_file,
-                delimiter=",",
-                quotechar='"',
-                quoting=csv.QUOTE_MINIMAL,
+        if self.append_stats:
+            save_stats_row(
+                os.path.join(self.output, "stats.csv"), self.stats_row
             )
-            stats_writer.writerow(self.stats_row)
         app_out_path = os.path.join(self.output, self.file_name)
         if not os.path.exists(app_out_path):
             os.mkdir(app_out_path)
@@ -406,6 +684,10 @@ class GAPS:
         """
         Starts the path reconstruction process.
 
+        The queries of the starting points only read the indexes, so they
+        are run by a pool of forked worker processes when there are enough
+        of them, the indexes being shared copy-on-write.
+
         Args:
             None
 
@@ -415,38 +697,61 @@ class GAPS:
         LOG.info("[+] STARTING PATH RECONSTRUCTION")
         self.stats_row = [self.file_name, 0, 0, 0, 0, 0, 0]
         self.solved_methods = defaultdict(int)
-        index = 0
         self.search_list = {}
-        for instruction in self.starting_points:
-            LOG.info(f"[+] METHOD {index}/{len(self.starting_points)-1}")
-            index += 1
-            self.call_sequences = set()
-            self.instruction = instruction
-            self.conditional_paths = defaultdict(list)
-            self.path_index = 0
-            (
-                search_class_name,
-                search_method_name,
-            ) = method_utils.get_class_and_method(instruction, True)
-            dict_2_start = {instruction: self.starting_points[instruction]}
-            partial_paths = path_generation.find_path_smali(
-                search_method_name,
-                self,
-                target_class=search_class_name,
-                starting_points=dict_2_start,
-                consider_hierarchy=False,
-            )
-            seen_parents = set()
-            for partial_path in partial_paths:
-                if partial_path[-1] in seen_parents:
-                    continue
-                seen_parents.add(partial_path[-1])
-                path_generation.build_paths(
-                    [partial_path],
-                    self,
-                    self.conditional,
-                    max_paths=self.max_paths // len(partial_paths),
-                )
+        instructions = list(self.starting_points)
+        n_workers = min(
+            self.query_workers, len(instructions) // MIN_PARALLEL_QUERIES
+        )
+        if (
+            n_workers <= 1
+            or "fork" not in multiprocessing.get_all_start_methods()
+        ):
+            for index, instruction in enumerate(instructions):
+                self._find_seed_paths(index, instruction)
+        else:
+            self._find_paths_in_parallel(instructions, n_workers)
+        LOG.info(
+            f"[+] METHOD GRAPH CACHE: {self.method_graph_cache.hits} HITS, "
+            f"{self.method_graph_cache.misses} MISSES"
+        )
+        LOG.info(
+            f"[+] ENTRY DISTANCE CACHE: {self.entry_distance_cache.hits} "
+            f"HITS, {self.entry_distance_cache.misses} MISSES"
+        )
         LOG.info("--- %s seconds ---" % (time.time() - self.start_time))
         self._save_stats()
         self._save_json_output()
+
+
+def _run_queries(start: int, chunk_size: int) -> QueryResults:
+    """
+    Runs the queries of a chunk of starting points in a worker process.
+
+    Args:
+        start (int): Index of the first starting point of the chunk.
+        chunk_size (int): Number of starting points in the chunk.
+
+    Returns:
+        QueryResults: Outputs, statistics and logs of the chunk.
+    """
+    gaps, instructions = _query_state
+    gaps.json_output = {}
+    gaps.solved_methods = defaultdict(int)
+    gaps.stats_row = [gaps.file_name, 0, 0, 0, 0, 0, 0]
+    gaps.logs = ""
+    cache_hits = gaps.method_graph_cache.hits
+    cache_misses = gaps.method_graph_cache.misses
+    distance_cache_hits = gaps.entry_distance_cache.hits
+    distance_cache_misses = gaps.entry_distance_cache.misses
+    for index in range(start, min(start + chunk_size, len(instructions))):
+        gaps._find_seed_paths(index, instructions[index])
+    return QueryResults(
+        gaps.json_output,
+        dict(gaps.solved_methods),
+        [gaps.stats_row[column] for column in QUERY_STATS],
+        gaps.logs,
+        gaps.method_graph_cache.hits - cache_hits,
+        gaps.method_graph_cache.misses - cache_misses,
+        gaps.entry_distance_cache.hits - distance_cache_hits,
+        gaps.entry_distance_cache.misses - distance_cache_misses,
+    )
@@ -16,8 +16,6 @@ LOG = logging.getLogger("gaps")
 # GLOBALS
 ###############################################################################
 
-android_manifest_tag = "{http://schemas.android.com/apk/res/android}"
-
 black_listed_actions = [
     r"android\.intent\.action.*",
     r"android\.appwidget\.action.*",
@@ -25,7 +23,9 @@ black_listed_actions = [
     r"android\.bluetooth\.device\.action.*",
 ]
 
-black_list_actions = "(" + ")|(".join(black_listed_actions) + ")"
+black_list_actions = re.compile(
+    "(" + ")|(".join(black_listed_actions) + ")"
+)
 
 
 ###############################################################################
@@ -33,57 +33,6 @@ black_list_actions = "(" + ")|(".join(black_listed_actions) + ")"
 ###############################################################################
 
 
-def _get_actions_intent_filters(
-    itemtype: str, name: str, gaps, action_to_dest: dict
-):
-    """
-    Retrieves intent filters for a given item type.
-
-    Args:
-        itemtype (str): Type of the item (activity, service, receiver).
-        name (str): Name of the item.
-        gaps: Gaps object.
-        action_to_dest (dict): Dictionary mapping action to destination.
-
-    Returns:
-        None
-    """
-    dest = "L" + name.replace(".", "/")
-    for action, intent_name in gaps.dalvik.get_intent_filters(
-        itemtype, name
-    ).items():
-        if action == "action":
-            for action in intent_name:
-                if dest not in gaps.icc:
-                    gaps.icc[dest] = deque()
-                gaps.icc[dest].append(action)
-                if action not in action_to_dest:
-                    action_to_dest[action] = deque()
-                action_to_dest[action] = dest
-
-
-def _get_content_provider_authorities(gaps):
-    """
-    Retrieves content provider authorities from the manifest.
-
-    Args:
-        gaps: Gaps object.
-
-    Returns:
-        None
-    """
-    components = gaps.manifest_xml.find("application").findall("provider")
-    if not components:
-        return
-    for component in components:
-        authority = component.get("android:authorities")
-        name = component.get("android:name")
-        if not name or not authority:
-            continue
-        smali_name = "L" + name.replace(".", "/")
-        gaps.content_providers[smali_name] = authority
-
-
 def get_icc_info(gaps):
     """
     Retrieves inter-component communication (ICC) information.
@@ -98,34 +47,21 @@ def get_icc_info(gaps):
     action_to_dest = dict()
 
     if gaps.app_type == "apk":
-        _save_exported_components(gaps)
-
-        activities = gaps.dalvik.get_activities()
-        activityString = "activity"
-        for activity in activities:
-            smali_activity = "L" + activity.replace(".", "/")
-            if _check_if_exported(smali_activity, gaps) or (
-                gaps.target_sdk <= 31
+        for component, info in gaps.manifest.components.items():
+            if info.kind == "activity-alias" or not info.actions:
+                continue
+            if info.kind == "activity" and not (
+                _check_if_exported(component, gaps) or gaps.target_sdk <= 31
             ):
-                _get_actions_intent_filters(
-                    activityString, activity, gaps, action_to_dest
-                )
-
-        services = gaps.dalvik.get_services()
-        serviceString = "service"
-        for service in services:
-            _get_actions_intent_filters(
-                serviceString, service, gaps, action_to_dest
-            )
-
-        receivers = gaps.dalvik.get_receivers()
-        receiverString = "receiver"
-        for receiver in receivers:
-            _get_actions_intent_filters(
-                receiverString, receiver, gaps, action_to_dest
-            )
+                continue
+            gaps.icc.setdefault(component, deque()).extend(info.actions)
+        # the last component declaring an action receives its intents
+        for action, components in gaps.manifest.actions.items():
+            for component in components:
+                if component in gaps.icc:
+                    action_to_dest[action] = component
 
-        _get_content_provider_authorities(gaps)
+        gaps.content_providers.update(gaps.manifest.authorities)
 
     register_receivers = path_generation.find_path_smali(
         "registerReceiver",
@@ -568,36 +504,17 @@ def get_main_activity_aliases(main_activities, manifest):
 
     Args:
         main_activities: Main activity information.
-        manifest: Manifest information.
+        manifest (ManifestIndex): Components of the manifest.
 
     Returns:
         None
     """
-    activity_aliases = manifest.find("application").findall("activity-alias")
-    if not activity_aliases:
-        return
-    for main_activity in main_activities:
-        for activity_alias in activity_aliases:
-            target_activity = activity_alias.get(
-                f"{android_manifest_tag}targetActivity"
-            )
-            class_name = activity_alias.get(f"{android_manifest_tag}name")
-            if not target_activity or not class_name:
-                break
-            smali_target_activity = method_utils.convert_java_class_to_smali(
-                target_activity
-            )
-            smali_class_name = method_utils.convert_java_class_to_smali(
-                class_name
-            )
-            if (
-                smali_class_name in main_activities
-                or smali_target_activity in main_activities
-            ):
-                if smali_class_name not in main_activities:
-                    main_activities.append(smali_class_name)
-                if smali_target_activity not in main_activities:
-                    main_activities.append(smali_target_activity)
+    for alias, target_activity in manifest.alias_targets.items():
+        if alias in main_activities or target_activity in main_activities:
+            if alias not in main_activities:
+                main_activities.append(alias)
+            if target_activity not in main_activities:
+                main_activities.append(target_activity)
 
 
 def find_icc_comm(last_inst: str, gaps, entry_points) -> list:
@@ -675,7 +592,7 @@ def _find_icc_smali(class_name: str, gaps, entry_points) -> list:
                     to_send_action = to_send_action.replace('"', "").replace(
                         "\\", ""
                     )
-                if not re.match(black_list_actions, to_send_action):
+                if not black_list_actions.match(to_send_action):
                     entry = tuple(
                         [
                             'SEND INTENT {ACTION = "'
@@ -715,64 +632,10 @@ def get_main_activities(gaps):
     Returns:
         None
     """
-    if gaps.dalvik.get_main_activities():
-        java_main_activities = gaps.dalvik.get_main_activities()
-        app_name = gaps.manifest_xml.find("application").get(
-            "{http://schemas.android.com/apk/res/android}name"
-        )
-        if app_name:
-            java_main_activities.add(app_name)
-        for java_main_activity in java_main_activities:
-            smali_main_activity = method_utils.convert_java_class_to_smali(
-                java_main_activity
-            )
-            if (
-                gaps.package_name not in smali_main_activity
-                and smali_main_activity.startswith("L/")
-            ) or smali_main_activity.count("/") < 2:
-
-                smali_main_activity = smali_main_activity[1:]
-                if smali_main_activity[0] != "/":
-                    smali_main_activity = "/" + smali_main_activity
-                smali_main_activity = gaps.package_name + smali_main_activity
-            gaps.main_activity.append(smali_main_activity)
-
-
-def _save_exported_components(gaps):
-    """
-    Saves exported components.
-
-    Args:
-        gaps: Gaps object.
-
-    Returns:
-        None
-    """
-    component_types = ["activity", "service", "receiver"]
-    for component_type in component_types:
-        components = gaps.manifest_xml.findall(
-            f"./application/{component_type}"
-        )
-        if not components:
-            continue
-        for component in components:
-            component_name_full = component.get(
-                "{http://schemas.android.com/apk/res/android}name"
-            ).replace(".", "/")
-            if gaps.package_name not in component_name_full:
-                component_name_full = gaps.package_name + component_name_full
-            gaps.exported_components[component_name_full] = False
-            permission = component.get(
-                "{http://schemas.android.com/apk/res/android}permission"
-            )
-            if (
-                component.get(
-                    "{http://schemas.android.com/apk/res/android}exported"
-                )
-                == "true"
-                and not permission
-            ):
-                gaps.exported_components[component_name_full] = True
+    if gaps.manifest.main_activities:
+        gaps.main_activity.extend(gaps.manifest.main_activities)
+        if gaps.manifest.application:
+            gaps.main_activity.append(gaps.manifest.application)
 
 
 def _check_if_exported(class_name: str, gaps) -> bool:
@@ -786,6 +649,4 @@ def _check_if_exported(class_name: str, gaps) -> bool:
     Returns:
         bool: True if exported, False otherwise.
     """
-    if class_name not in gaps.exported_components:
-        return False
-    return gaps.exported_components[class_name]
+    return gaps.manifest.is_exported(class_name)
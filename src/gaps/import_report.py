@@ -0,0 +1,114 @@
+import sys
+import time
+import atexit
+import builtins
+import importlib.util
+
+###############################################################################
+# GLOBALS
+###############################################################################
+
+_builtin_import = builtins.__import__
+
+# nesting level of the import statements being executed
+_depth = 0
+
+# (depth, module, seconds) of the imports loading new modules, in the order
+# they complete, like python -X importtime
+import_times = []
+
+start_time = None
+
+###############################################################################
+# CODE
+###############################################################################
+
+
+def start():
+    """
+    Starts timing the imports, the report is printed when the run ends.
+
+    Returns:
+        None
+    """
+    global start_time
+    start_time = time.perf_counter()
+    builtins.__import__ = _timed_import
+    atexit.register(print_report)
+
+
+def _get_module_name(name: str, globals, fromlist, level: int) -> str:
+    """
+    Retrieves the absolute name of an imported module.
+
+    Args:
+        name (str): Name given to the import statement.
+        globals: Globals of the importing module.
+        fromlist: Names imported from the module.
+        level (int): Level of a relative import.
+
+    Returns:
+        str: Absolute name of the module.
+    """
+    if level:
+        package = (globals or {}).get("__package__") or ""
+        name = importlib.util.resolve_name("." * level + name, package)
+    if fromlist and name in sys.modules:
+        submodules = [
+            f"{name}.{attribute}"
+            for attribute in fromlist
+            if f"{name}.{attribute}" in sys.modules
+        ]
+        if submodules:
+            return ", ".join(submodules)
+    return name
+
+
+def _timed_import(name, globals=None, locals=None, fromlist=(), level=0):
+    global _depth
+    n_modules = len(sys.modules)
+    _depth += 1
+    import_start = time.perf_counter()
+    try:
+        return _builtin_import(name, globals, locals, fromlist, level)
+    finally:
+        elapsed = time.perf_counter() - import_start
+        _depth -= 1
+        if len(sys.modules) > n_modules:
+            import_times.append(
+                (
+                    _depth,
+                    _get_module_name(name, globals, fromlist, level),
+                    elapsed,
+                )
+            )
+
+
+def print_report():
+    """
+    Prints the time spent importing modules since the start of the timing,
+    over the total time of the run.
+
+    Returns:
+        None
+    """
+    builtins.__import__ = _builtin_import
+    total_time = time.perf_counter() - start_time
+    import_time = sum(
+        elapsed for depth, _, elapsed in import_times if depth == 0
+    )
+    report = ["import time: cumulative [ms] | imported module"]
+    for depth, module, elapsed in import_times:
+        report.append(
+            "import time: {:>15.1f} | {}{}".format(
+                elapsed * 1000, "  " * depth, module
+            )
+        )
+    report.append(
+        "[+] IMPORTS TOOK {:.3f}s OF {:.3f}s ({:.1f}%)".format(
+            import_time,
+            total_time,
+            100 * import_time / total_time if total_time else 0,
+        )
+    )
+    sys.stderr.write("\n".join(report) + "\n")
@@ -0,0 +1,63 @@
+from collections import OrderedDict
+
+###############################################################################
+# CODE
+###############################################################################
+
+
+class LRUCache:
+    """
+    Mapping holding at most `max_size` entries, evicting the least recently
+    used one when full.
+
+    Lookups are counted as hits or misses, so that the size of the cache
+    can be tuned on the apps analyzed.
+    """
+
+    __slots__ = ("max_size", "entries", "hits", "misses")
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def get(self, key, default=None):
+        """
+        Retrieves an entry, marking it as the most recently used.
+
+        Args:
+            key: Key of the entry.
+            default (optional): Value returned when the key is missing.
+                Defaults to None.
+
+        Returns:
+            Value of the entry, default if missing.
+        """
+        value = self.entries.get(key, default)
+        if key in self.entries:
+            self.entries.move_to_end(key)
+            self.hits += 1
+        else:
+            self.misses += 1
+        return value
+
+    def put(self, key, value):
+        """
+        Adds or replaces an entry, evicting the least recently used entry
+        if the cache is full.
+
+        Args:
+            key: Key of the entry.
+            value: Value of the entry.
+
+        Returns:
+            None
+        """
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
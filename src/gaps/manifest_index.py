@@ -0,0 +1,157 @@
+from collections import namedtuple
+
+###############################################################################
+# GLOBALS
+###############################################################################
+
+ANDROID_NAMESPACE = "{http://schemas.android.com/apk/res/android}"
+
+ComponentInfo = namedtuple(
+    "ComponentInfo",
+    ["kind", "exported", "permission", "aliases", "actions", "categories"],
+)
+
+# components whose intent filters are indexed, in indexing order
+COMPONENT_KINDS = ["activity", "service", "receiver", "activity-alias"]
+
+MAIN_ACTION = "android.intent.action.MAIN"
+
+LAUNCHER_CATEGORY = "android.intent.category.LAUNCHER"
+
+###############################################################################
+# CODE
+###############################################################################
+
+
+class ManifestIndex:
+    """
+    Components declared by the manifest of the analyzed app, indexed once
+    when the app is loaded.
+
+    Components are indexed by their smali name, with names relative to the
+    package resolved as Android does, along with the actions and the
+    categories of their intent filters, the activity aliases targeting
+    them and whether they are exported. Actions are indexed by the
+    components declaring them, in manifest order. Apps without manifest,
+    e.g. DEX files, get an empty index.
+    """
+
+    __slots__ = (
+        "package",
+        "application",
+        "components",
+        "actions",
+        "alias_targets",
+        "authorities",
+        "main_activities",
+    )
+
+    def __init__(self, apk=None):
+        self.package = ""
+        self.application = None
+        self.components = {}
+        self.actions = {}
+        self.alias_targets = {}
+        self.authorities = {}
+        self.main_activities = []
+        if apk is None:
+            return
+        manifest_xml = apk.get_android_manifest_xml()
+        self.package = manifest_xml.get("package")
+        application = manifest_xml.find("application")
+        if application is None:
+            return
+        application_name = application.get(f"{ANDROID_NAMESPACE}name")
+        if application_name:
+            self.application = self._get_smali_name(application_name)
+        for kind in COMPONENT_KINDS:
+            for component in application.findall(kind):
+                self._index_component(apk, kind, component)
+        for provider in application.findall("provider"):
+            name = provider.get(f"{ANDROID_NAMESPACE}name")
+            authority = provider.get(f"{ANDROID_NAMESPACE}authorities")
+            if name and authority:
+                self.authorities[self._get_smali_name(name)] = authority
+
+    def _get_smali_name(self, name: str) -> str:
+        """
+        Converts the name of a component to smali, prefixing the names
+        relative to the package.
+
+        Args:
+            name (str): Name of the component in the manifest.
+
+        Returns:
+            str: Smali name of the component, without `;`.
+        """
+        if name.startswith("."):
+            name = self.package + name
+        elif "." not in name:
+            name = self.package + "." + name
+        return "L" + name.replace(".", "/")
+
+    def _index_component(self, apk, kind: str, component):
+        """
+        Indexes a component and the actions of its intent filters.
+
+        Args:
+            apk: Androguard APK object, used to resolve resource values.
+            kind (str): Tag of the component, e.g. `activity`.
+            component: Manifest element of the component.
+
+        Returns:
+            None
+        """
+        name = component.get(f"{ANDROID_NAMESPACE}name")
+        if not name:
+            return
+        smali_name = self._get_smali_name(name)
+        actions = []
+        categories = []
+        for intent_filter in component.findall(".//intent-filter"):
+            for values, tag in [(actions, "action"), (categories, "category")]:
+                for item in intent_filter.findall(tag):
+                    value = item.get(f"{ANDROID_NAMESPACE}name")
+                    if value and value.startswith("@"):
+                        value = apk.get_res_value(value)
+                    if value and value not in values:
+                        values.append(value)
+        info = self.components.get(smali_name)
+        aliases = [] if info is None else info.aliases
+        self.components[smali_name] = ComponentInfo(
+            kind,
+            component.get(f"{ANDROID_NAMESPACE}exported") == "true",
+            component.get(f"{ANDROID_NAMESPACE}permission"),
+            aliases,
+            tuple(actions),
+            tuple(categories),
+        )
+        for action in actions:
+            self.actions.setdefault(action, []).append(smali_name)
+        if kind == "activity-alias":
+            target = component.get(f"{ANDROID_NAMESPACE}targetActivity")
+            if target:
+                target = self._get_smali_name(target)
+                self.alias_targets[smali_name] = target
+                if target in self.components:
+                    self.components[target].aliases.append(smali_name)
+        if (
+            kind in ["activity", "activity-alias"]
+            and component.get(f"{ANDROID_NAMESPACE}enabled") != "false"
+            and MAIN_ACTION in actions
+            and LAUNCHER_CATEGORY in categories
+        ):
+            self.main_activities.append(smali_name)
+
+    def is_exported(self, component: str) -> bool:
+        """
+        Checks whether a component is exported without permission.
+
+        Args:
+            component (str): Smali name of the component, without `;`.
+
+        Returns:
+            bool: True if exported, False otherwise.
+        """
+        info = self.components.get(component)
+        return info is not None and info.exported and not info.permission
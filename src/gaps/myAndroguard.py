@@ -1,63 +1,17 @@
-from androguard.decompiler import decompiler
 from androguard.core.bytecodes.apk import APK
 from androguard.core.bytecodes.dvm import DalvikVMFormat
 from androguard.core.analysis.analysis import (
     Analysis,
     ClassAnalysis,
+    MethodAnalysis,
     ExternalClass,
     REF_TYPE,
 )
-from enum import IntEnum
 from collections import deque, defaultdict
 from concurrent.futures import ThreadPoolExecutor, as_completed
 
 
-class Operand(IntEnum):
-    """
-    Enumeration used for the operand type of opcodes
-    """
-
-    REGISTER = 0
-    LITERAL = 1
-    RAW = 2
-    OFFSET = 3
-    KIND = 0x100
-
-
-class Kind(IntEnum):
-    """
-    This Enum is used to determine the kind of argument
-    inside an Dalvik instruction.
-
-    It is used to reference the actual item instead of the refernece index
-    from the :class:`ClassManager` when disassembling the bytecode.
-    """
-
-    # Indicates a method reference
-    METH = 0
-    # Indicates that opcode argument is a string index
-    STRING = 1
-    # Indicates a field reference
-    FIELD = 2
-    # Indicates a type reference
-    TYPE = 3
-    # indicates a prototype reference
-    PROTO = 9
-    # indicates method reference and proto reference (invoke-polymorphic)
-    METH_PROTO = 10
-    # indicates call site item
-    CALL_SITE = 11
-
-    VARIES = 4
-    # inline lined stuff
-    INLINE_METHOD = 5
-    # static linked stuff
-    VTABLE_OFFSET = 6
-    FIELD_OFFSET = 7
-    RAW_STRING = 8
-
-
-def AnalyzeAPK(_file, raw=False):
+def AnalyzeAPK(_file, raw=False, analyze_dex=True, skip_class=None):
     """
     Analyze an android application and setup all stuff for a more quickly
     analysis!
@@ -70,20 +24,127 @@ def AnalyzeAPK(_file, raw=False):
     :param _file: the filename of the android application or a buffer which represents the application
     :type _file: string (for filename) or bytes (for raw)
     :param raw: boolean if raw bytes are supplied instead of a filename
+    :param analyze_dex: boolean if the DEX files must be analyzed, otherwise only the APK is parsed and no Analysis object is returned
+    :param skip_class: function telling whether the methods of a class must not be analyzed
     :rtype: return the :class:`~androguard.core.apk.APK`, list of :class:`~androguard.core.dvm.DEX`, and :class:`~androguard.core.analysis.analysis.Analysis` objects
     """
     a = APK(_file, raw=raw)
-    dx = myAnalysis()
+    if not analyze_dex:
+        return a, None
+    return a, AnalyzeAPKDex(a, skip_class)
+
+
+def AnalyzeAPKDex(a, skip_class=None):
+    """
+    Analyze all the DEX files of an already parsed android application.
+
+    :param a: the :class:`~androguard.core.apk.APK` object
+    :param skip_class: function telling whether the methods of a class must not be analyzed
+    :rtype: return the :class:`~androguard.core.analysis.analysis.Analysis` object
+    """
+    dx = myAnalysis(skip_class=skip_class)
     for dex_bytes in a.get_all_dex():
         df = DalvikVMFormat(dex_bytes, using_api=a.get_target_sdk_version())
         dx.add(df)
 
     # dx.create_xref()
 
-    return a, dx
+    return dx
+
+
+def AnalyzeDexBytes(dex_bytes, using_api=None, skip_class=None):
+    """
+    Analyze a single DEX file of an android application, without creating
+    the crossreferences.
+
+    :param dex_bytes: the content of the DEX file
+    :param using_api: the target SDK version of the application
+    :param skip_class: function telling whether the methods of a class must not be analyzed
+    :rtype: return the :class:`~androguard.core.analysis.analysis.Analysis` object
+    """
+    dx = myAnalysis(skip_class=skip_class)
+    dx.add(DalvikVMFormat(dex_bytes, using_api=using_api))
+
+    return dx
+
+
+def AnalyzeDex(_file, skip_class=None):
+    """
+    Analyze an android dex file, without creating the crossreferences.
+
+    :param _file: the filename of the android dex file
+    :param skip_class: function telling whether the methods of a class must not be analyzed
+    :rtype: return the :class:`~androguard.core.dvm.DEX` and :class:`~androguard.core.analysis.analysis.Analysis` objects
+    """
+    with open(_file, "rb") as dex_file:
+        df = DalvikVMFormat(dex_file.read())
+    dx = myAnalysis(skip_class=skip_class)
+    dx.add(df)
+
+    return df, dx
+
+
+class AnalyzedClasses:
+    """
+    View of a DalvikVMFormat whose classes are only the ones to analyze.
+    """
+
+    def __init__(self, vm, skip_class):
+        """
+        :param vm: the :class:`dvm.DalvikVMFormat` to filter
+        :param skip_class: function telling, from its descriptor, whether the methods of a class must not be analyzed
+        """
+        self.vm = vm
+        self.skip_class = skip_class
+
+    def get_classes(self):
+        return [
+            current_class
+            for current_class in self.vm.get_classes()
+            if not self.skip_class(str(current_class.get_name()))
+        ]
+
+    def __getattr__(self, name):
+        return getattr(self.vm, name)
 
 
 class myAnalysis(Analysis):
+    def __init__(self, vm=None, skip_class=None):
+        """
+        :param skip_class: function telling, from its descriptor, whether the methods of a class must not be analyzed
+        """
+        self.skip_class = skip_class
+        super().__init__(vm)
+
+    def add(self, vm):
+        """
+        Add a DalvikVMFormat to this Analysis.
+
+        Classes selected by `skip_class` still get their ClassAnalysis,
+        needed to resolve class hierarchies, but no MethodAnalysis is built
+        for their methods, which avoids building their basic blocks.
+        Analysis.add only sees the other classes, and the classes keep the
+        order of the DEX file.
+
+        :param androguard.core.bytecodes.dvm.DalvikVMFormat vm: :class:`dvm.DalvikVMFormat` to add to this Analysis
+        """
+        if self.skip_class is None:
+            super().add(vm)
+            return
+        skipped_classes = []
+        for current_class in vm.get_classes():
+            class_name = current_class.get_name()
+            # reserve the position of the class
+            self.classes.setdefault(class_name, None)
+            if self.skip_class(str(class_name)):
+                skipped_classes.append(current_class)
+        super().add(AnalyzedClasses(vm, self.skip_class))
+        self.vms[-1] = vm
+        for current_class in skipped_classes:
+            self.classes[current_class.get_name()] = ClassAnalysis(
+                current_class
+            )
+
     def create_xref(self) -> None:
         """
         Create Method crossreferences
@@ -164,98 +225,3 @@ class myAnalysis(Analysis):
                     oth_cls.add_xref_from(
                         REF_TYPE(op_value), cur_cls, cur_meth, off
                     )
-
-
-def _get_operands(operands):
-    """
-    Return strings with color coded operands
-    """
-    for operand in operands:
-        if operand[0] == Operand.REGISTER:
-            yield "v{}".format(operand[1])
-
-        elif operand[0] == Operand.LITERAL:
-            yield "{}".format(operand[1])
-
-        elif operand[0] == Operand.RAW:
-            yield "{}".format(operand[1])
-
-        elif operand[0] == Operand.OFFSET:
-            yield "%d" % (operand[1])
-
-        elif operand[0] & Operand.KIND:
-            if operand[0] == (Operand.KIND + Kind.STRING):
-                yield "{}".format(operand[2])
-            elif operand[0] == (Operand.KIND + Kind.METH):
-                yield "{}".format(operand[2])
-            elif operand[0] == (Operand.KIND + Kind.FIELD):
-                yield "{}".format(operand[2])
-            elif operand[0] == (Operand.KIND + Kind.TYPE):
-                yield "{}".format(operand[2])
-            else:
-                yield "{}".format(repr(operands[2]))
-        else:
-            yield "{}".format(repr(operands[1]))
-
-
-def get_whole_method(basic_blocks):
-    """
-    Extract the whole method body from basic blocks.
-
-    Args:
-        basic_blocks: List of basic blocks.
-
-    Returns:
-        list: List of strings representing the method body.
-    """
-    idx = 0
-    body = deque()
-    for nb, i in enumerate(basic_blocks):
-        header = "label: {}".format(i.get_name())
-        body.append(header)
-        instructions = list(i.get_instructions())
-        for ins in instructions:
-            content = ""
-            content += "%s" % (ins.get_name())
-
-            operands = ins.get_operands()
-            content += " %s" % ", ".join(_get_operands(operands))
-
-            op_value = ins.get_op_value()
-            if ins == instructions[-1] and i.childs:
-                # packed/sparse-switch
-                if (op_value == 0x2B or op_value == 0x2C) and len(
-                    i.childs
-                ) > 1:
-                    values = i.get_special_ins(idx).get_values()
-                    content += "[ D:%s " % (i.childs[0][2].get_name())
-                    content += (
-                        " ".join(
-                            "%d:%s"
-                            % (values[j], i.childs[j + 1][2].get_name())
-                            for j in range(0, len(i.childs) - 1)
-                        )
-                        + " ]"
-                    )
-                else:
-                    if len(i.childs) == 2:
-                        content += "[ {} ".format(
-                            i.childs[0][2].get_name(),
-                        )
-                        content += (
-                            " ".join(
-                                "%s" % c[2].get_name() for c in i.childs[1:]
-                            )
-                            + " ]"
-                        )
-                    else:
-                        content += (
-                            "[ "
-                            + " ".join(
-                                "%s" % c[2].get_name() for c in i.childs
-                            )
-                            + " ]"
-                        )
-            body.append(content)
-            idx += ins.get_length()
-    return body
@@ -0,0 +1,77 @@
+###############################################################################
+# CODE
+###############################################################################
+
+
+class _Node:
+    __slots__ = ("children", "partials", "terminal")
+
+    def __init__(self):
+        self.children = {}
+        self.partials = []
+        self.terminal = False
+
+
+class PrefixMatcher:
+    """
+    Matches class descriptors against package prefixes, using a trie over
+    the `/`-separated segments of the prefixes.
+
+    A prefix ending with `/` matches all the classes of the package and of
+    its subpackages. Otherwise its last segment only has to start the
+    corresponding segment of the descriptor, so that `Lorg/xml` also
+    matches `Lorg/xmlpull/v1/XmlPullParser;`. Arrays match as their
+    element type.
+    """
+
+    __slots__ = ("root",)
+
+    def __init__(self, prefixes=()):
+        self.root = _Node()
+        for prefix in prefixes:
+            self.add(prefix)
+
+    def add(self, prefix: str):
+        """
+        Adds a package prefix.
+
+        Args:
+            prefix (str): Package prefix, e.g. `Landroid/`.
+
+        Returns:
+            None
+        """
+        segments = prefix.split("/")
+        node = self.root
+        for segment in segments[:-1]:
+            node = node.children.setdefault(segment, _Node())
+        if segments[-1]:
+            node.partials.append(segments[-1])
+        else:
+            node.terminal = True
+
+    def match(self, descriptor: str) -> bool:
+        """
+        Checks whether a class descriptor starts with one of the prefixes.
+
+        Args:
+            descriptor (str): Class descriptor, e.g. `Landroid/app/Activity;`.
+
+        Returns:
+            bool: True if the descriptor matches a prefix, False otherwise.
+        """
+        if descriptor[:1] == "[":
+            descriptor = descriptor[1:]
+        segments = descriptor.split("/")
+        node = self.root
+        for depth, segment in enumerate(segments):
+            if node.terminal:
+                return True
+            for partial in node.partials:
+                if segment.startswith(partial):
+                    return True
+            # the last segment is the class name
+            if depth == len(segments) - 1 or segment not in node.children:
+                return False
+            node = node.children[segment]
+        return False
@@ -1,19 +1,18 @@
 import re
-import subprocess
 import sys
 import logging
-import networkx as nx
-import matplotlib.pyplot as plt
 import time
-from collections import deque, defaultdict
+from collections import deque, defaultdict, namedtuple
 from itertools import groupby
 
 from . import method_utils
+from . import dalvik_disassembler
 from . import conditional_path_generation
 from . import icc_analysis
 from . import ui_id_finder
 from . import data_flow_analysis
-from . import dalvik_disassembler
+from .call_graph import UNREACHABLE
+from .path_graph import PathGraph
 
 ###############################################################################
 # LOGGING
@@ -21,6 +20,19 @@ from . import dalvik_disassembler
 
 LOG = logging.getLogger("gaps")
 
+###############################################################################
+# GLOBALS
+###############################################################################
+
+MAX_PATH_LENGTH = 50
+
+MAX_ALTERNATIVE_PATHS = 5
+
+# instruction of a path going back from a target, pointing to the previous
+# one so that alternative paths share their prefix; visited is the bitset
+# of the instructions in the path, by position in the method
+PathNode = namedtuple("PathNode", ["offset", "parent", "visited", "length"])
+
 ###############################################################################
 # CODE
 ###############################################################################
@@ -252,14 +264,7 @@ def _find_extra_starting_points_in_class_hierarchy(
             rest_of_signature in gaps.all_methods
             and method_signature not in gaps.all_methods[rest_of_signature]
         ):
-            class_hierarchy = get_root_class_hierarchy(class_name, gaps)[
-                :-1
-            ] + _get_class_interfaces(class_name, gaps)
-            true_parent = _is_true_parent(
-                target_class,
-                class_hierarchy,
-            )
-            if true_parent:
+            if gaps.class_hierarchy.is_subtype(class_name, target_class):
                 to_add = list(methods_dict[class_name])
                 extra_starting_points[method_signature.split()[1]].update(
                     to_add
@@ -283,28 +288,6 @@ def _find_extra_starting_points_in_class_hierarchy(
         )
 
 
-def _is_true_parent(
-    candidate_parent: str,
-    class_hierarchy: list,
-) -> bool:
-    """
-    Checks if a class is a true parent.
-
-    Args:
-        candidate_parent: The candidate parent class.
-        class_hierarchy: The hierarchy of classes.
-        classes: Dictionary containing classes.
-        rest_of_signature: Rest of the method signature.
-        gaps: Object containing information about the gaps.
-
-    Returns:
-        bool: True if the class is a true parent, False otherwise.
-    """
-    if candidate_parent in class_hierarchy:
-        return True
-    return False
-
-
 def _breadth_first_search_graph(
     gaps,
     starting_points: set,
@@ -325,98 +308,179 @@ def _breadth_first_search_graph(
     """
     list_paths = deque()
     for source_node in starting_points:
+        # exact call sites of methods and fields, any other string is
+        # searched in the instructions of the methods
+        call_sites = gaps.call_sites.get(source_node)
         for method_index in starting_points[source_node]:
-            method = gaps.method_objs[method_index]
-            graph, translate = dalvik_disassembler.basic_blocks_2_graph(
-                gaps, method
+            graph, translate = dalvik_disassembler.get_method_graph(
+                gaps, method_index
             )
-
-            for addr in translate:
-                if source_node in translate[addr] and addr != -1:
-                    list_paths.extend(
-                        _graph_visit(graph, translate, addr, explore)
-                    )
+            if call_sites is not None:
+                addresses = call_sites.get(method_index, ())
+            else:
+                addresses = [
+                    addr
+                    for addr in translate
+                    if addr != -1 and source_node in translate[addr]
+                ]
+            if not addresses:
+                continue
+            distances = dalvik_disassembler.get_entry_distances(
+                gaps, method_index
+            )
+            for addr in addresses:
+                list_paths.extend(
+                    _graph_visit(graph, translate, addr, explore, distances)
+                )
     if search:
         gaps.search_list[search] = list_paths
     return list_paths
 
 
-def _graph_visit(graph, translate: dict, source_node: list, explore: bool):
+def get_instruction_paths(gaps, method_index: int, offset: int) -> list:
     """
-    Visits nodes in a graph.
+    Finds the paths going back from an indexed instruction, as the search
+    of the instruction finds them.
 
     Args:
-        graph: The graph.
-        translate: Translated nodes.
-        source_node: Source node.
-        explore: Whether to explore paths.
+        gaps: Object containing information about gaps.
+        method_index (int): Index of the method of the instruction.
+        offset (int): Offset of the instruction.
 
     Returns:
-        list: List of visited nodes.
+        list: Paths from the instruction, each ending with the method name.
     """
-    set_paths = set()
-    max_alternative_paths = 1
-    if explore:
-        max_alternative_paths = 5
-    max_path_len = 50
-    dict_paths = {}
-    paths = deque()
-    code_paths = deque()
-    destination = source_node
-    # new path created
-    paths.append([destination])
-    code_paths.append([translate[destination]])
-    complete = False
-    while not complete:
-        main_path = False
-        while destination in graph:
-            list_destinations = list(graph[destination])
-            # look for alternative paths
-            main_path = False
-            if max_alternative_paths > 0:
-                main_path_copy = paths[0].copy()
-                code_path_copy = code_paths[0].copy()
-            for i in range(len(list_destinations)):
-                if list_destinations[i] in paths[0]:
-                    continue
-                if not main_path:
-                    destination = list_destinations[0]
-                    paths[0].append(destination)
-                    instr = translate[destination]
-                    code_paths[0].append(instr)
-                    main_path = True
-                elif max_alternative_paths > 0:
-                    max_alternative_paths -= 1
-                    new_path = main_path_copy.copy()
-                    new_path.append(list_destinations[i])
-                    paths.append(new_path)
-                    new_code_paths = code_path_copy.copy()
-                    instr = translate[list_destinations[i]]
-                    new_code_paths.append(instr)
-                    code_paths.append(new_code_paths)
-            if (len(code_paths[0]) > max_path_len) or not main_path:
+    graph, translate = dalvik_disassembler.get_method_graph(gaps, method_index)
+    distances = dalvik_disassembler.get_entry_distances(gaps, method_index)
+    return _graph_visit(graph, translate, offset, False, distances)
+
+
+def _graph_visit(
+    graph, translate, source_node: int, explore: bool, distances: dict
+) -> list:
+    """
+    Finds the paths going back from an instruction to the deepest
+    instruction of its method, i.e. the entry when reachable.
+
+    Args:
+        graph: Predecessors of the instructions of the method.
+        translate: Translation from offsets to instructions.
+        source_node (int): Offset of the instruction.
+        explore (bool): Whether to look for alternative paths.
+        distances (dict): Distances of the instructions from the entry.
+
+    Returns:
+        list: Paths from the instruction, each ending with the method name.
+    """
+    if source_node not in distances:
+        # e.g. exception handlers, which have no edges from the entry
+        distances = graph.get_entry_distances(
+            _get_deepest_instruction(graph, source_node)
+        )
+    paths = _walk_back(graph, translate, source_node, explore, distances)
+    return list(dict.fromkeys(paths))
+
+
+def _walk_back(
+    graph, translate, source_node: int, explore: bool, distances: dict
+):
+    """
+    Lazily yields the paths going back from an instruction.
+
+    The first path follows at each step the predecessor closest to the
+    entry, so that it reaches the deepest instruction without enumerating
+    the others. When exploring, the other predecessors reaching the entry
+    start up to `MAX_ALTERNATIVE_PATHS` alternatives, which are yielded
+    when they end where the first path does.
+
+    Args:
+        graph: Predecessors of the instructions of the method.
+        translate: Translation from offsets to instructions.
+        source_node (int): Offset of the instruction.
+        explore (bool): Whether to look for alternative paths.
+        distances (dict): Distances of the instructions from the entry.
+
+    Yields:
+        tuple: Instructions of the path, ending with the method name.
+    """
+    base = next(iter(translate.instructions))
+    alternatives = MAX_ALTERNATIVE_PATHS if explore else 0
+    pending = deque([_extend_path(None, source_node, base)])
+    end = None
+    while pending:
+        node = pending.popleft()
+        while node.length <= MAX_PATH_LENGTH and distances.get(node.offset):
+            predecessors = [
+                predecessor
+                for predecessor in graph.get(node.offset, ())
+                if not node.visited >> ((predecessor - base) >> 1) & 1
+            ]
+            if not predecessors:
                 break
-        code_paths[0].append(translate[-1])
-        if destination not in dict_paths:
-            dict_paths[destination] = set()
-        dict_paths[destination].add(tuple(code_paths[0]))
-        code_paths.popleft()
-        paths.popleft()
-        # if there are other copied paths to explore
-        if len(paths) > 0:
-            destination = paths[0][len(paths[0]) - 1]
-        else:
-            complete = True
-    deepest = sys.maxsize
-    for distance in dict_paths:
-        if deepest > distance:
-            deepest = distance
-    if deepest != sys.maxsize:
-        if not explore:
-            set_paths.add(list(dict_paths[deepest])[0])
-        else:
-            set_paths = set_paths | dict_paths[deepest]
-    return list(set_paths)
+            closest = min(
+                predecessors,
+                key=lambda predecessor: distances.get(
+                    predecessor, sys.maxsize
+                ),
+            )
+            for predecessor in predecessors:
+                if alternatives == 0:
+                    break
+                if predecessor != closest and predecessor in distances:
+                    alternatives -= 1
+                    pending.append(_extend_path(node, predecessor, base))
+            node = _extend_path(node, closest, base)
+        if end is None:
+            end = node.offset
+        elif node.offset != end:
+            continue
+        code_path = [translate[-1]]
+        while node is not None:
+            code_path.append(translate[node.offset])
+            node = node.parent
+        code_path.reverse()
+        yield tuple(code_path)
+
+
+def _get_deepest_instruction(graph, source_node: int) -> int:
+    """
+    Finds the instruction with the lowest offset among the ones from which
+    an instruction is reachable.
+
+    Args:
+        graph: Predecessors of the instructions of the method.
+        source_node (int): Offset of the instruction.
+
+    Returns:
+        int: Offset of the deepest instruction.
+    """
+    reachable = {source_node}
+    queue = deque([source_node])
+    while queue:
+        for predecessor in graph.get(queue.popleft(), ()):
+            if predecessor not in reachable:
+                reachable.add(predecessor)
+                queue.append(predecessor)
+    return min(reachable)
+
+
+def _extend_path(parent: PathNode, offset: int, base: int) -> PathNode:
+    """
+    Extends a path with an instruction.
+
+    Args:
+        parent (PathNode): Last instruction of the path, None for a new
+            path.
+        offset (int): Offset of the instruction.
+        base (int): Offset of the first instruction of the method.
+
+    Returns:
+        PathNode: New last instruction of the path.
+    """
+    bit = 1 << ((offset - base) >> 1)
+    if parent is None:
+        return PathNode(offset, None, bit, 1)
+    return PathNode(offset, parent, parent.visited | bit, parent.length + 1)
 
 
 def get_reflection_calls(gaps):
@@ -594,7 +658,7 @@ def _add_to_set_paths(set_paths: set, paths_to_add: tuple):
 
 def add_new_nodes(
     to_add: list,
-    graph: nx.DiGraph,
+    graph: PathGraph,
     previous_node: list,
     analyzed_nodes,
     nodes_queue,
@@ -604,7 +668,7 @@ def add_new_nodes(
 
     Args:
         to_add (list): Nodes to add.
-        graph (nx.DiGraph): The graph.
+        graph (PathGraph): The graph.
         gaps: Object containing information about gaps.
         previous_node (list): The previous node.
 
@@ -1311,22 +1375,7 @@ def _get_class_interfaces(class_name: str, gaps) -> list:
     Returns:
         list: Interfaces implemented by the class.
     """
-    search_tag = "ci- " + class_name
-    if search_tag in gaps.search_list:
-        return gaps.search_list[search_tag]
-    interfaces = []
-    classes = get_root_class_hierarchy(class_name, gaps)
-    classes.insert(0, class_name)
-    for clazz in classes:
-        class_analysis = _get_class_analysis(gaps, clazz + ";")
-        if class_analysis:
-            if len(class_analysis.implements) > 0:
-                for interface in class_analysis.implements:
-                    interfaces.append(str(interface).replace(";", ""))
-                    if str(interface).startswith("Landroid"):
-                        continue
-    gaps.search_list[search_tag] = interfaces
-    return interfaces
+    return gaps.class_hierarchy.get_interfaces(class_name)
 
 
 def get_root_class_hierarchy(class_name: str, gaps) -> list:
@@ -1340,32 +1389,7 @@ def get_root_class_hierarchy(class_name: str, gaps) -> list:
     Returns:
         list: Root class hierarchy of the class.
     """
-    if class_name in gaps.search_list:
-        return gaps.search_list[class_name]
-    super_class = class_name + ";"
-    search_tag = "rc- " + super_class
-    if search_tag in gaps.search_list:
-        return gaps.search_list[search_tag]
-    res = []
-    roots = [
-        "Landroid/.*",
-        "Landroidx/.*",
-        "Ljava/.*",
-    ]
-    combined = "(" + ")|(".join(roots) + ")"
-    while True:
-        class_analysis = _get_class_analysis(gaps, super_class)
-        new_super_class = super_class
-        if class_analysis:
-            new_super_class = str(class_analysis.extends)
-        if super_class == new_super_class:
-            break
-        super_class = new_super_class
-        res.append(super_class.replace(";", ""))
-        if re.match(combined, super_class):
-            break
-    gaps.search_list[search_tag] = res
-    return res
+    return gaps.class_hierarchy.get_super_classes(class_name)
 
 
 def _get_fragment_paths(class_name: str, gaps) -> list:
@@ -1429,120 +1453,62 @@ def _find_fragment_paths(class_name, gaps):
 
     # check static
     java_class_name = class_name[1:].replace("/", ".")
-    grep = subprocess.Popen(
-        f'grep -r "<fragment.*android:name=\\"{java_class_name}\\"" "{gaps.tmp_path}/res"',
-        shell=True,
-        stdout=subprocess.PIPE,
-    )
-    output_grep = grep.communicate()[0].decode("utf-8").split("\n")
-    for output in output_grep:
-        if output.strip():
-            activity_id = output.split(".xml")[0].split("/")[-1]
-            if "/navigation/" in output:
-                grep_2 = subprocess.Popen(
-                    f'grep -r "app:navGraph=\\"@navigation/{activity_id}\\"" "{gaps.tmp_path}/res"',
-                    shell=True,
-                    stdout=subprocess.PIPE,
-                )
-                output_grep_2 = (
-                    grep_2.communicate()[0].decode("utf-8").split("\n")
-                )
-                for output_2 in output_grep_2:
-                    if output_2.strip():
-                        activity_id = output_2.split(".xml")[0].split("/")[-1]
-                        break
-
-                public_xml_path = gaps.tmp_path + "/res/values/public.xml"
-                activity_hex_id = ui_id_finder.get_value_from_xml(
-                    public_xml_path, "id", activity_id
+    for resource in gaps.resources.fragments.get(java_class_name, ()):
+        resource_dir, activity_id = resource.split("/")
+        if resource_dir == "navigation":
+            for host in gaps.resources.nav_graph_hosts.get(activity_id, ()):
+                activity_id = host.split("/")[1]
+                break
+
+            activity_hex_id = gaps.resources.public_ids.get(activity_id)
+            if activity_hex_id:
+                activity_int_id = str(int(activity_hex_id, 16))
+                init_layout = find_path_smali(
+                    "inflate",
+                    gaps,
+                    target_class="Landroidx/navigation/NavInflater",
+                    consider_hierarchy=False,
                 )
-                if activity_hex_id:
-                    activity_int_id = str(int(activity_hex_id, 16))
-                    init_layout = find_path_smali(
-                        "inflate",
-                        gaps,
-                        target_class="Landroidx/navigation/NavInflater",
-                        consider_hierarchy=False,
+                for init_layout_path in init_layout:
+                    parameters = data_flow_analysis.points_to_analysis(
+                        init_layout_path, 0, gaps, ignore_caller=True
                     )
-                    for init_layout_path in init_layout:
-                        parameters = data_flow_analysis.points_to_analysis(
-                            init_layout_path, 0, gaps, ignore_caller=True
+                    for path_dfa in parameters:
+                        for reg in parameters[path_dfa]:
+                            if "instruction" in parameters[path_dfa][reg]:
+                                parameter = parameters[path_dfa][reg][
+                                    "instruction"
+                                ]
+                                if (
+                                    activity_int_id in parameter
+                                    or activity_id in parameter
+                                ):
+                                    res.append(path_dfa)
+                                    return res
+        else:
+            # classes loading the id of the layout declaring the fragment
+            layout_id = gaps.resource_ids.get_id("R$layout", activity_id)
+            if layout_id is None:
+                layout_id = gaps.resources.public_ids.get(activity_id)
+            if layout_id is None:
+                continue
+            for method_index in sorted(
+                gaps.const_users.get(int(layout_id, 16), ())
+            ):
+                _, parent_method, _ = gaps.method_graphs[method_index]
+                activity = parent_method.split()[1].split(";->")[0]
+                if "R$layout" not in activity:
+                    res.append(
+                        tuple(
+                            [
+                                f"> {activity};->onCreate(Landroid/os/Bundle;)V <"
+                            ]
                         )
-                        for path_dfa in parameters:
-                            for reg in parameters[path_dfa]:
-                                if "instruction" in parameters[path_dfa][reg]:
-                                    parameter = parameters[path_dfa][reg][
-                                        "instruction"
-                                    ]
-                                    if (
-                                        activity_int_id in parameter
-                                        or activity_id in parameter
-                                    ):
-                                        res.append(path_dfa)
-                                        return res
-            else:
-                grep_3 = subprocess.Popen(
-                    f'grep -r "{activity_id}" "{gaps.tmp_path}"',
-                    shell=True,
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.DEVNULL,
-                )
-                output_grep_3 = (
-                    grep_3.communicate()[0].decode("utf-8").split("\n")
-                )
-                activity_hex_id = None
-                for output_3 in output_grep_3:
-                    if output_3.strip() and ".smali" in output_3:
-                        activity = output_3.strip().split(".smali")[0]
-                        activity = activity.split(gaps.tmp_path)[1]
-                        activity = "L" + "/".join(activity.split("/")[2:])
-                        if "R$layout" not in activity:
-                            res.append(
-                                tuple(
-                                    [
-                                        f"> {activity};->onCreate(Landroid/os/Bundle;)V <"
-                                    ]
-                                )
-                            )
-                            return res
-                        elif not activity_hex_id:
-                            activity_hex_id = output_3.split()[-1]
-                            grep_4 = subprocess.Popen(
-                                f'grep -r "{activity_hex_id}" "{gaps.tmp_path}"',
-                                shell=True,
-                                stdout=subprocess.PIPE,
-                                stderr=subprocess.DEVNULL,
-                            )
-                            output_grep_4 = (
-                                grep_4.communicate()[0]
-                                .decode("utf-8")
-                                .split("\n")
-                            )
-                            for output_4 in output_grep_4:
-                                if output_4.strip() and ".smali" in output_4:
-                                    output_grep_3.insert(0, output_4)
+                    )
+                    return res
     return res
 
 
-def _get_class_analysis(gaps, class_name: str):
-    """
-    Retrieves analysis information related to a specific class.
-
-    Args:
-        gaps: Gap analysis object containing required data.
-        class_name (str): Name of the class.
-
-    Returns:
-        Analysis information related to the class.
-    """
-    search_tag = "ca- " + class_name
-    if search_tag in gaps.search_list:
-        return gaps.search_list[search_tag]
-    ca_obj = gaps.classes.get(class_name)
-    gaps.search_list[search_tag] = ca_obj
-    return ca_obj
-
-
 def build_paths(
     partial_paths: list,
     gaps,
@@ -1567,7 +1533,7 @@ def build_paths(
     n_paths = 0
     # start from the paths found initially
     for partial_path in partial_paths:
-        graph = nx.DiGraph()
+        graph = PathGraph()
         analyzed_nodes = set()
         nodes_queue = deque()
         nodes_queue.append(partial_path)
@@ -1582,6 +1548,11 @@ def build_paths(
                 return list(set_paths)
             # get the last instruction's class
             new_nodes = _find_next_paths(current_node, gaps, entry_points)
+            # extend first the paths closest to an entry point, so that when
+            # the budget is met the paths kept are not the first ones found
+            new_nodes = sorted(
+                new_nodes, key=lambda node: _get_expansion_rank(node, gaps)
+            )
             # add any additional paths found to alternative paths
             add_new_nodes(
                 new_nodes,
@@ -1595,7 +1566,7 @@ def build_paths(
                     graph,
                     source_node,
                     entry_points,
-                    max_paths,
+                    max_paths - n_paths,
                     conditional,
                     store_paths,
                     set_paths,
@@ -1608,7 +1579,7 @@ def build_paths(
                 graph,
                 source_node,
                 entry_points,
-                max_paths,
+                max_paths - n_paths,
                 conditional,
                 store_paths,
                 set_paths,
@@ -1616,94 +1587,131 @@ def build_paths(
                 gaps,
             )
         else:
-            leaves = set(
-                [
-                    node
-                    for node in graph.nodes()
-                    if graph.in_degree(node) != 0
-                    and graph.out_degree(node) == 0
-                ]
-            )
-            for leaf in leaves:
+            for leaf in set(graph.get_leaves()):
                 if gaps.loglevel == "debug" and conditional:
                     log_component_err(leaf, gaps)
 
     return list(set_paths)
 
 
-def _get_paths(
-    graph,
-    source_node,
-    entry_points,
-    max_paths,
-    conditional,
-    store_paths,
-    set_paths,
-    nodes_queue,
-    gaps,
-):
-    n_paths = 0
-    leaves = set(
-        [
-            node
-            for node in graph.nodes()
-            if graph.in_degree(node) != 0 and graph.out_degree(node) == 0
-        ]
-    )
-    for leaf in leaves:
-        if leaf in entry_points:
-            adding_paths = list(
-                all_shortest_paths(
-                    graph, source_node, leaf, max_paths // len(entry_points)
-                )
-            )
+def _get_expansion_rank(path: tuple, gaps) -> int:
+    """
+    Ranks a path by the distance of its method from the nearest entry point
+    in the call graph, the paths of the methods that no entry point reaches
+    being ranked last.
 
-            n_paths += process_paths(
-                adding_paths,
-                conditional,
-                store_paths,
-                set_paths,
-                gaps,
-            )
+    Args:
+        path (tuple): Path ending with the method name.
+        gaps: Gaps analysis object containing required data.
 
-            if n_paths > max_paths:
-                return n_paths
+    Returns:
+        int: Number of calls between components, 0 if the path does not end
+            with a method of the app, sys.maxsize if no entry point reaches
+            the method.
+    """
+    method_name = path[-1].split()
+    if len(method_name) < 2:
+        return 0
+    method_index = gaps.call_graph.get_method_index(method_name[1])
+    if method_index is None:
+        return 0
+    distance = gaps.call_graph.get_entry_distance(method_index)
+    if distance == UNREACHABLE:
+        return sys.maxsize
+    return distance
 
-            LOG.debug(f"\t[+] {n_paths} PATHS FOUND")
 
-        elif gaps.loglevel == "debug" and leaf not in nodes_queue:
-            log_component_err(leaf, gaps)
+def _get_paths(
+    graph: PathGraph,
+    source_node: tuple,
+    entry_points: set,
+    max_paths: int,
+    conditional: bool,
+    store_paths: bool,
+    set_paths: set,
+    nodes_queue: deque,
+    gaps,
+) -> int:
+    """
+    Processes the paths from the source of a graph to its entry points, in
+    order of length and with distinct call sequences, until the budget is
+    met.
 
-    if (
-        len(leaves) == 0
-        and gaps.loglevel == "debug"
-        and source_node not in nodes_queue
-    ):
-        log_component_err(source_node, gaps)
+    Args:
+        graph (PathGraph): Graph of the paths.
+        source_node (tuple): Source of the graph.
+        entry_points (set): Entry points found.
+        max_paths (int): Maximum number of paths to process.
+        conditional (bool): Flag indicating whether conditional paths should
+            be generated.
+        store_paths (bool): Flag indicating whether to store paths.
+        set_paths (set): Set of the stored paths.
+        nodes_queue (deque): Paths not extended yet.
+        gaps: Gaps analysis object containing required data.
+
+    Returns:
+        int: Number of paths processed.
+    """
+    n_paths = 0
+    leaves = graph.get_leaves()
+    targets = [leaf for leaf in leaves if leaf in entry_points]
+    if len(targets) > 0:
+        n_paths = process_paths(
+            graph.shortest_paths(
+                source_node,
+                targets,
+                label=_get_call_sequence,
+                max_per_target=gaps.max_paths_per_entry,
+            ),
+            max_paths,
+            conditional,
+            store_paths,
+            set_paths,
+            gaps,
+        )
+        LOG.debug(f"\t[+] {n_paths} PATHS FOUND")
+
+    if gaps.loglevel == "debug":
+        for leaf in leaves:
+            if leaf not in entry_points and leaf not in nodes_queue:
+                log_component_err(leaf, gaps)
+        if len(leaves) == 0 and source_node not in nodes_queue:
+            log_component_err(source_node, gaps)
     return n_paths
 
 
 def process_paths(
     simple_paths,
-    conditional,
-    store_paths,
-    set_paths,
+    max_paths: int,
+    conditional: bool,
+    store_paths: bool,
+    set_paths: set,
     gaps,
-):
+) -> int:
+    """
+    Processes paths as they are generated, stopping once the budget is
+    met.
+
+    Args:
+        simple_paths: Iterable of paths, each a list of partial paths.
+        max_paths (int): Maximum number of paths to process.
+        conditional (bool): Flag indicating whether conditional paths should
+            be generated.
+        store_paths (bool): Flag indicating whether to store paths.
+        set_paths (set): Set of the stored paths.
+        gaps: Gaps analysis object containing required data.
+
+    Returns:
+        int: Number of paths processed.
+    """
     n_paths = 0
-    call_sequences = set()
+    if max_paths <= 0:
+        return n_paths
+    seen_keys = set()
     for simple_path in simple_paths:
-        call_sequence = _get_call_sequence(simple_path)
-        imm_call_sequence = tuple(call_sequence)
-        if imm_call_sequence in call_sequences:
-            simple_paths.remove(simple_path)
-            continue
-        call_sequences.add(imm_call_sequence)
-    if conditional:
-        seen_keys = set()
-        for simple_path in simple_paths:
+        complete_paths = deque(simple_path)
+        if conditional:
             seen_solutions = set()
-            complete_paths = deque(simple_path)
             conditional_paths = conditional_path_generation.find_conditional(
                 simple_path, gaps
             )
@@ -1727,28 +1735,18 @@ def process_paths(
                                 seen_solutions.add(imm_solution)
                             if len(solutions) > 0:
                                 complete_paths.extend(solutions)
-            n_paths += len(complete_paths)
-            if gaps.loglevel == "verbose":
-                LOG.setLevel(logging.DEBUG)
-                print_paths(complete_paths)
-                LOG.setLevel(logging.INFO)
-            # add path to the set
-            if store_paths:
-                _add_to_set_paths(set_paths, complete_paths)
-            else:
-                generate_instructions([complete_paths], gaps)
-    else:
-        complete_paths = simple_paths
-        n_paths += len(complete_paths)
+        n_paths += 1
         if gaps.loglevel == "verbose":
             LOG.setLevel(logging.DEBUG)
-            print_paths(complete_paths)
+            print_paths([complete_paths])
             LOG.setLevel(logging.INFO)
         # add path to the set
         if store_paths:
-            _add_to_set_paths(set_paths, complete_paths)
+            _add_to_set_paths(set_paths, [complete_paths])
         else:
-            generate_instructions(complete_paths, gaps)
+            generate_instructions([complete_paths], gaps)
+        if n_paths >= max_paths:
+            break
     return n_paths
 
 
@@ -1765,178 +1763,23 @@ def log_component_err(node, gaps):
         gaps.logs += log
 
 
-def all_shortest_paths(
-    G, source, target, max_paths, weight=None, method="dijkstra"
-) -> list:
-    """
-    Calculates all shortest paths between a source and target node in a graph.
-
-    Args:
-        G: Graph object.
-        source: Source node.
-        target: Target node.
-        max_paths: Maximum number of paths to calculate.
-        weight (optional): Weight for calculating shortest paths. Defaults to None.
-        method (str, optional): Method for calculating shortest paths. Defaults to "dijkstra".
-
-    Returns:
-        list: List of all shortest paths.
-    """
-    method = "unweighted" if weight is None else method
-    if method == "unweighted":
-        pred = predecessor(G, source, target=target)
-    elif method == "dijkstra":
-        pred, dist = nx.dijkstra_predecessor_and_distance(
-            G, source, weight=weight
-        )
-    elif method == "bellman-ford":
-        pred, dist = nx.bellman_ford_predecessor_and_distance(
-            G, source, weight=weight
-        )
-    else:
-        raise ValueError(f"method not supported: {method}")
-
-    return _build_paths_from_predecessors({source}, target, pred, max_paths)
-
-
-def _build_paths_from_predecessors(sources, target, pred, max_paths):
-    """
-    Builds paths from predecessors in a graph.
-
-    Args:
-        sources: Source nodes.
-        target: Target node.
-        pred: Predecessor nodes.
-        max_paths: Maximum number of paths to generate.
-
-    Yields:
-        list: List of paths.
-    """
-    n_paths = 0
-    seen = {target}
-    stack = [[target, 0]]
-    top = 0
-    while top >= 0:
-        if n_paths > max_paths:
-            break
-        node, i = stack[top]
-        if node in sources:
-            n_paths += 1
-            yield [p for p, n in reversed(stack[: top + 1])]
-        if len(pred[node]) > i:
-            stack[top][1] = i + 1
-            next = pred[node][i]
-            if next in seen:
-                continue
-            else:
-                seen.add(next)
-            top += 1
-            if top == len(stack):
-                stack.append([next, 0])
-            else:
-                stack[top][:] = [next, 0]
-        else:
-            seen.discard(node)
-            top -= 1
-
-
-def predecessor(G, source, target=None, cutoff=None, return_seen=None):
-    """Returns dict of predecessors for the path from source to all nodes in G.
-
-    Parameters
-    ----------
-    G : NetworkX graph
-
-    source : node label
-       Starting node for path
-
-    target : node label, optional
-       Ending node for path. If provided only predecessors between
-       source and target are returned
-
-    cutoff : integer, optional
-        Depth to stop the search. Only paths of length <= cutoff are returned.
-
-    return_seen : bool, optional (default=None)
-        Whether to return a dictionary, keyed by node, of the level (number of
-        hops) to reach the node (as seen during breadth-first-search).
-
-    Returns
-    -------
-    pred : dictionary
-        Dictionary, keyed by node, of predecessors in the shortest path.
-
-
-    (pred, seen): tuple of dictionaries
-        If `return_seen` argument is set to `True`, then a tuple of dictionaries
-        is returned. The first element is the dictionary, keyed by node, of
-        predecessors in the shortest path. The second element is the dictionary,
-        keyed by node, of the level (number of hops) to reach the node (as seen
-        during breadth-first-search).
-
-    Examples
-    --------
-    >>> G = nx.path_graph(4)
-    >>> list(G)
-    [0, 1, 2, 3]
-    >>> nx.predecessor(G, 0)
-    {0: [], 1: [0], 2: [1], 3: [2]}
-    >>> nx.predecessor(G, 0, return_seen=True)
-    ({0: [], 1: [0], 2: [1], 3: [2]}, {0: 0, 1: 1, 2: 2, 3: 3})
-
-
-    """
-    if source not in G:
-        raise nx.NodeNotFound(f"Source {source} not in G")
-
-    level = 0  # the current level
-    nextlevel = [source]  # list of nodes to check at next level
-    seen = {source: level}  # level (number of hops) when seen in BFS
-    pred = {source: deque()}  # predecessor dictionary
-    while nextlevel:
-        level = level + 1
-        thislevel = nextlevel
-        nextlevel = deque()
-        for v in thislevel:
-            for w in G[v]:
-                if w not in seen:
-                    pred[w] = [v]
-                    seen[w] = level
-                    nextlevel.append(w)
-                elif seen[w] == level:  # add v to predecessor list if it
-                    pred[w].append(v)  # is at the correct level
-        if cutoff and cutoff <= level:
-            break
-        if target in seen:
-            break
-
-    if target is not None:
-        if return_seen:
-            if target not in pred:
-                return (deque(), -1)  # No predecessor
-            return (pred, seen[target])
-        else:
-            if target not in pred:
-                return deque()  # No predecessor
-            return pred
-    else:
-        if return_seen:
-            return (pred, seen)
-        else:
-            return pred
-
-
-def plot_graph(graph):
+def plot_graph(graph: PathGraph):
     """
     Plots a graph representation of the paths.
 
     Args:
-        graph: Graph object.
+        graph (PathGraph): Graph of the paths.
     """
+    import networkx as nx
+    import matplotlib.pyplot as plt
 
     plt.figure(figsize=(8, 6))
     nx.draw(
-        graph,
+        nx.DiGraph(
+            (graph.nodes[node_id], graph.nodes[successor_id])
+            for node_id, successors in enumerate(graph.successors)
+            for successor_id in successors
+        ),
         with_labels=True,
         node_size=10,
         node_color="black",
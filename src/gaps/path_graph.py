@@ -0,0 +1,240 @@
+from collections import deque
+from heapq import heappop, heappush
+from itertools import count
+
+###############################################################################
+# CODE
+###############################################################################
+
+
+class PathGraph:
+    """
+    Graph of the partial paths built back from a target, each path leading
+    to the paths extending it towards the entry points.
+
+    Paths are identified by integers, in insertion order, and the graph
+    keeps the successors of each of them in insertion order. The leaves,
+    i.e. the paths with predecessors and without successors, are tracked
+    as edges are added, so that they are not searched for.
+    """
+
+    __slots__ = ("nodes", "ids", "successors", "leaves")
+
+    def __init__(self):
+        self.nodes = []
+        self.ids = {}
+        self.successors = []
+        self.leaves = set()
+
+    def __len__(self) -> int:
+        return len(self.nodes)
+
+    def __contains__(self, node) -> bool:
+        return node in self.ids
+
+    def _add_node(self, node) -> tuple:
+        node_id = self.ids.get(node)
+        if node_id is not None:
+            return node_id, False
+        node_id = len(self.nodes)
+        self.ids[node] = node_id
+        self.nodes.append(node)
+        self.successors.append([])
+        return node_id, True
+
+    def add_edge(self, source, target):
+        """
+        Adds an edge between two paths, adding the paths if needed.
+
+        Args:
+            source: Path.
+            target: Path extending the source.
+
+        Returns:
+            None
+        """
+        source_id, _ = self._add_node(source)
+        target_id, new_target = self._add_node(target)
+        successors = self.successors[source_id]
+        if not new_target and target_id in successors:
+            return
+        successors.append(target_id)
+        self.leaves.discard(source_id)
+        if not self.successors[target_id]:
+            self.leaves.add(target_id)
+
+    def get_leaves(self) -> list:
+        """
+        Retrieves the paths with predecessors and without successors.
+
+        Returns:
+            list: Leaves, in insertion order.
+        """
+        return [self.nodes[node_id] for node_id in sorted(self.leaves)]
+
+    def _get_predecessors(self) -> list:
+        """
+        Finds the predecessors of each path.
+
+        Returns:
+            list: Ids of the predecessors of each path, by id.
+        """
+        predecessors = [[] for _ in self.nodes]
+        for node_id, successors in enumerate(self.successors):
+            for successor_id in successors:
+                predecessors[successor_id].append(node_id)
+        return predecessors
+
+    def _unwind(self, path: tuple) -> list:
+        """
+        Retrieves the paths of a path of the graph.
+
+        Args:
+            path (tuple): Id of the last path, followed by the same pair for
+                the path before it, None for the first one.
+
+        Returns:
+            list: Paths, from the first one.
+        """
+        nodes = []
+        while path is not None:
+            node_id, path = path
+            nodes.append(self.nodes[node_id])
+        nodes.reverse()
+        return nodes
+
+    def shortest_paths(
+        self,
+        source,
+        targets,
+        label=None,
+        max_per_target: int = None,
+    ):
+        """
+        Yields the paths from a path of the graph to any of the targets, in
+        order of length, lazily.
+
+        Partial paths are expanded best first, ordered by their length plus
+        the distance of their last path to the nearest target, so that
+        each path comes out of the queue in order of length and that only
+        the partial paths leading to the next one are expanded. The graph
+        is expected to be acyclic, as paths are only extended to paths not
+        extended yet.
+
+        When `label` is given, the paths whose labels chain into the same
+        sequence are duplicates and only the first one is yielded. Partial
+        paths are deduplicated as they are expanded, so that duplicates do
+        not multiply along the way. When `max_per_target` is given, a
+        target is dropped once that many paths lead to it, so that the
+        paths are spread over the targets.
+
+        Args:
+            source: Source path.
+            targets: Target paths.
+            label (callable, optional): Function giving the elements of
+                the sequence of a path. Defaults to None.
+            max_per_target (int, optional): Maximum number of paths to each
+                target. Defaults to None.
+
+        Yields:
+            list: Paths from the source to a target.
+        """
+        source_id = self.ids[source]
+        target_ids = {self.ids[target] for target in targets}
+        n_target_paths = dict.fromkeys(target_ids, 0)
+        predecessors = self._get_predecessors()
+        distances = _get_distances(predecessors, target_ids)
+        sequence_ids = {}
+        expanded = set()
+        yielded = set()
+        counter = count()
+        queue = []
+        if source_id in distances:
+            queue.append(
+                (distances[source_id], next(counter), 0, source_id, 0, None)
+            )
+        while queue:
+            estimate, _, length, node_id, sequence_id, parent = heappop(
+                queue
+            )
+            distance = distances.get(node_id)
+            if distance is None:
+                continue
+            if length + distance != estimate:
+                # the targets nearest to the path were dropped
+                heappush(
+                    queue,
+                    (
+                        length + distance,
+                        next(counter),
+                        length,
+                        node_id,
+                        sequence_id,
+                        parent,
+                    ),
+                )
+                continue
+            if label is not None:
+                if (node_id, sequence_id) in expanded:
+                    continue
+                expanded.add((node_id, sequence_id))
+            path = (node_id, parent)
+            if node_id in target_ids:
+                if label is not None:
+                    if sequence_id in yielded:
+                        continue
+                    yielded.add(sequence_id)
+                yield self._unwind(path)
+                n_target_paths[node_id] += 1
+                if (
+                    max_per_target is not None
+                    and n_target_paths[node_id] >= max_per_target
+                ):
+                    target_ids.discard(node_id)
+                    distances = _get_distances(predecessors, target_ids)
+                continue
+            for successor_id in self.successors[node_id]:
+                successor_distance = distances.get(successor_id)
+                if successor_distance is None:
+                    continue
+                successor_sequence_id = sequence_id
+                if label is not None:
+                    for element in label(self.nodes[successor_id]):
+                        successor_sequence_id = sequence_ids.setdefault(
+                            (successor_sequence_id, element),
+                            len(sequence_ids) + 1,
+                        )
+                heappush(
+                    queue,
+                    (
+                        length + 1 + successor_distance,
+                        next(counter),
+                        length + 1,
+                        successor_id,
+                        successor_sequence_id,
+                        path,
+                    ),
+                )
+
+
+def _get_distances(predecessors: list, target_ids: set) -> dict:
+    """
+    Computes the distance of the paths to the nearest target, by a
+    breadth-first search along the reversed edges.
+
+    Args:
+        predecessors (list): Ids of the predecessors of each path, by id.
+        target_ids (set): Ids of the targets.
+
+    Returns:
+        dict: Id to distance, for the paths leading to a target.
+    """
+    distances = dict.fromkeys(target_ids, 0)
+    queue = deque(sorted(target_ids))
+    while queue:
+        node_id = queue.popleft()
+        for predecessor_id in predecessors[node_id]:
+            if predecessor_id not in distances:
+                distances[predecessor_id] = distances[node_id] + 1
+                queue.append(predecessor_id)
+    return distances
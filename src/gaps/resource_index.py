@@ -0,0 +1,276 @@
+import os
+import re
+import logging
+from collections import defaultdict
+
+###############################################################################
+# LOGGING
+###############################################################################
+
+LOG = logging.getLogger("gaps")
+
+###############################################################################
+# GLOBALS
+###############################################################################
+
+# resource directories whose elements are indexed by id and click handler
+ELEMENT_DIRS = ["layout", "menu", "navigation"]
+
+ID_ATTRIBUTE = 'android:id="'
+
+ON_CLICK_ATTRIBUTE = 'android:onClick="'
+
+FRAGMENT_REGEX = re.compile(r'<fragment.*android:name="([^"]*)"')
+
+NAV_GRAPH_ATTRIBUTE = 'app:navGraph="@navigation/'
+
+TITLE_ATTRIBUTE = 'android:title="'
+
+###############################################################################
+# CODE
+###############################################################################
+
+
+class ResourceIndex:
+    """
+    Index of the resources decoded by apktool, built once from `res/`.
+
+    apktool writes one XML element per line, so the files are indexed line
+    by line into tables: the public ids and the strings of `values/`, the
+    titles and the ids of the click handlers of the elements of the
+    layouts, menus and navigation graphs, the string titles of all the
+    elements, the files declaring each fragment class and the files
+    hosting each navigation graph. Files are read in sorted order, and
+    their lines are dropped once indexed.
+    """
+
+    __slots__ = (
+        "public_names",
+        "public_ids",
+        "strings",
+        "element_titles",
+        "click_ids",
+        "string_titles",
+        "fragments",
+        "nav_graph_hosts",
+    )
+
+    def __init__(self, res_path: str):
+        self.public_names = {}
+        self.public_ids = {}
+        self.strings = {}
+        self.element_titles = {}
+        self.click_ids = {}
+        self.string_titles = {}
+        self.fragments = defaultdict(list)
+        self.nav_graph_hosts = defaultdict(list)
+        if not os.path.isdir(res_path):
+            return
+        for dir_name in sorted(os.listdir(res_path)):
+            dir_path = os.path.join(res_path, dir_name)
+            if not os.path.isdir(dir_path):
+                continue
+            for file_name in sorted(os.listdir(dir_path)):
+                if file_name.endswith(".xml"):
+                    self._index_file(dir_name, file_name[:-4], dir_path)
+        LOG.info(
+            f"[+] INDEXED {len(self.element_titles)} RESOURCE FILES, "
+            f"{len(self.public_names)} PUBLIC IDS"
+        )
+
+    def _index_file(self, dir_name: str, name: str, dir_path: str):
+        """
+        Indexes the lines of a resource file.
+
+        Args:
+            dir_name (str): Resource directory, e.g. `layout`.
+            name (str): Name of the resource file, without extension.
+            dir_path (str): Path to the resource directory.
+
+        Returns:
+            None
+        """
+        file_path = os.path.join(dir_path, name + ".xml")
+        try:
+            with open(file_path, "r", errors="replace") as resource_file:
+                lines = [line.strip() for line in resource_file]
+        except OSError as e:
+            LOG.warning(f"[-] UNABLE TO READ {file_path}: {e}")
+            return
+        resource = f"{dir_name}/{name}"
+        if dir_name == "values":
+            if name == "public":
+                self._index_public(lines)
+            elif name == "strings":
+                self._index_strings(lines)
+        if dir_name in ELEMENT_DIRS:
+            element_titles = self.element_titles[resource] = {}
+            click_ids = self.click_ids[resource] = {}
+        for line in lines:
+            element_id = _get_attribute(line, ID_ATTRIBUTE)
+            if element_id is not None:
+                element_id = element_id.split("/")[-1]
+            title = _get_attribute(line, TITLE_ATTRIBUTE)
+            if element_id and title is not None:
+                if "@string/" in title:
+                    self.string_titles.setdefault(
+                        element_id, title.split("/")[1]
+                    )
+                if dir_name in ELEMENT_DIRS:
+                    element_titles.setdefault(element_id, title)
+            handler = _get_attribute(line, ON_CLICK_ATTRIBUTE)
+            if element_id and handler and dir_name in ELEMENT_DIRS:
+                click_ids.setdefault(handler, element_id)
+            if "<fragment" in line:
+                fragment = FRAGMENT_REGEX.search(line)
+                if fragment:
+                    self.fragments[fragment.group(1)].append(resource)
+            if NAV_GRAPH_ATTRIBUTE in line:
+                nav_graph = line.split(NAV_GRAPH_ATTRIBUTE)[1].split('"')[0]
+                self.nav_graph_hosts[nav_graph].append(resource)
+
+    def _index_public(self, lines: list):
+        for line in lines:
+            if 'name="' in line and "id=" in line:
+                resource_id = line.split('id="')[1].split('"')[0]
+                resource_name = line.split('name="')[1].split('"')[0]
+                self.public_names[resource_id] = resource_name
+                self.public_ids.setdefault(resource_name, resource_id)
+
+    def _index_strings(self, lines: list):
+        for line in lines:
+            if 'name="' in line and ">" in line:
+                value = line.split(">")[1].split("<")[0]
+                name = line.split('name="')[1].split('"')[0]
+                self.strings[name] = value
+
+    def get_title(self, resource: str, element_id: str) -> str:
+        """
+        Retrieves the title of an element of a layout, menu or navigation
+        graph.
+
+        Args:
+            resource (str): Resource file, e.g. `menu/main`.
+            element_id (str): Element ID.
+
+        Returns:
+            str: Title, None if not found.
+        """
+        return self.element_titles.get(resource, {}).get(element_id)
+
+    def get_click_id(self, resource: str, handler: str) -> str:
+        """
+        Retrieves the ID of the element of a layout, menu or navigation
+        graph declaring a click handler.
+
+        Args:
+            resource (str): Resource file, e.g. `layout/activity_main`.
+            handler (str): Name of the handler method.
+
+        Returns:
+            str: Element ID, None if not found.
+        """
+        return self.click_ids.get(resource, {}).get(handler)
+
+    def get_string_title(self, element_id: str) -> str:
+        """
+        Retrieves the string resource used as title by the first element
+        with an ID.
+
+        Args:
+            element_id (str): Element ID.
+
+        Returns:
+            str: Name of the string resource, None if not found.
+        """
+        return self.string_titles.get(element_id)
+
+
+def _get_attribute(line: str, attribute: str) -> str:
+    """
+    Retrieves the value of an attribute in a line of a resource file.
+
+    Args:
+        line (str): Line of a resource file.
+        attribute (str): Attribute, followed by `="`.
+
+    Returns:
+        str: Value, None if the line has no such attribute.
+    """
+    if attribute not in line:
+        return None
+    return line.split(attribute)[1].split('"')[0]
+
+
+def get_resource_fields(dx) -> dict:
+    """
+    Extracts the resource ids declared by the R classes of the app, which
+    are the static values of their fields in the DEX files.
+
+    Args:
+        dx: Androguard Analysis object.
+
+    Returns:
+        dict: R class name, without `;`, to field name to hexadecimal id.
+    """
+    resource_fields = {}
+    for class_analysis in dx.get_classes():
+        if class_analysis.is_external():
+            continue
+        class_name = str(class_analysis.name).replace(";", "")
+        if class_name.split("/")[-1].split("$")[0] != "R":
+            continue
+        fields = {}
+        for field in class_analysis.get_vm_class().get_fields():
+            init_value = field.get_init_value()
+            if init_value is not None and field.get_descriptor() == "I":
+                fields[str(field.get_name())] = hex(init_value.get_value())
+        if fields:
+            resource_fields[class_name] = fields
+    return resource_fields
+
+
+class ResourceIds:
+    """
+    Resource ids declared by the R classes of the app, available without
+    the decoded resources.
+
+    Ids are indexed by R class and field name, by resource type, i.e. the
+    R class name without package, and by id. Apps contain one R class per
+    library, declaring the same ids, so the lookups by type and by id use
+    the first class in name order.
+    """
+
+    __slots__ = ("fields", "types", "names")
+
+    def __init__(self, resource_fields: dict):
+        self.fields = resource_fields
+        self.types = {}
+        self.names = {}
+        for class_name in sorted(resource_fields):
+            resource_type = self.types.setdefault(
+                class_name.split("/")[-1], {}
+            )
+            for field_name, resource_id in resource_fields[class_name].items():
+                resource_type.setdefault(field_name, resource_id)
+                self.names.setdefault(resource_id, field_name)
+        LOG.info(f"[+] INDEXED {len(self.names)} RESOURCE IDS FROM R CLASSES")
+
+    def get_id(self, class_name: str, field_name: str) -> str:
+        """
+        Retrieves the id of a field of an R class, falling back to the R
+        classes of the same type when the class does not declare it.
+
+        Args:
+            class_name (str): Name of the R class, without `;`, or
+                resource type, e.g. `R$layout`.
+            field_name (str): Name of the field.
+
+        Returns:
+            str: Hexadecimal resource id, None if not found.
+        """
+        resource_id = self.fields.get(class_name, {}).get(field_name)
+        if resource_id is None:
+            resource_type = self.types.get(class_name.split("/")[-1], {})
+            resource_id = resource_type.get(field_name)
+        return resource_id
@@ -0,0 +1,211 @@
+import os
+import pickle
+import stat
+import hashlib
+import logging
+import tempfile
+
+from . import dalvik_disassembler
+
+###############################################################################
+# LOGGING
+###############################################################################
+
+LOG = logging.getLogger("gaps")
+
+###############################################################################
+# GLOBALS
+###############################################################################
+
+# bump whenever the layout or the content of the indexes changes
+SNAPSHOT_VERSION = 10
+
+# private to the user, as loading a snapshot runs the code it pickles
+SNAPSHOT_DIR = os.path.join(
+    os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache"),
+    "gaps",
+    "snapshots",
+)
+
+indexes = dalvik_disassembler.method_indexes + [
+    "class_hierarchy",
+    "resource_ids",
+    "symbols",
+]
+
+###############################################################################
+# CODE
+###############################################################################
+
+
+def get_digest(dalvik_path: str) -> str:
+    """
+    Computes the content hash of the analyzed file.
+
+    Args:
+        dalvik_path (str): Path to the Dalvik file.
+
+    Returns:
+        str: Hex sha256 digest of the file.
+    """
+    sha256 = hashlib.sha256()
+    with open(dalvik_path, "rb") as dalvik_file:
+        for chunk in iter(lambda: dalvik_file.read(1 << 20), b""):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+def get_snapshot_path(gaps) -> str:
+    """
+    Retrieves the path of the snapshot for the analyzed file.
+
+    Args:
+        gaps (object): Instance of GAPS.
+
+    Returns:
+        str: Path of the snapshot file.
+    """
+    return os.path.join(gaps.snapshot_dir, f"{gaps.digest}.snapshot")
+
+
+def _is_private(status: os.stat_result) -> bool:
+    """
+    Checks whether a file belongs to the user and cannot be written by the
+    other users.
+
+    Args:
+        status (os.stat_result): Status of the file.
+
+    Returns:
+        bool: True if private, False otherwise.
+    """
+    return status.st_uid == os.getuid() and not (
+        status.st_mode & (stat.S_IWGRP | stat.S_IWOTH)
+    )
+
+
+def load_snapshot(gaps) -> dict:
+    """
+    Loads the snapshot of the analyzed file, if any.
+    Snapshots are only loaded from a directory and a file private to the
+    user, so that no other user can plant one.
+
+    Args:
+        gaps (object): Instance of GAPS.
+
+    Returns:
+        dict: Snapshot content, None if missing or outdated.
+    """
+    snapshot_path = get_snapshot_path(gaps)
+    if not os.path.exists(snapshot_path):
+        return None
+    try:
+        if not _is_private(os.stat(gaps.snapshot_dir)):
+            LOG.warning(f"[-] UNSAFE SNAPSHOT DIRECTORY {gaps.snapshot_dir}")
+            return None
+        with open(snapshot_path, "rb") as snapshot_file:
+            if not _is_private(os.fstat(snapshot_file.fileno())):
+                LOG.warning(f"[-] UNSAFE SNAPSHOT {snapshot_path}")
+                return None
+            snapshot = pickle.load(snapshot_file)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError) as e:
+        LOG.warning(f"[-] CORRUPTED SNAPSHOT {snapshot_path}: {e}")
+        return None
+    if (
+        not isinstance(snapshot, dict)
+        or snapshot.get("version") != SNAPSHOT_VERSION
+    ):
+        LOG.info(f"[-] OUTDATED SNAPSHOT {snapshot_path}")
+        return None
+    LOG.info(f"[+] LOADED SNAPSHOT {snapshot_path}")
+    return snapshot
+
+
+def restore_snapshot(gaps, snapshot: dict):
+    """
+    Restores the query-independent indexes from a snapshot.
+
+    Args:
+        gaps (object): Instance of GAPS.
+        snapshot (dict): Snapshot content.
+
+    Returns:
+        None
+    """
+    for index in indexes:
+        setattr(gaps, index, snapshot[index])
+    dalvik_disassembler.merge_signature_index(
+        gaps.signature_to_address, snapshot["signature_to_address"]
+    )
+    gaps.method_index = len(gaps.method_graphs)
+
+
+def save_snapshot(gaps):
+    """
+    Saves the query-independent indexes of the analyzed file.
+    The snapshot is written to a temporary file first, so that concurrent
+    runs never read a partial snapshot.
+
+    Args:
+        gaps (object): Instance of GAPS.
+
+    Returns:
+        None
+    """
+    snapshot = {"version": SNAPSHOT_VERSION}
+    for index in indexes:
+        snapshot[index] = getattr(gaps, index)
+    snapshot["signature_to_address"] = (
+        dalvik_disassembler.signature_index_to_dict(gaps.signature_to_address)
+    )
+    snapshot_path = get_snapshot_path(gaps)
+    tmp_snapshot_path = None
+    try:
+        os.makedirs(gaps.snapshot_dir, mode=0o700, exist_ok=True)
+        if not _is_private(os.stat(gaps.snapshot_dir)):
+            LOG.warning(f"[-] UNSAFE SNAPSHOT DIRECTORY {gaps.snapshot_dir}")
+            return
+        fd, tmp_snapshot_path = tempfile.mkstemp(dir=gaps.snapshot_dir)
+        with os.fdopen(fd, "wb") as snapshot_file:
+            pickle.dump(snapshot, snapshot_file, pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_snapshot_path, snapshot_path)
+    except (OSError, pickle.PicklingError, TypeError) as e:
+        LOG.warning(f"[-] UNABLE TO SAVE SNAPSHOT {snapshot_path}: {e}")
+        if tmp_snapshot_path is not None:
+            try:
+                os.unlink(tmp_snapshot_path)
+            except OSError:
+                pass
+        return
+    LOG.info(f"[+] SAVED SNAPSHOT {snapshot_path}")
+
+
+def is_disassembly_cached(gaps) -> bool:
+    """
+    Checks whether the disassembly directory belongs to the analyzed file.
+
+    Args:
+        gaps (object): Instance of GAPS.
+
+    Returns:
+        bool: True if the disassembly can be reused, False otherwise.
+    """
+    marker_path = os.path.join(gaps.tmp_path, ".gaps-digest")
+    if not os.path.exists(marker_path):
+        return False
+    with open(marker_path, "r") as marker_file:
+        return marker_file.read().strip() == gaps.digest
+
+
+def mark_disassembly(gaps):
+    """
+    Marks the disassembly directory with the digest of the analyzed file.
+
+    Args:
+        gaps (object): Instance of GAPS.
+
+    Returns:
+        None
+    """
+    with open(os.path.join(gaps.tmp_path, ".gaps-digest"), "w") as marker:
+        marker.write(gaps.digest)
@@ -0,0 +1,87 @@
+###############################################################################
+# CODE
+###############################################################################
+
+
+class SymbolTable:
+    """
+    Maps strings to dense integer ids and back.
+
+    A single table is shared by the whole analysis, so that each class,
+    method, field and instruction symbol is stored once: the indexes keep
+    the instance held by the table, making equal symbols identical objects.
+    Values derived from the symbols, such as parsed references, can be
+    cached by id in `parsed`, which lives and dies with the table and is
+    not pickled.
+    """
+
+    __slots__ = ("ids", "symbols", "parsed")
+
+    def __init__(self):
+        self.ids = {}
+        self.symbols = []
+        self.parsed = {}
+
+    def __getstate__(self):
+        return self.ids, self.symbols
+
+    def __setstate__(self, state):
+        self.ids, self.symbols = state
+        self.parsed = {}
+
+    def __len__(self) -> int:
+        return len(self.symbols)
+
+    def intern(self, symbol: str) -> int:
+        """
+        Retrieves the id of a symbol, adding it to the table if missing.
+
+        Args:
+            symbol (str): The symbol.
+
+        Returns:
+            int: Id of the symbol.
+        """
+        symbol_id = self.ids.get(symbol)
+        if symbol_id is None:
+            symbol_id = len(self.symbols)
+            self.ids[symbol] = symbol_id
+            self.symbols.append(symbol)
+        return symbol_id
+
+    def get(self, symbol_id: int) -> str:
+        """
+        Retrieves the symbol with the given id.
+
+        Args:
+            symbol_id (int): Id of the symbol.
+
+        Returns:
+            str: The symbol.
+        """
+        return self.symbols[symbol_id]
+
+    def canonical(self, symbol: str) -> str:
+        """
+        Retrieves the instance of a symbol stored in the table, adding it
+        if missing.
+
+        Args:
+            symbol (str): The symbol.
+
+        Returns:
+            str: The stored symbol.
+        """
+        return self.symbols[self.intern(symbol)]
+
+    def merge(self, other) -> list:
+        """
+        Adds the symbols of another table to this one.
+
+        Args:
+            other (SymbolTable): Table to merge.
+
+        Returns:
+            list: New id of each symbol of the merged table, by old id.
+        """
+        return [self.intern(symbol) for symbol in other.symbols]
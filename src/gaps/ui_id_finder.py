@@ -1,10 +1,10 @@
-import os
 import re
 import logging
-import subprocess
 from collections import deque, defaultdict
+from bisect import bisect_right
 from difflib import SequenceMatcher
 
+from . import dalvik_disassembler
 from . import path_generation
 from . import method_utils
 from . import data_flow_analysis
@@ -63,7 +63,7 @@ def find_ui_id(last_path: list, gaps) -> [str, str]:
             save = False
             element_id = get_ui_id_from_int(element_int_id, gaps)
         if element_id and not element_text:
-            element_text = _grep_element_text(element_id, gaps)
+            element_text = _find_element_title(element_id, gaps)
         if not element_id and not element_text:
             log = f"MISSING ID {last_instr}\n"
             if log not in gaps.logs:
@@ -98,23 +98,21 @@ def use_ui_id_finder_on_paths(path: list, gaps) -> list:
     return result
 
 
-def _grep_element_text(element_id, gaps):
-    element_text = None
-    grep = subprocess.Popen(
-        f'grep -r "{element_id}" "{gaps.tmp_path}"',
-        shell=True,
-        stdout=subprocess.PIPE,
-    )
-    output_grep = grep.communicate()[0].decode("utf-8").split("\n")
-    for output in output_grep:
-        if output.strip():
-            if ".xml" in output and 'android:title="' in output:
-                string_text = output.split('android:title="')[1].split('"')[0]
-                if "@string/" in string_text:
-                    string_id = string_text.split("/")[1]
-                    element_text = get_string_xml(string_id, gaps)
-                    return element_text
-    return element_text
+def _find_element_title(element_id: str, gaps) -> str:
+    """
+    Retrieves the text of the string resource used as title by an element.
+
+    Args:
+        element_id (str): UI element ID.
+        gaps (object): Object containing necessary data and methods for processing.
+
+    Returns:
+        str: Element text, None if the element has no string title.
+    """
+    string_id = gaps.resources.get_string_title(element_id)
+    if string_id:
+        return get_string_xml(string_id, gaps)
+    return None
 
 
 def add_ui_info_to_path(element_id, element_text, path, gaps):
@@ -320,7 +318,9 @@ def _try_finding_image_view(target_object, gaps):
 
 def get_ui_id_from_int(element_int_id: str, gaps) -> str:
     """
-    Retrieves the UI ID from its integer representation.
+    Retrieves the UI ID from its integer representation, looking first in
+    the R classes and then in the public ids of the decoded resources,
+    which also cover the apps whose R classes were removed.
 
     Args:
         element_int_id (str): Integer representation of the UI ID.
@@ -329,9 +329,9 @@ def get_ui_id_from_int(element_int_id: str, gaps) -> str:
     Returns:
         str: UI ID.
     """
-    element_id = ""
-    if element_int_id in gaps.public_xml:
-        element_id = gaps.public_xml[element_int_id]
+    element_id = gaps.resource_ids.names.get(element_int_id)
+    if element_id is None:
+        element_id = gaps.resources.public_names.get(element_int_id, "")
     return element_id
 
 
@@ -550,8 +550,8 @@ def _get_int_id_from_findViewById(path: list, inst_index: int, gaps) -> int:
                         only_class_name = only_class_name.split("$")[0]
                     only_class_name = only_class_name.split("/")[-1]
                     if only_class_name == "R":
-                        return _lookup_var_in_R(
-                            class_name, variable_name, gaps.tmp_path
+                        return gaps.resource_ids.get_id(
+                            class_name, variable_name
                         )
                     result = data_flow_analysis.constant_propagation(
                         parameter_id, gaps
@@ -564,44 +564,6 @@ def _get_int_id_from_findViewById(path: list, inst_index: int, gaps) -> int:
     return resource_int_id
 
 
-def _lookup_var_in_R(
-    class_name: str, variable_name: str, tmp_path: str
-) -> str:
-    """
-    Looks up a variable in the R class.
-
-    Args:
-        class_name (str): Class name.
-        variable_name (str): Variable name.
-        tmp_path (str): Temporary path.
-
-    Returns:
-        str: Variable ID.
-    """
-    if "$" in class_name:
-        class_name = class_name.replace("$", r"\$")
-    find = subprocess.Popen(
-        f'find "{tmp_path}" -type f -wholename "*/{class_name.split("/")[-1]}.smali"',
-        shell=True,
-        stdout=subprocess.PIPE,
-    )
-    output_find = find.communicate()[0].decode("utf-8").split("\n")
-    for file_path in output_find:
-        if file_path.strip():
-            if "$" in file_path:
-                file_path = file_path.replace("$", r"\$")
-            grep = subprocess.Popen(
-                f'cat "{file_path}" | grep "{variable_name}:"',
-                shell=True,
-                stdout=subprocess.PIPE,
-            )
-            output_grep = grep.communicate()[0].decode("utf-8").split("\n")
-            for result in output_grep:
-                if result.strip():
-                    return result.split()[-1]
-    return None
-
-
 def _get_int_id_from_MenuItem(last_path: list, tmp_path: str, gaps) -> str:
     """
     Extracts the integer ID from a MenuItem.
@@ -691,52 +653,47 @@ def _get_int_id_from_switch_payload(last_path: list, gaps) -> str:
     if instructions_before_switch > 5:
         instructions_before_switch = 5
     method_signature = last_path[len(last_path) - 1].split()[1]
-    if method_signature in gaps.methods_with_switches:
-        method_body = gaps.methods_with_switches[method_signature]
-    else:
+    switch_table = gaps.switch_tables.get(method_signature)
+    if switch_table is None:
         return -1
-    payload_labels = None
-    last_label = None
-    int_id = -1
-    for i, line in enumerate(method_body):
-        instr = line.split()[0]
-        if "; " in line:
-            line = line.replace("; ", ";")
-        if "sparse-switch" == instr or "packed-switch" == instr:
-            payload_labels = line
+    _, translate = dalvik_disassembler.get_method_graph(
+        gaps, switch_table.method_index
+    )
+    switches = {switch.offset: switch for switch in switch_table.switches}
+    offsets = list(translate.instructions)
+    current_switch = None
+    for i, offset in enumerate(offsets):
+        if offset in switches:
+            current_switch = switches[offset]
             continue
-        if payload_labels and line == reference_instr:
-            correct = True
-            j = 0
-            method_body_index = i - j
-            while j < instructions_before_switch:
-                instr_method_body = method_body[method_body_index]
-                if i - j >= 0 and "label:" in instr_method_body:
-                    instr_method_body = method_body[method_body_index - 1]
-                    method_body_index -= 1
-                if "; " in instr_method_body:
-                    instr_method_body = instr_method_body.replace("; ", ";")
-                if "[ " in instr_method_body:
-                    instr_method_body = instr_method_body.split("[ ")[0]
-                if (
-                    _string_similarity(
-                        last_path[reference_instr_index + j], instr_method_body
-                    )
-                    < 0.2
-                ):
-                    correct = False
-                    break
-                j += 1
-                method_body_index -= 1
-            if correct and last_label and last_label in payload_labels:
-                gui_id = payload_labels.split(last_label)[0].split()[-1]
-                int_id = -1
-                if re.search(r"^\d+$", gui_id):
-                    int_id = hex(int(gui_id))
-                return int_id
-        if line.startswith("label:") and payload_labels:
-            last_label = ":" + line.split()[-1]
-    return int_id
+        if not current_switch or translate[offset] != reference_instr:
+            continue
+        correct = True
+        for j in range(instructions_before_switch):
+            if (
+                i - j < 0
+                or _string_similarity(
+                    last_path[reference_instr_index + j],
+                    translate[offsets[i - j]],
+                )
+                < 0.2
+            ):
+                correct = False
+                break
+        if not correct:
+            continue
+        # case of the basic block of the instruction
+        block_start = switch_table.block_starts[
+            bisect_right(switch_table.block_starts, offset) - 1
+        ]
+        if block_start == current_switch.default:
+            return -1
+        for value, target in current_switch.cases.items():
+            if target == block_start:
+                if value < 0:
+                    return -1
+                return hex(value)
+    return -1
 
 
 def get_string_xml(string_id: str, gaps) -> str:
@@ -752,9 +709,7 @@ def get_string_xml(string_id: str, gaps) -> str:
     """
     if not string_id:
         return ""
-    if string_id in gaps.strings_xml:
-        return gaps.strings_xml[string_id]
-    return ""
+    return gaps.resources.strings.get(string_id, "")
 
 
 def _get_text_id_from_MenuInflater(
@@ -799,14 +754,8 @@ def _get_text_id_from_MenuInflater(
                             if re.search(r"\d+", value):
                                 menu_int_id = hex(int(value))
                                 menu_id = get_ui_id_from_int(menu_int_id, gaps)
-                                activity_xml_path = (
-                                    gaps.tmp_path
-                                    + "/res/menu/"
-                                    + menu_id
-                                    + ".xml"
-                                )
-                                element_info = get_value_from_xml(
-                                    activity_xml_path, "title", element_id
+                                element_info = gaps.resources.get_title(
+                                    "menu/" + menu_id, element_id
                                 )
 
                                 if element_info and "@string/" in element_info:
@@ -842,16 +791,13 @@ def _get_id_from_xml(class_name: str, identifier: str, gaps) -> str:
     # find the numeric id
     activity_int_id = _get_int_id(paths, gaps)
     # find the id of the file
-    activity_id = ""
-    if activity_int_id in gaps.public_xml:
-        activity_id = gaps.public_xml[activity_int_id]
+    activity_id = gaps.resources.public_names.get(activity_int_id, "")
 
     # look for the button text in the activity.xml file
     if activity_id:
-        activity_xml_path = (
-            gaps.tmp_path + "/res/layout/" + activity_id + ".xml"
+        element_id = gaps.resources.get_click_id(
+            "layout/" + activity_id, identifier
         )
-        element_id = get_value_from_xml(activity_xml_path, "id", identifier)
 
     return element_id
 
@@ -883,54 +829,3 @@ def _get_int_id(paths: list, gaps) -> str:
                         id_ = hex(int(const_val))
                         break
     return id_
-
-
-def get_value_from_xml(
-    file_path: str, attribute: str, resource_id: str
-) -> str:
-    """
-    Retrieves the value of an attribute in an XML file.
-
-    Args:
-        file_path (str): Path to the XML file.
-        attribute (str): Attribute to retrieve.
-        resource_id (str): Resource ID.
-
-    Returns:
-        str: Attribute value.
-    """
-    if resource_id and os.path.exists(file_path):
-        lines = open(file_path, "r").readlines()
-        for line in lines:
-            if str(resource_id) in line and f'{attribute}="' in line:
-                resource_value = line.split(f'{attribute}="')[1].split('"')[0]
-                if "@id/" in resource_value:
-                    resource_value = resource_value.split("/")[1]
-                return resource_value
-    return None
-
-
-def save_public_strings_xml(gaps):
-    """
-    Saves the public strings from the public.xml and strings.xml file.
-
-    Args:
-        gaps (object): Data and methods for processing.
-    """
-    public_xml_path = os.path.join(gaps.tmp_path, "res/values/public.xml")
-    if os.path.exists(public_xml_path):
-        lines = open(public_xml_path, "r").readlines()
-        for line in lines:
-            if 'name="' in line and "id=" in line:
-                resource_id = line.split('id="')[1].split('"')[0]
-                resource_name = line.split('name="')[1].split('"')[0]
-                gaps.public_xml[resource_id] = resource_name
-
-    strings_xml_path = os.path.join(gaps.tmp_path, "res/values/strings.xml")
-    if os.path.exists(strings_xml_path):
-        lines = open(strings_xml_path, "r").readlines()
-        for line in lines:
-            if 'name="' in line:
-                value = line.split(">")[1].split("<")[0]
-                name = line.split('name="')[1].split('"')[0]
-                gaps.strings_xml[name] = value
@@ -0,0 +1,72 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(
+    0, os.path.join(os.path.dirname(os.path.dirname(__file__)), "src")
+)
+
+from gaps.gaps import GAPS  # noqa: E402
+
+###############################################################################
+# GLOBALS
+###############################################################################
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "data")
+
+# seeds of the fixture apps, app.dex and app2.dex
+APP_SEEDS = [
+    "Lcom/example/app/Worker;->target(Ljava/lang/String;)V",
+    "Lcom/example/app/Helper;->setup(Lcom/example/app/Worker;)V",
+    "Lcom/example/app/Worker;->doWork(I)V",
+    "Landroid/util/Log;->d(Ljava/lang/String; Ljava/lang/String;)I",
+    "Lcom/example/app/Extra;->three(III)V",
+    "Lcom/example/app/Extra;->none()V",
+]
+
+###############################################################################
+# CODE
+###############################################################################
+
+
+@pytest.fixture
+def app_seeds() -> list:
+    return list(APP_SEEDS)
+
+
+@pytest.fixture
+def analyze(tmp_path, monkeypatch):
+    """
+    Analyzes a DEX file of the test data with the given seeds, from a
+    temporary working directory.
+
+    Returns:
+        function: Builds the GAPS instance of a DEX file, taking its name,
+            the seed signatures and the keyword arguments of GAPS.
+    """
+    monkeypatch.chdir(tmp_path)
+
+    def _analyze(dex_name: str, seeds: list, **kwargs) -> GAPS:
+        name = os.path.splitext(dex_name)[0]
+        os.makedirs("testing_seeds", exist_ok=True)
+        with open(os.path.join("testing_seeds", f"{name}.seed"), "w") as f:
+            f.writelines(f"{seed}\n" for seed in seeds)
+        os.makedirs("out", exist_ok=True)
+        kwargs.setdefault("snapshot_dir", None)
+        return GAPS(
+            os.path.join(DATA_DIR, dex_name),
+            None,
+            None,
+            None,
+            None,
+            "1",
+            None,
+            "out",
+            True,
+            0,
+            1000,
+            **kwargs,
+        )
+
+    return _analyze
@@ -0,0 +1,41 @@
+from gaps.call_graph import CallGraph, UNREACHABLE
+
+###############################################################################
+# CODE
+###############################################################################
+
+
+def _get_call_graph() -> CallGraph:
+    method_ids = {f"La;->m{index}()V": index for index in range(6)}
+    # 0 is the entry, 1 and 2 call each other, 5 is only called by 4
+    callers = {1: {0, 2}, 2: {1}, 3: {2}, 5: {4}}
+    return CallGraph(method_ids, callers, {0})
+
+
+def test_condenses_cycles():
+    call_graph = _get_call_graph()
+    assert len({call_graph.get_component(index) for index in range(6)}) == 5
+    component = call_graph.get_component(1)
+    assert call_graph.get_component(2) == component
+    assert sorted(call_graph.get_members(component)) == [1, 2]
+    assert list(call_graph.get_component_callers(component)) == [
+        call_graph.get_component(0)
+    ]
+
+
+def test_entry_distances():
+    call_graph = _get_call_graph()
+    assert call_graph.get_entry_distance(0) == 0
+    assert call_graph.get_entry_distance(1) == 1
+    assert call_graph.get_entry_distance(2) == 1
+    assert call_graph.get_entry_distance(3) == 2
+    assert call_graph.get_entry_distance(5) == UNREACHABLE
+    assert call_graph.reaches_entry(3)
+    assert not call_graph.reaches_entry(4)
+
+
+def test_method_lookup():
+    call_graph = _get_call_graph()
+    assert call_graph.get_method_index("La;->m3()V") == 3
+    assert call_graph.get_method_index("La;->x()V") is None
+    assert sorted(call_graph.get_callers(1)) == [0, 2]
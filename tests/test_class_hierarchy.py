@@ -0,0 +1,66 @@
+import pytest
+
+from gaps.class_hierarchy import ClassHierarchy, ClassInfo
+
+###############################################################################
+# CODE
+###############################################################################
+
+
+@pytest.fixture
+def hierarchy():
+    hierarchy = ClassHierarchy(
+        {
+            "Lapp/Base;": ClassInfo("Landroid/app/Activity;", []),
+            "Lapp/Main;": ClassInfo("Lapp/Base;", ["Lapp/Listener;"]),
+            "Lapp/Other;": ClassInfo("Lapp/Main;", []),
+            "Lapp/Listener;": ClassInfo("Ljava/lang/Object;", []),
+            "Landroid/app/Activity;": ClassInfo("Landroid/content/Context;", []),
+        }
+    )
+    hierarchy.index_overrides(
+        {
+            "onCreate()V": {
+                "> Lapp/Base;->onCreate()V <",
+                "> Lapp/Other;->onCreate()V <",
+            }
+        }
+    )
+    return hierarchy
+
+
+def test_super_classes_stop_at_framework(hierarchy):
+    assert hierarchy.get_super_classes("Lapp/Other") == [
+        "Lapp/Main",
+        "Lapp/Base",
+        "Landroid/app/Activity",
+    ]
+    assert hierarchy.get_super_classes("Lapp/Unknown") == []
+
+
+def test_interfaces_include_inherited_ones(hierarchy):
+    assert hierarchy.get_interfaces("Lapp/Other") == ["Lapp/Listener"]
+    assert hierarchy.get_interfaces("Lapp/Base") == []
+
+
+def test_subclasses(hierarchy):
+    assert hierarchy.get_subclasses("Lapp/Base") == ["Lapp/Main"]
+    assert sorted(hierarchy.get_subclasses("Lapp/Base", True)) == [
+        "Lapp/Main",
+        "Lapp/Other",
+    ]
+
+
+def test_subtypes(hierarchy):
+    assert hierarchy.is_subtype("Lapp/Other", "Lapp/Base")
+    assert hierarchy.is_subtype("Lapp/Other", "Lapp/Listener")
+    # the last superclass is the framework class the hierarchy stops at
+    assert not hierarchy.is_subtype("Lapp/Other", "Landroid/app/Activity")
+    assert not hierarchy.is_subtype("Lapp/Base", "Lapp/Main")
+
+
+def test_overrides(hierarchy):
+    assert hierarchy.get_overrides("Lapp/Base", "onCreate()V") == (
+        "Lapp/Other;->onCreate()V",
+    )
+    assert hierarchy.get_overrides("Lapp/Other", "onCreate()V") == ()
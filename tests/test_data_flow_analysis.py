@@ -0,0 +1,75 @@
+import pytest
+
+from gaps import dalvik_ir
+from gaps import data_flow_analysis
+
+###############################################################################
+# CODE
+###############################################################################
+
+
+@pytest.fixture
+def fields_gaps(analyze):
+    return analyze("fields.dex", ["Lcom/example/f/Cfg;->use()V"])
+
+
+def _get_field_reads(gaps) -> list:
+    return [
+        dalvik_ir.render(instruction, gaps.symbols)
+        for _, method_name, instructions in gaps.method_graphs.values()
+        if "->use()" in method_name
+        for instruction in instructions
+        if "get" in instruction.get_name()
+    ]
+
+
+def test_direct_writes_match_points_to_analysis(fields_gaps, monkeypatch):
+    reads = _get_field_reads(fields_gaps)
+    assert len(reads) == 5
+    direct = {}
+    for read in reads:
+        fields_gaps.search_list = {}
+        direct[read] = dict(
+            data_flow_analysis.constant_propagation(read, fields_gaps)
+        )
+    monkeypatch.setattr(
+        data_flow_analysis, "_get_direct_writes", lambda field, gaps: None
+    )
+    for read in reads:
+        fields_gaps.search_list = {}
+        assert direct[read] == dict(
+            data_flow_analysis.constant_propagation(read, fields_gaps)
+        )
+
+
+def test_direct_writes_skip_path_search(fields_gaps, monkeypatch):
+    def _fail(*args, **kwargs):
+        raise AssertionError("the field writes were searched")
+
+    read = next(
+        read for read in _get_field_reads(fields_gaps) if "->A " in read
+    )
+    monkeypatch.setattr(
+        data_flow_analysis.path_generation, "find_path_smali", _fail
+    )
+    result = data_flow_analysis.constant_propagation(read, fields_gaps)
+    assert sorted(sum(result.values(), [])) == ["5", "7"]
+
+
+def test_direct_writes_fall_back(fields_gaps):
+    # C is written with a parameter, E is read where it is written
+    assert (
+        data_flow_analysis._get_direct_writes(
+            "Lcom/example/f/Cfg;->C", fields_gaps
+        )
+        is None
+    )
+    assert (
+        data_flow_analysis._get_direct_writes(
+            "Lcom/example/f/Cfg;->E", fields_gaps
+        )
+        is None
+    )
+    assert data_flow_analysis.get_field_values(
+        "Lcom/example/f/Cfg;->S", fields_gaps
+    ) == ['"hi"']
@@ -0,0 +1,139 @@
+import json
+import os
+
+import pytest
+
+from gaps import dalvik_disassembler
+from gaps import gaps as gaps_module
+from gaps.call_graph import CallGraph
+from gaps.gaps import QueryResults
+
+from conftest import DATA_DIR
+
+###############################################################################
+# CODE
+###############################################################################
+
+
+def _load_expected_output(dex_name: str) -> dict:
+    name = os.path.splitext(dex_name)[0]
+    with open(os.path.join(DATA_DIR, f"{name}.json")) as expected_file:
+        return json.load(expected_file)
+
+
+def _load_output(gaps) -> dict:
+    name = gaps.file_name
+    with open(os.path.join("out", name, f"{name}-instr.json")) as out_file:
+        return json.load(out_file)
+
+
+def _get_indexes(gaps) -> dict:
+    return {
+        "signature_to_address": json.dumps(
+            dalvik_disassembler.signature_index_to_dict(
+                gaps.signature_to_address
+            ),
+            sort_keys=True,
+            default=sorted,
+        ),
+        "call_sites": dict(gaps.call_sites),
+        "field_writers": dict(gaps.field_writers),
+        "field_readers": dict(gaps.field_readers),
+        "method_names": {
+            index: method_name
+            for index, (_, method_name, _) in gaps.method_graphs.items()
+        },
+    }
+
+
+@pytest.fixture
+def parallel(monkeypatch):
+    """
+    Makes the fixture apps large enough for the worker pools.
+    """
+    monkeypatch.setattr(dalvik_disassembler, "MIN_PARALLEL_METHODS", 1)
+    monkeypatch.setattr(gaps_module, "MIN_PARALLEL_QUERIES", 1)
+
+
+@pytest.mark.parametrize("dex_name", ["app.dex", "app2.dex"])
+def test_output_matches_baseline(analyze, app_seeds, dex_name):
+    gaps = analyze(dex_name, app_seeds)
+    gaps.start_path_finding()
+    assert _load_output(gaps) == _load_expected_output(dex_name)
+
+
+@pytest.mark.parametrize("dex_name", ["app.dex", "app2.dex"])
+def test_parallel_output_matches_baseline(
+    analyze, app_seeds, parallel, dex_name
+):
+    gaps = analyze(dex_name, app_seeds, index_workers=3, query_workers=3)
+    gaps.start_path_finding()
+    assert _load_output(gaps) == _load_expected_output(dex_name)
+
+
+def test_snapshot_output_matches_baseline(
+    analyze, app_seeds, tmp_path, monkeypatch
+):
+    snapshot_dir = str(tmp_path / "snapshots")
+    gaps = analyze("app2.dex", app_seeds, snapshot_dir=snapshot_dir)
+    gaps.start_path_finding()
+    assert os.listdir(snapshot_dir)
+
+    def _fail(*args, **kwargs):
+        raise AssertionError("the app was indexed again")
+
+    monkeypatch.setattr(dalvik_disassembler, "disassemble", _fail)
+    gaps = analyze("app2.dex", app_seeds, snapshot_dir=snapshot_dir)
+    gaps.start_path_finding()
+    assert _load_output(gaps) == _load_expected_output("app2.dex")
+
+
+def test_parallel_index_matches_serial(analyze, app_seeds, parallel):
+    serial = _get_indexes(analyze("app2.dex", app_seeds, index_workers=1))
+    assert serial == _get_indexes(
+        analyze("app2.dex", app_seeds, index_workers=3)
+    )
+
+
+@pytest.mark.parametrize("query_workers", [2, 3, 6])
+def test_parallel_queries_match_serial(
+    analyze, app_seeds, parallel, query_workers
+):
+    gaps = analyze("app.dex", app_seeds, query_workers=1)
+    gaps.start_path_finding()
+    expected = gaps.json_output, dict(gaps.solved_methods), gaps.stats_row[3:]
+    gaps = analyze("app.dex", app_seeds, query_workers=query_workers)
+    gaps.start_path_finding()
+    assert (
+        gaps.json_output,
+        dict(gaps.solved_methods),
+        gaps.stats_row[3:],
+    ) == expected
+
+
+def test_merged_logs_skip_logged_lines(analyze, app_seeds):
+    gaps = analyze("app.dex", app_seeds)
+    gaps.logs = "MISSING ID a\n"
+    gaps.solved_methods = {}
+    gaps.stats_row = [gaps.file_name, 0, 0, 0, 0, 0, 0]
+    for logs in ["MISSING ID b\nMISSING ID a\n", "MISSING ID b\nMISSING ID c\n"]:
+        gaps._merge_query_results(
+            QueryResults({}, {}, [0, 0, 0], logs, 0, 0, 0, 0)
+        )
+    assert gaps.logs == "MISSING ID a\nMISSING ID b\nMISSING ID c\n"
+
+
+def test_seeds_missed_by_call_graph_are_reported(analyze, app_seeds):
+    gaps = analyze("app2.dex", app_seeds)
+    gaps.start_path_finding()
+    expected = gaps.json_output
+    assert expected
+
+    gaps = analyze("app2.dex", app_seeds)
+    # a call graph without the edges through which the seeds are entered
+    gaps.call_graph = CallGraph(gaps.call_graph.method_ids, {}, set())
+    for methods in gaps.starting_points.values():
+        for method_index in methods:
+            assert not gaps.call_graph.reaches_entry(method_index)
+    gaps.start_path_finding()
+    assert gaps.json_output == expected
@@ -0,0 +1,36 @@
+from gaps.lru_cache import LRUCache
+
+###############################################################################
+# CODE
+###############################################################################
+
+
+def test_evicts_least_recently_used():
+    cache = LRUCache(2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)
+    assert len(cache) == 2
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+
+
+def test_replacing_an_entry_marks_it_used():
+    cache = LRUCache(2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.put("a", 3)
+    cache.put("c", 4)
+    assert cache.get("a") == 3
+    assert cache.get("b", "missing") == "missing"
+
+
+def test_counts_hits_and_misses():
+    cache = LRUCache(1)
+    cache.put("a", None)
+    cache.get("a")
+    cache.get("b")
+    cache.get("b")
+    assert (cache.hits, cache.misses) == (1, 2)
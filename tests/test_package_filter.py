@@ -0,0 +1,45 @@
+import pytest
+
+from gaps.package_filter import PrefixMatcher
+
+###############################################################################
+# CODE
+###############################################################################
+
+
+@pytest.fixture
+def matcher():
+    return PrefixMatcher(["Landroid/", "Lorg/xml", "Lcom/example/lib/"])
+
+
+@pytest.mark.parametrize(
+    "descriptor",
+    [
+        "Landroid/app/Activity;",
+        "Landroid/Manifest;",
+        "Lorg/xml/sax/Parser;",
+        "Lorg/xmlpull/v1/XmlPullParser;",
+        "Lcom/example/lib/Util;",
+        "[Landroid/view/View;",
+    ],
+)
+def test_matches_prefixes(matcher, descriptor):
+    assert matcher.match(descriptor)
+
+
+@pytest.mark.parametrize(
+    "descriptor",
+    [
+        "Landroidx/core/Lib;",
+        "Lorg/json/JSONObject;",
+        "Lcom/example/app/Main;",
+        "Lcom/example/lib;",
+        "[I",
+    ],
+)
+def test_rejects_other_classes(matcher, descriptor):
+    assert not matcher.match(descriptor)
+
+
+def test_empty_matcher_rejects_everything():
+    assert not PrefixMatcher().match("Landroid/app/Activity;")
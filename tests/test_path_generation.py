@@ -0,0 +1,36 @@
+import json
+
+import pytest
+
+from gaps import path_generation
+
+###############################################################################
+# CODE
+###############################################################################
+
+
+def _get_reported_paths(gaps) -> dict:
+    return {
+        seed: {json.dumps(path, sort_keys=True) for path in paths.values()}
+        for seed, paths in gaps.json_output.items()
+    }
+
+
+@pytest.mark.parametrize("dex_name", ["app.dex", "app2.dex"])
+def test_expansion_order_keeps_reported_paths(
+    analyze, app_seeds, monkeypatch, dex_name
+):
+    gaps = analyze(dex_name, app_seeds)
+    gaps.start_path_finding()
+    ranked = _get_reported_paths(gaps)
+
+    # a constant rank keeps the order in which the paths are found
+    monkeypatch.setattr(
+        path_generation, "_get_expansion_rank", lambda path, gaps: 0
+    )
+    gaps = analyze(dex_name, app_seeds)
+    gaps.start_path_finding()
+    unranked = _get_reported_paths(gaps)
+    assert unranked
+    for seed, paths in unranked.items():
+        assert paths <= ranked.get(seed, set())
@@ -0,0 +1,54 @@
+from gaps.path_graph import PathGraph
+
+###############################################################################
+# CODE
+###############################################################################
+
+
+def _get_graph() -> PathGraph:
+    graph = PathGraph()
+    for source, target in [
+        ("s", "a"),
+        ("s", "b"),
+        ("a", "t1"),
+        ("b", "c"),
+        ("c", "t1"),
+        ("b", "t2"),
+    ]:
+        graph.add_edge(source, target)
+    return graph
+
+
+def test_tracks_leaves():
+    graph = _get_graph()
+    assert len(graph) == 6
+    assert "c" in graph
+    assert graph.get_leaves() == ["t1", "t2"]
+    graph.add_edge("t2", "d")
+    assert graph.get_leaves() == ["t1", "d"]
+
+
+def test_shortest_paths_in_order_of_length():
+    paths = list(_get_graph().shortest_paths("s", ["t1", "t2"]))
+    assert paths == [
+        ["s", "a", "t1"],
+        ["s", "b", "t2"],
+        ["s", "b", "c", "t1"],
+    ]
+
+
+def test_shortest_paths_skip_duplicate_labels():
+    labels = {"s": [], "a": ["x"], "b": ["x"], "c": [], "t1": ["y"]}
+    paths = list(
+        _get_graph().shortest_paths(
+            "s", ["t1"], label=lambda node: labels[node]
+        )
+    )
+    assert paths == [["s", "a", "t1"]]
+
+
+def test_shortest_paths_per_target():
+    paths = list(
+        _get_graph().shortest_paths("s", ["t1", "t2"], max_per_target=1)
+    )
+    assert paths == [["s", "a", "t1"], ["s", "b", "t2"]]
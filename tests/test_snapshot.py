@@ -0,0 +1,67 @@
+import os
+import pickle
+
+import pytest
+
+from gaps import snapshot
+
+###############################################################################
+# CODE
+###############################################################################
+
+
+@pytest.fixture
+def snapshot_gaps(analyze, app_seeds, tmp_path):
+    return analyze(
+        "app2.dex", app_seeds, snapshot_dir=str(tmp_path / "snapshots")
+    )
+
+
+def test_saves_private_snapshot(snapshot_gaps):
+    snapshot_path = snapshot.get_snapshot_path(snapshot_gaps)
+    assert os.stat(snapshot_gaps.snapshot_dir).st_mode & 0o777 == 0o700
+    assert os.stat(snapshot_path).st_mode & 0o077 == 0
+    saved = snapshot.load_snapshot(snapshot_gaps)
+    assert saved["version"] == snapshot.SNAPSHOT_VERSION
+    assert saved["method_graphs"].keys() == snapshot_gaps.method_graphs.keys()
+    assert saved["symbols"].symbols == snapshot_gaps.symbols.symbols
+
+
+def test_refuses_shared_directory(snapshot_gaps):
+    os.chmod(snapshot_gaps.snapshot_dir, 0o777)
+    try:
+        assert snapshot.load_snapshot(snapshot_gaps) is None
+        os.unlink(snapshot.get_snapshot_path(snapshot_gaps))
+        snapshot.save_snapshot(snapshot_gaps)
+        assert not os.listdir(snapshot_gaps.snapshot_dir)
+    finally:
+        os.chmod(snapshot_gaps.snapshot_dir, 0o700)
+
+
+def test_refuses_shared_snapshot(snapshot_gaps):
+    os.chmod(snapshot.get_snapshot_path(snapshot_gaps), 0o666)
+    assert snapshot.load_snapshot(snapshot_gaps) is None
+
+
+@pytest.mark.parametrize(
+    "content",
+    [
+        b"not a pickle",
+        b"",
+        pickle.dumps({"version": snapshot.SNAPSHOT_VERSION - 1}),
+        pickle.dumps(["not", "a", "snapshot"]),
+    ],
+)
+def test_ignores_unusable_snapshot(snapshot_gaps, content):
+    with open(snapshot.get_snapshot_path(snapshot_gaps), "wb") as f:
+        f.write(content)
+    assert snapshot.load_snapshot(snapshot_gaps) is None
+
+
+def test_digest_depends_on_content(tmp_path):
+    first, second = tmp_path / "a.dex", tmp_path / "b.dex"
+    first.write_bytes(b"dex\n035\0")
+    second.write_bytes(b"dex\n035\0")
+    assert snapshot.get_digest(str(first)) == snapshot.get_digest(str(second))
+    second.write_bytes(b"dex\n036\0")
+    assert snapshot.get_digest(str(first)) != snapshot.get_digest(str(second))
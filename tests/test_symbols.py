@@ -0,0 +1,41 @@
+import pickle
+
+from gaps.symbols import SymbolTable
+
+###############################################################################
+# CODE
+###############################################################################
+
+
+def test_interns_dense_ids():
+    symbols = SymbolTable()
+    assert symbols.intern("a") == 0
+    assert symbols.intern("b") == 1
+    assert symbols.intern("a") == 0
+    assert len(symbols) == 2
+    assert symbols.get(1) == "b"
+
+
+def test_canonical_symbols_are_identical():
+    symbols = SymbolTable()
+    first = symbols.canonical("".join(["Lcom/", "A;"]))
+    assert symbols.canonical("".join(["Lcom", "/A;"])) is first
+
+
+def test_merge_remaps_ids():
+    symbols = SymbolTable()
+    symbols.intern("a")
+    other = SymbolTable()
+    other.intern("b")
+    other.intern("a")
+    assert symbols.merge(other) == [1, 0]
+    assert symbols.symbols == ["a", "b"]
+
+
+def test_parsed_values_are_not_pickled():
+    symbols = SymbolTable()
+    symbols.parsed[symbols.intern("a")] = object()
+    restored = pickle.loads(pickle.dumps(symbols))
+    assert restored.symbols == ["a"]
+    assert restored.ids == {"a": 0}
+    assert restored.parsed == {}